@@ -1,11 +1,30 @@
-import os
+import importlib
 from flask import Flask
-import cloudinary
 from app.config import config
-from app.extensions import db, cors, jwt, migrate 
+from app.extensions import db, cors, jwt, migrate, rate_limiter, read_replica, compress
+from app.utils.heartbeat import heartbeat_buffer
+from app.utils.json_provider import FastJSONProvider
+from app.utils.metrics import init_metrics
+from app.utils.profiling import init_profiling
+from app.utils.user_cache import init_revocations
 
-def create_app(config_name='development'):
+# Blueprint name -> module exposing `bp`
+BLUEPRINTS = {
+    'customer': 'app.routes.customer_routes',
+    'admin': 'app.routes.admin_routes',
+    'auth': 'app.routes.auth_routes',
+    'vendor': 'app.routes.vendor_routes',
+}
+
+def create_app(config_name='development', blueprints=None):
+    """
+    The application factory. `blueprints` names the route groups to
+    register (default: all); the scheduler and scripts pass () so they
+    don't import any route modules. External clients (Cloudinary, M-Pesa)
+    are set up on first use, not here.
+    """
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     
     # 1. Load config
     app.config.from_object(config[config_name])
@@ -24,25 +43,24 @@ def create_app(config_name='development'):
     }})
 
     jwt.init_app(app)
+    init_revocations(app)
     migrate.init_app(app, db)
+    read_replica.init_app(app)
+    init_metrics(app)
+    # After metrics: its before_request hook must run first so 429s are recorded
+    rate_limiter.init_app(app)
+    init_profiling(app)
+    heartbeat_buffer.init_app(app)
+    # Registered last so it runs first among the after_request hooks
+    compress.init_app(app)
 
-    # Configure Cloudinary
-    if app.config.get('CLOUDINARY_CLOUD_NAME'):
-        cloudinary.config(
-            cloud_name=app.config['CLOUDINARY_CLOUD_NAME'],
-            api_key=app.config['CLOUDINARY_API_KEY'],
-            api_secret=app.config['CLOUDINARY_API_SECRET']
-        )
-    
-    # 3. Import Blueprints
-    # Note: We import here to avoid circular dependency issues
-    from app.routes import customer_routes, admin_routes, auth_routes, vendor_routes
+    # 3. Models are needed by migrations and jobs even without any routes
+    from app import models  # noqa: F401
 
-    # 4. Register Blueprints (THIS WAS MISSING)
-    app.register_blueprint(customer_routes.bp) 
-    app.register_blueprint(admin_routes.bp)
-    app.register_blueprint(auth_routes.bp)
-    app.register_blueprint(vendor_routes.bp)
+    # 4. Import and register Blueprints
+    # Note: We import here to avoid circular dependency issues
+    for name in (BLUEPRINTS if blueprints is None else blueprints):
+        app.register_blueprint(importlib.import_module(BLUEPRINTS[name]).bp)
     
     @app.route('/')
     def index():
@@ -1,11 +1,24 @@
 import os
 from datetime import timedelta
-from dotenv import load_dotenv
 from pathlib import Path
 
-# Load environment variables from .env file
+# Load environment variables from .env file (local development only;
+# deployed workers get real environment variables and skip the import)
 env_path = Path(__file__).parent.parent / '.env'
-load_dotenv(dotenv_path=env_path)
+if env_path.exists():
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=env_path)
+
+def engine_options(url):
+    if not url or url in ('sqlite://', 'sqlite:///:memory:'):
+        return {}
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True,
+    }
 
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev_key_change_in_prod')
@@ -13,16 +26,154 @@ class Config:
     
     # --- FIX: Keep vendors logged in for 1 hour ---
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+
+    # Seconds a user snapshot stays in the in-process cache (see utils/user_cache.py)
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 60))
+
+    # Where revoke_user() records revocations: "memory" (this worker only) or
+    # "database" (shared via user_revocations; each worker re-reads it at
+    # most every SYNC_INTERVAL seconds).
+    USER_REVOCATION_STORAGE = os.getenv('USER_REVOCATION_STORAGE', 'memory')
+    USER_REVOCATION_SYNC_INTERVAL = float(os.getenv('USER_REVOCATION_SYNC_INTERVAL', 5))
+
+    # Password hashing. METHOD is any werkzeug method string, e.g.
+    # 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000' (work factor included).
+    # Hashes run on a pool of WORKERS threads with up to QUEUE callers waiting
+    # TIMEOUT seconds for a slot; beyond that requests get a 503.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', 32))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 5))
+
+    # Prometheus-text /metrics endpoint with per-endpoint latency, SQL and
+    # external-call instrumentation. Off unless enabled; with TOKEN set,
+    # scrapes must send "Authorization: Bearer <token>".
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+    # gzip (or brotli, when installed) for responses of at least MIN_SIZE
+    # bytes, negotiated from Accept-Encoding. Compressed GET bodies are
+    # cached per worker by ETag, up to CACHE_BYTES in total (0 disables).
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))
+    COMPRESSION_CACHE_BYTES = int(os.getenv('COMPRESSION_CACHE_BYTES', 16 * 1024 * 1024))
+    COMPRESSION_MIMETYPES = ['application/json', 'text/plain', 'text/html', 'text/csv']
+
+    # On-demand cProfile of single requests. A request is profiled when it
+    # sends an admin access token in PROFILE_HEADER, or at random with
+    # probability PROFILE_SAMPLE_RATE. The newest PROFILE_MAX_FILES results
+    # are kept in PROFILE_DIR (default: <instance>/profiles) and listed under
+    # /api/admin/profiles.
+    PROFILE_ENABLED = os.getenv('PROFILE_ENABLED', 'true').lower() == 'true'
+    PROFILE_HEADER = os.getenv('PROFILE_HEADER', 'X-Profile-Token')
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_DIR = os.getenv('PROFILE_DIR')
+    PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 50))
+
+    # Rate limiting for the public customer API. Limits are "N/unit" strings
+    # (second, minute, hour, day; e.g. "10/5seconds"). STORAGE is "memory"
+    # (per worker) or "database" (shared across workers via
+    # rate_limit_counters). Set TRUST_PROXY when behind a reverse proxy so
+    # X-Forwarded-For identifies the client. EXEMPT endpoints skip every
+    # limit: M-Pesa callbacks come from a few Safaricom addresses and a
+    # dropped one leaves a paid order unpaid.
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_STORAGE = os.getenv('RATE_LIMIT_STORAGE', 'memory')
+    RATE_LIMIT_TRUST_PROXY = os.getenv('RATE_LIMIT_TRUST_PROXY', 'false').lower() == 'true'
+    RATE_LIMIT_PER_IP = os.getenv('RATE_LIMIT_PER_IP', '600/minute')
+    RATE_LIMITS = {
+        'customer.search_vendors': os.getenv('RATE_LIMIT_SEARCH', '60/minute'),
+        'customer.get_nearby_vendors': os.getenv('RATE_LIMIT_NEARBY', '60/minute'),
+        'customer.check_payment_status': os.getenv('RATE_LIMIT_PAYMENT_STATUS', '120/minute'),
+        'customer.initiate_payment': os.getenv('RATE_LIMIT_PAY', '10/minute'),
+    }
+    RATE_LIMIT_EXEMPT = {'customer.mpesa_callback'}
     
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', '')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
+
+    # Connection pool per worker process (size + overflow connections, wait
+    # up to TIMEOUT seconds for one). Ignored for in-memory SQLite.
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+
+    # Optional read replica. GET requests (search, nearby, admin listings and
+    # reports) read from it, except the REPLICA_PRIMARY_ENDPOINTS that must
+    # see their own writes; writes always go to the primary. Requests fall
+    # back to the primary while the replica is unreachable or more than
+    # REPLICA_MAX_LAG seconds behind (checked every REPLICA_CHECK_INTERVAL).
+    SQLALCHEMY_BINDS = {'replica': {'url': os.getenv('DATABASE_REPLICA_URL'),
+                                    **engine_options(os.getenv('DATABASE_REPLICA_URL'))}} \
+        if os.getenv('DATABASE_REPLICA_URL') else {}
+    REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', 5))
+    REPLICA_CHECK_INTERVAL = float(os.getenv('REPLICA_CHECK_INTERVAL', 5))
+    REPLICA_PRIMARY_ENDPOINTS = {
+        'customer.check_payment_status',
+        'vendor.get_status',
+        'vendor.get_vendor_orders',
+    }
     
+    # Radius queries: 'auto' uses PostGIS (Postgres) or the R*Tree (SQLite)
+    # when the schema has them and the haversine scan otherwise; 'postgis',
+    # 'rtree' or 'python' force one.
+    SPATIAL_BACKEND = os.getenv('SPATIAL_BACKEND', 'auto')
+
     # Cloudinary Config
     CLOUDINARY_CLOUD_NAME = os.getenv('CLOUDINARY_CLOUD_NAME')
     CLOUDINARY_API_KEY = os.getenv('CLOUDINARY_API_KEY')
     CLOUDINARY_API_SECRET = os.getenv('CLOUDINARY_API_SECRET')
 
+    # Outbound HTTP (Cloudinary uploads; M-Pesa uses MPESA_*TIMEOUT): connect
+    # and read timeouts, and the connection cap of the shared M-Pesa session
+    EXTERNAL_HTTP_CONNECT_TIMEOUT = float(os.getenv('EXTERNAL_HTTP_CONNECT_TIMEOUT', 5))
+    EXTERNAL_HTTP_TIMEOUT = float(os.getenv('EXTERNAL_HTTP_TIMEOUT', 30))
+    EXTERNAL_HTTP_MAX_CONNECTIONS = int(os.getenv('EXTERNAL_HTTP_MAX_CONNECTIONS', 100))
+
+    # Vendor location heartbeat: pings closer than MIN_DISTANCE_M metres and
+    # MIN_INTERVAL seconds to the last write are dropped; the rest are
+    # buffered and written once BATCH_SIZE pings queue up or FLUSH_INTERVAL
+    # seconds pass.
+    HEARTBEAT_MIN_DISTANCE_M = float(os.getenv('HEARTBEAT_MIN_DISTANCE_M', 25))
+    HEARTBEAT_MIN_INTERVAL = int(os.getenv('HEARTBEAT_MIN_INTERVAL', 60))
+    HEARTBEAT_BATCH_SIZE = int(os.getenv('HEARTBEAT_BATCH_SIZE', 50))
+    HEARTBEAT_FLUSH_INTERVAL = int(os.getenv('HEARTBEAT_FLUSH_INTERVAL', 15))
+
+    # Seconds a vendor's /status snapshot is cached (also sent as max-age)
+    STATUS_CACHE_TTL = int(os.getenv('STATUS_CACHE_TTL', 5))
+
+    # Seconds a worker keeps a vendor's pre-serialized detail document; its
+    # own writes invalidate it, so this only bounds staleness across workers
+    VENDOR_DETAIL_CACHE_TTL = int(os.getenv('VENDOR_DETAIL_CACHE_TTL', 10))
+
+    # Default page size for /api/admin/logs (max 500)
+    ADMIN_LOGS_PAGE_SIZE = int(os.getenv('ADMIN_LOGS_PAGE_SIZE', 100))
+    # Default page size for /api/vendor/orders (max 500)
+    VENDOR_ORDERS_PAGE_SIZE = int(os.getenv('VENDOR_ORDERS_PAGE_SIZE', 100))
+
+    # Seconds between full reloads of the admin map cluster index; in between
+    # it is updated incrementally by this worker's check-ins and closes
+    CLUSTER_RESYNC_INTERVAL = int(os.getenv('CLUSTER_RESYNC_INTERVAL', 300))
+
+    # Seconds between reloads of the scheduler's auto-close deadline heap
+    AUTO_CLOSE_REFRESH_INTERVAL = int(os.getenv('AUTO_CLOSE_REFRESH_INTERVAL', 60))
+
+    # Scheduler jobs (seconds). Replicas elect one leader; the lease TTL only
+    # applies to the lock-table fallback used on SQLite.
+    SCHEDULER_LOCK_TTL = int(os.getenv('SCHEDULER_LOCK_TTL', 30))
+    ROLLUP_INTERVAL = int(os.getenv('ROLLUP_INTERVAL', 300))
+    RECONCILE_INTERVAL = int(os.getenv('RECONCILE_INTERVAL', 60))
+    PAYMENT_PENDING_TIMEOUT = int(os.getenv('PAYMENT_PENDING_TIMEOUT', 900))
+    ARCHIVE_INTERVAL = int(os.getenv('ARCHIVE_INTERVAL', 3600))
+
+    # Archival: settled orders/transactions older than ARCHIVE_AFTER_DAYS move
+    # to the *_archive tables, ARCHIVE_BATCH_SIZE per commit and at most
+    # ARCHIVE_MAX_BATCHES per run (the backlog drains over several runs)
+    ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 90))
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', 1000))
+    ARCHIVE_MAX_BATCHES = int(os.getenv('ARCHIVE_MAX_BATCHES', 50))
+
 class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_ECHO = True
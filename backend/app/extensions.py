@@ -2,8 +2,14 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
+from app.utils.compression import Compressor
+from app.utils.db_routing import ReadReplicaRouter, RoutingSession
+from app.utils.rate_limit import RateLimiter
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 cors = CORS()
 jwt = JWTManager()
-migrate = Migrate()
\ No newline at end of file
+migrate = Migrate()
+rate_limiter = RateLimiter()
+read_replica = ReadReplicaRouter()
+compress = Compressor()
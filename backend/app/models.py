@@ -1,10 +1,18 @@
 from app.extensions import db
+from app.utils.search import create_sqlite_fts, drop_sqlite_fts, menu_search_text
+from app.utils.spatial import create_spatial_index, drop_spatial_index
+from app.utils import user_cache
+from app.utils.sql import dialect_insert
+from app.utils.vendor_detail import build_detail_doc, invalidate_after_commit, refresh_detail_doc
 from datetime import datetime, timedelta
 from sqlalchemy import JSON
-from sqlalchemy import CheckConstraint, Index, event, select, update
+from sqlalchemy import DDL, CheckConstraint, Index, event, inspect, select, update
 import random
 import string
 
+# How long a check-in (or location heartbeat) keeps a vendor visible
+CHECKIN_DURATION = timedelta(hours=3)
+
 # ============================================================================
 # 1. USER TABLE - Authentication & Roles
 # ============================================================================
@@ -52,6 +60,12 @@ class VendorLocation(db.Model):
 
     # Read-Model: Optimized JSON for search (B-R4)
     menu_items = db.Column(JSON, nullable=False) 
+    # Lowercased item names/descriptions derived from menu_items, indexed for
+    # substring search (see utils/search.py)
+    search_text = db.Column(db.Text)
+    # Pre-serialized customer detail view (address + formatted menu), rebuilt
+    # on every menu/address write (see utils/vendor_detail.py)
+    detail_doc = db.Column(db.Text)
 
     # Real-Time Freshness Logic (B-R5)
     is_open = db.Column(db.Boolean, default=False, index=True)
@@ -63,14 +77,66 @@ class VendorLocation(db.Model):
 
     __table_args__ = (
         Index('idx_location_search', 'latitude', 'longitude', 'is_open'),
+        Index('idx_location_search_text_trgm', 'search_text', postgresql_using='gin',
+              postgresql_ops={'search_text': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
     )
 
     def check_in(self):
         self.is_open = True
         self.last_checkin = datetime.utcnow()
-        self.auto_close_at = datetime.utcnow() + timedelta(hours=3)
+        self.auto_close_at = datetime.utcnow() + CHECKIN_DURATION
         self.updated_at = datetime.utcnow()
 
+    @staticmethod
+    def upsert_check_in(session, vendor_id, latitude, longitude, address, menu_items, now=None):
+        """
+        Checks a vendor in with a single INSERT ... ON CONFLICT (vendor_id)
+        DO UPDATE ... RETURNING statement and returns the new auto_close_at.
+        Never loads the ORM object, and concurrent check-ins can't race on
+        the unique vendor_id.
+        """
+        now = now or datetime.utcnow()
+        values = {
+            'vendor_id': vendor_id,
+            'latitude': latitude,
+            'longitude': longitude,
+            'address': address,
+            'menu_items': menu_items,
+            'search_text': menu_search_text(menu_items),
+            'detail_doc': build_detail_doc(address, menu_items),
+            'is_open': True,
+            'last_checkin': now,
+            'auto_close_at': now + CHECKIN_DURATION,
+            'created_at': now,
+            'updated_at': now,
+        }
+
+        table = VendorLocation.__table__
+        stmt = dialect_insert(table, session.get_bind().dialect.name)
+
+        if stmt is None:
+            # No native upsert: fall back to read-then-write through the ORM
+            location = VendorLocation.query.filter_by(vendor_id=vendor_id).first()
+            if not location:
+                location = VendorLocation(vendor_id=vendor_id, created_at=now)
+                session.add(location)
+            for key, value in values.items():
+                if key != 'created_at':
+                    setattr(location, key, value)
+            session.flush()
+            return location.auto_close_at
+
+        stmt = stmt.values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.vendor_id],
+            set_={
+                key: stmt.excluded[key]
+                for key in values if key not in ('vendor_id', 'created_at')
+            }
+        ).returning(table.c.auto_close_at)
+
+        return session.execute(stmt).scalar_one()
+
 # ============================================================================
 # 3. ORDER - Order Management
 # ============================================================================
@@ -110,6 +176,9 @@ class Order(db.Model):
 # ============================================================================
 # 4. TRANSACTION - M-Pesa Logs
 # ============================================================================
+# Raw statuses that count as a successful payment
+SUCCESS_STATUSES = ('COMPLETED', 'SUCCESS', 'SUCCESSFUL')
+
 class Transaction(db.Model):
     __tablename__ = 'transactions'
     
@@ -128,7 +197,25 @@ class Transaction(db.Model):
     status = db.Column(db.String(20), default='PENDING', index=True) 
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
+    # Set on insert too, so the rollup job can follow it as a watermark
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # What the rollup job last counted for this row (bucket time, amount,
+    # success), so a later change replaces that contribution instead of
+    # adding a second one. NULL = not counted.
+    rolled_bucket_at = db.Column(db.DateTime)
+    rolled_amount = db.Column(db.Float)
+    rolled_success = db.Column(db.Boolean)
+
+    # Keyset pagination / filters for the admin logs (AD-02)
+    __table_args__ = (
+        Index('idx_txn_date_id', 'transaction_date', 'id'),
+        Index('idx_txn_vendor_date', 'vendor_id', 'transaction_date', 'id'),
+        Index('idx_txn_status_date', 'status', 'transaction_date', 'id'),
+        Index('idx_txn_updated_id', 'updated_at', 'id'),
+        # Order -> transaction lookups (vendor orders, archival)
+        Index('idx_txn_order', 'order_id'),
+    )
 
 # ============================================================================
 # 5. MENU ITEM (Write-Model for Admin/Vendor)
@@ -146,7 +233,121 @@ class MenuItem(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 # ============================================================================
-# 6. EVENT LISTENERS (CQRS Sync Logic)
+# 6. TRANSACTION ROLLUPS (Read-Model for Admin Stats)
+# ============================================================================
+class TransactionRollup(db.Model):
+    """
+    Hourly / daily payment aggregates per vendor, maintained incrementally by
+    the scheduler from transactions newer than its watermark.
+    """
+    __tablename__ = 'transaction_rollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+    vendor_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    granularity = db.Column(db.String(5), nullable=False)   # 'hour' | 'day'
+    bucket_start = db.Column(db.DateTime, nullable=False)
+
+    txn_count = db.Column(db.Integer, nullable=False, default=0)
+    amount_sum = db.Column(db.Float, nullable=False, default=0)
+    success_count = db.Column(db.Integer, nullable=False, default=0)
+    success_amount = db.Column(db.Float, nullable=False, default=0)
+    failure_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('vendor_id', 'granularity', 'bucket_start', name='uq_rollup_bucket'),
+        Index('idx_rollup_granularity_bucket', 'granularity', 'bucket_start'),
+        CheckConstraint("granularity IN ('hour', 'day')", name='check_rollup_granularity'),
+    )
+
+class RollupWatermark(db.Model):
+    """Position (updated_at, id) of the last transaction folded into the rollups."""
+    __tablename__ = 'rollup_watermarks'
+
+    name = db.Column(db.String(50), primary_key=True)
+    last_updated_at = db.Column(db.DateTime, nullable=False)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+
+# ============================================================================
+# 7. SCHEDULER LEADER LEASE (stand-in for Postgres advisory locks)
+# ============================================================================
+class SchedulerLock(db.Model):
+    __tablename__ = 'scheduler_locks'
+
+    name = db.Column(db.String(50), primary_key=True)
+    owner = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+# ============================================================================
+# 8. RATE LIMIT COUNTERS (shared backend for the rate limiter)
+# ============================================================================
+class RateLimitCounter(db.Model):
+    __tablename__ = 'rate_limit_counters'
+
+    key = db.Column(db.String(200), primary_key=True)
+    window_start = db.Column(db.BigInteger, primary_key=True, autoincrement=False)   # unix seconds
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+# ============================================================================
+# 9. USER REVOCATIONS (shared backend for revoked tokens)
+# ============================================================================
+class UserRevocation(db.Model):
+    """Tokens issued to `user_id` at or before `revoked_at` are rejected."""
+    __tablename__ = 'user_revocations'
+
+    # No foreign key: a deleted user's tokens are revoked too
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    revoked_at = db.Column(db.Float, nullable=False, index=True)   # unix seconds
+
+# ============================================================================
+# 10. ARCHIVE - Settled Orders & Transactions (cold tables)
+# ============================================================================
+# Same columns as the hot tables (ids preserved, no foreign keys) so reads can
+# run one query shape against either side. Filled by app.utils.archival.
+class OrderArchive(db.Model):
+    __tablename__ = 'orders_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    order_number = db.Column(db.String(30), nullable=False)
+    vendor_id = db.Column(db.Integer, nullable=False)
+    customer_phone = db.Column(db.String(15), nullable=False)
+    items = db.Column(JSON, nullable=False)
+    total_amount = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(20))
+    delivery_location = db.Column(db.String(255), nullable=True)
+    customer_latitude = db.Column(db.Float, nullable=True)
+    customer_longitude = db.Column(db.Float, nullable=True)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('idx_order_archive_vendor_created', 'vendor_id', 'created_at', 'id'),
+    )
+
+class TransactionArchive(db.Model):
+    __tablename__ = 'transactions_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    vendor_id = db.Column(db.Integer, nullable=False)
+    order_id = db.Column(db.Integer, nullable=True, index=True)
+    customer_phone = db.Column(db.String(15), nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+    checkout_request_id = db.Column(db.String(100))
+    mpesa_receipt_number = db.Column(db.String(50), nullable=True)
+    transaction_date = db.Column(db.DateTime)
+    status = db.Column(db.String(20))
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+    # Same keyset indexes as the hot table, for the admin logs
+    __table_args__ = (
+        Index('idx_txn_archive_date_id', 'transaction_date', 'id'),
+        Index('idx_txn_archive_vendor_date', 'vendor_id', 'transaction_date', 'id'),
+        Index('idx_txn_archive_status_date', 'status', 'transaction_date', 'id'),
+    )
+
+# ============================================================================
+# 11. EVENT LISTENERS (CQRS Sync Logic)
 # ============================================================================
 @event.listens_for(MenuItem, 'after_insert')
 @event.listens_for(MenuItem, 'after_update')
@@ -175,5 +376,51 @@ def update_search_index(mapper, connection, target):
     connection.execute(
         update(loc_table)
         .where(loc_table.c.vendor_id == target.vendor_id)
-        .values(menu_items=menu_snapshot, updated_at=datetime.utcnow())
-    )
\ No newline at end of file
+        .values(menu_items=menu_snapshot, search_text=menu_search_text(menu_snapshot), updated_at=datetime.utcnow())
+    )
+    refresh_detail_doc(connection, target.vendor_id)
+    invalidate_after_commit(inspect(target).session, target.vendor_id)
+
+@event.listens_for(VendorLocation, 'before_insert')
+@event.listens_for(VendorLocation, 'before_update')
+def sync_search_text(mapper, connection, target):
+    """Keeps search_text in step with menu_items for ORM writes."""
+    target.search_text = menu_search_text(target.menu_items)
+
+@event.listens_for(VendorLocation, 'before_insert')
+@event.listens_for(VendorLocation, 'before_update')
+def sync_detail_doc(mapper, connection, target):
+    """Rebuilds the detail document when an ORM write touches the menu or address."""
+    state = inspect(target)
+    if target.detail_doc is None or any(state.attrs[key].history.has_changes() for key in ('menu_items', 'address')):
+        target.detail_doc = build_detail_doc(target.address, target.menu_items)
+        invalidate_after_commit(state.session, target.vendor_id)
+
+@event.listens_for(User, 'after_update')
+def sync_user_tokens(mapper, connection, target):
+    """A role or password change revokes the user's tokens; other profile edits refresh the cached snapshot."""
+    state = inspect(target)
+    changed = [key for key in set(user_cache.USER_FIELDS + user_cache.REVOKING_FIELDS)
+               if key in state.attrs and state.attrs[key].history.has_changes()]
+    if changed:
+        revoke = any(key in user_cache.REVOKING_FIELDS for key in changed)
+        user_cache.after_commit(state.session, target.id, revoke=revoke)
+
+@event.listens_for(User, 'after_delete')
+def revoke_deleted_user(mapper, connection, target):
+    user_cache.after_commit(inspect(target).session, target.id, revoke=True)
+
+@event.listens_for(User, 'after_update')
+def sync_profile_detail(mapper, connection, target):
+    """Name and storefront image are read live with the document; drop this worker's cached copy."""
+    state = inspect(target)
+    if any(state.attrs[key].history.has_changes() for key in ('business_name', 'storefront_image_url')):
+        invalidate_after_commit(state.session, target.id)
+
+# Search and spatial index objects that live outside the table definition
+event.listen(VendorLocation.__table__, 'before_create',
+             DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect='postgresql'))
+event.listen(VendorLocation.__table__, 'after_create', create_sqlite_fts)
+event.listen(VendorLocation.__table__, 'after_create', create_spatial_index)
+event.listen(VendorLocation.__table__, 'before_drop', drop_sqlite_fts)
+event.listen(VendorLocation.__table__, 'before_drop', drop_spatial_index)
@@ -1,11 +1,28 @@
-from flask import Blueprint, request, jsonify
-from app.models import User, VendorLocation, Transaction
-from werkzeug.security import check_password_hash
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt, get_jwt_identity
-from datetime import datetime
+from flask import Blueprint, request, jsonify, Response, current_app, send_from_directory, stream_with_context
+from app.extensions import db
+from app.models import (User, VendorLocation, Transaction, Order, TransactionRollup, OrderArchive,
+                        TransactionArchive, SUCCESS_STATUSES)
+from app.utils.archival import archive_boundary, decode_cursor, encode_cursor, newest_first
+from app.utils.rollups import bucket_start
+from app.utils.clustering import cluster_index
+from app.utils.decorators import admin_required
+from app.utils.passwords import verify_password, HashPoolBusy
+from app.utils.profiling import is_valid_name, list_profiles, profile_dir, render_profile
+from flask_jwt_extended import create_access_token
+from sqlalchemy import select, func, and_, or_, not_, tuple_
+from datetime import datetime, timedelta
+from itertools import islice
+import csv
+import io
+import json
+import os
 
 bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
+ADMIN_LOGS_MAX_PAGE = 500
+EXPORT_BATCH_SIZE = 1000
+CLUSTER_MAX_VENDORS = 1000
+
 # --- ADMIN LOGIN ---
 @bp.route('/login', methods=['POST'])
 def login():
@@ -15,8 +32,11 @@ def login():
 
     user = User.query.filter_by(email=email, role='admin').first()
 
-    if not user or not check_password_hash(user.password_hash, password):
-        return jsonify({'error': 'Invalid admin credentials'}), 401
+    try:
+        if not user or not verify_password(user.password_hash, password):
+            return jsonify({'error': 'Invalid admin credentials'}), 401
+    except HashPoolBusy:
+        return jsonify({'error': 'Server busy, please retry.'}), 503, {'Retry-After': '1'}
 
     token = create_access_token(identity=str(user.id), additional_claims={'role': 'admin'})
     
@@ -27,12 +47,8 @@ def login():
 
 # --- GET ACTIVE VENDORS (AD-01) ---
 @bp.route('/vendors', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_all_vendors():
-    claims = get_jwt()
-    if claims.get('role') != 'admin':
-        return jsonify({'error': 'Unauthorized access'}), 403
-
     try:
         active_vendors = VendorLocation.query.filter(
             VendorLocation.auto_close_at > datetime.utcnow()
@@ -60,65 +76,374 @@ def get_all_vendors():
         print(f"Admin Vendors Error: {e}")
         return jsonify({'error': 'Server Error'}), 500
 
+# --- VENDOR MAP CLUSTERS (AD-01b) ---
+@bp.route('/vendors/clusters', methods=['GET'])
+@admin_required
+def get_vendor_clusters():
+    """
+    Clustered live vendors for the admin map viewport.
+    Query params: bbox=west,south,east,north and zoom. Below the expand zoom
+    the response carries clusters (count, centroid, bounds); at or above it,
+    the individual vendors inside the viewport.
+    """
+    try:
+        west, south, east, north = [float(v) for v in request.args['bbox'].split(',')]
+        zoom = int(request.args.get('zoom', 10))
+    except (KeyError, ValueError):
+        return jsonify({'error': 'bbox=west,south,east,north and zoom are required'}), 400
+
+    try:
+        now = datetime.utcnow()
+        if cluster_index.needs_resync(current_app.config['CLUSTER_RESYNC_INTERVAL']):
+            loc = VendorLocation.__table__
+            rows = db.session.execute(
+                select(loc.c.vendor_id, loc.c.latitude, loc.c.longitude, loc.c.auto_close_at)
+                .where(loc.c.auto_close_at > now)
+            ).all()
+            cluster_index.load(rows, now=now)
+        cluster_index.expire(now)
+
+        if zoom < cluster_index.expand_zoom:
+            return jsonify({
+                'success': True,
+                'zoom': zoom,
+                'clusters': cluster_index.clusters(south, west, north, east, zoom),
+                'vendors': []
+            }), 200
+
+        ids = cluster_index.vendors_in(south, west, north, east)[:CLUSTER_MAX_VENDORS]
+        vendors = []
+        if ids:
+            loc = VendorLocation.__table__
+            u = User.__table__
+            rows = db.session.execute(
+                select(u.c.id, u.c.business_name, u.c.username, loc.c.latitude, loc.c.longitude,
+                       loc.c.address, loc.c.auto_close_at)
+                .select_from(loc.join(u, u.c.id == loc.c.vendor_id))
+                .where(loc.c.vendor_id.in_(ids), loc.c.auto_close_at > now)
+            ).all()
+            for row in rows:
+                vendors.append({
+                    'id': row.id,
+                    'name': row.business_name or row.username,
+                    'latitude': row.latitude,
+                    'longitude': row.longitude,
+                    'address': row.address,
+                    'status': 'Live',
+                    'active_for_mins': int((row.auto_close_at - now).total_seconds() / 60)
+                })
+
+        return jsonify({'success': True, 'zoom': zoom, 'clusters': [], 'vendors': vendors}), 200
+    except Exception as e:
+        print(f"Admin Clusters Error: {e}")
+        return jsonify({'error': 'Server Error'}), 500
+
+# --- TRANSACTION LOG HELPERS ---
+LOG_COLUMNS = ['id', 'vendor_id', 'vendor_name', 'timestamp', 'amount', 'receipt', 'status', 'customer_phone', 'order_id']
+
+def _parse_date(value):
+    """Accepts YYYY-MM-DD or a full ISO timestamp."""
+    return datetime.fromisoformat(value) if value else None
+
+def build_logs_query(args, cursor=None, limit=None, archived=False):
+    """
+    Column-only SELECT over transactions (outer joined to vendor and order so
+    nothing is lazy loaded), newest first, filtered by status / vendor /
+    date range. `archived` runs it against the archive tables instead.
+    Raises ValueError on malformed filters.
+    """
+    t = (TransactionArchive if archived else Transaction).__table__
+    u = User.__table__
+    o = (OrderArchive if archived else Order).__table__
+
+    stmt = (
+        select(
+            t.c.id, t.c.vendor_id, t.c.transaction_date, t.c.created_at, t.c.amount,
+            t.c.mpesa_receipt_number, t.c.status, t.c.customer_phone, t.c.order_id,
+            u.c.business_name, u.c.username, o.c.order_number
+        )
+        .select_from(
+            t.outerjoin(u, u.c.id == t.c.vendor_id).outerjoin(o, o.c.id == t.c.order_id)
+        )
+    )
+
+    status = (args.get('status') or '').strip().upper()
+    if status:
+        successful = or_(
+            t.c.status.in_(SUCCESS_STATUSES),
+            and_(t.c.mpesa_receipt_number.isnot(None), t.c.status.isnot(None), t.c.status != 'FAILED')
+        )
+        if status == 'SUCCESSFUL':
+            stmt = stmt.where(successful)
+        elif status == 'FAILED':
+            stmt = stmt.where(or_(t.c.status.is_(None), not_(successful)))
+        else:
+            stmt = stmt.where(t.c.status == status)
+
+    if args.get('vendor_id'):
+        stmt = stmt.where(t.c.vendor_id == int(args.get('vendor_id')))
+
+    date_from = _parse_date(args.get('from'))
+    date_to = _parse_date(args.get('to'))
+    if date_from:
+        stmt = stmt.where(t.c.transaction_date >= date_from)
+    if date_to:
+        stmt = stmt.where(t.c.transaction_date <= date_to)
+
+    if cursor:
+        ts, txn_id = cursor
+        stmt = stmt.where(tuple_(t.c.transaction_date, t.c.id) < tuple_(ts, txn_id))
+
+    stmt = stmt.order_by(t.c.transaction_date.desc(), t.c.id.desc())
+    if limit:
+        stmt = stmt.limit(limit)
+    return stmt
+
+def log_order_key(row):
+    return (row.transaction_date or datetime.min, row.id)
+
+def needs_archive(args, rows=None, limit=None):
+    """
+    Whether a logs read has to look at the archive: something is archived,
+    the date range reaches back to it, and the hot rows (a full page of
+    `limit`, when given) don't already end after the newest archived one.
+    """
+    boundary = archive_boundary(TransactionArchive.transaction_date)
+    if boundary is None:
+        return False
+    date_from = _parse_date(args.get('from'))
+    if date_from and date_from > boundary:
+        return False
+    if limit and len(rows) >= limit and rows[-1].transaction_date and rows[-1].transaction_date > boundary:
+        return False
+    return True
+
+def format_log(row):
+    # Only "Successful" or "Failed" are shown to admins
+    raw_status = str(row.status).upper() if row.status else "FAILED"
+    if raw_status in SUCCESS_STATUSES or (row.mpesa_receipt_number and raw_status != 'FAILED'):
+        display_status = "Successful"
+    else:
+        display_status = "Failed"
+
+    vendor_name = "Unknown Vendor"
+    if row.vendor_id and (row.business_name or row.username):
+        vendor_name = row.business_name if row.business_name else row.username
+
+    real_date = row.transaction_date if row.transaction_date else row.created_at
+    formatted_date = real_date.isoformat() if real_date else datetime.utcnow().isoformat()
+
+    order_ref = "N/A"
+    if row.order_number:
+        order_ref = row.order_number          # e.g. "ORD-25011512-AB12"
+    elif row.order_id:
+        order_ref = f"#{row.order_id}"       # e.g. "#5"
+
+    return {
+        'id': row.id,
+        'vendor_id': row.vendor_id,
+        'vendor_name': vendor_name,
+        'timestamp': formatted_date,
+        'amount': row.amount,
+        'receipt': row.mpesa_receipt_number if row.mpesa_receipt_number else "N/A",
+        'status': display_status,
+        'customer_phone': row.customer_phone,
+        'order_id': order_ref
+    }
+
 # --- GET TRANSACTION LOGS (AD-02) ---
 @bp.route('/logs', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_transaction_logs():
-    claims = get_jwt()
-    if claims.get('role') != 'admin':
-        return jsonify({'error': 'Unauthorized access'}), 403
+    """
+    One page of transaction logs, newest first.
+    Query params: limit, cursor (from the previous page's next_cursor),
+    status (Successful / Failed / raw status), vendor_id, from, to.
+    Archived transactions are merged in once the page reaches back to them.
+    """
+    try:
+        limit = min(int(request.args.get('limit', current_app.config['ADMIN_LOGS_PAGE_SIZE'])), ADMIN_LOGS_MAX_PAGE)
+        cursor = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+        # Fetch one extra row to know whether another page exists
+        stmt = build_logs_query(request.args, cursor=cursor, limit=limit + 1)
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid filter or cursor'}), 400
 
     try:
-        # 1. Fetch Real Transactions (Joined with Vendor for performance)
-        # Ordered by newest first
-        transactions = Transaction.query.order_by(Transaction.transaction_date.desc()).all()
-
-        logs = []
-        for t in transactions:
-            
-            # 2. Logic to enforce "Only Failed or Successful"
-            raw_status = str(t.status).upper() if t.status else "FAILED"
-            
-            if raw_status in ['COMPLETED', 'SUCCESS', 'SUCCESSFUL'] or (t.mpesa_receipt_number and raw_status != 'FAILED'):
-                display_status = "Successful"
-            else:
-                display_status = "Failed"
-
-            # 3. Handle Missing Vendor Names gracefully
-            vendor_name = "Unknown Vendor"
-            if t.vendor:
-                vendor_name = t.vendor.business_name if t.vendor.business_name else t.vendor.username
-
-            # 4. Format Date (ISO format is best for React tables to sort/display)
-            real_date = t.transaction_date if t.transaction_date else t.created_at
-            formatted_date = real_date.isoformat() if real_date else datetime.utcnow().isoformat()
-
-            # 5. NEW: Order ID Logic
-            # Check relationship first, then raw ID, then fallback
-            order_ref = "N/A"
-            if t.order:
-                order_ref = t.order.order_number  # e.g. "ORD-005"
-            elif t.order_id:
-                order_ref = f"#{t.order_id}"      # e.g. "#5"
-
-            logs.append({
-                'id': t.id,
-                'vendor_id': t.vendor_id,
-                'vendor_name': vendor_name,
-                'timestamp': formatted_date,
-                'amount': t.amount,
-                'receipt': t.mpesa_receipt_number if t.mpesa_receipt_number else "N/A",
-                'status': display_status,
-                'customer_phone': t.customer_phone,
-                # New Field added here
-                'order_id': order_ref
-            })
-
-        return jsonify({'success': True, 'logs': logs}), 200
-        
-    except AttributeError as e:
-        print(f"Admin Logs Error (Field Mismatch): {e}")
-        return jsonify({'error': f"Database field error: {str(e)}"}), 500
+        rows = db.session.execute(stmt).all()
+        if needs_archive(request.args, rows, limit + 1):
+            archived = db.session.execute(
+                build_logs_query(request.args, cursor=cursor, limit=limit + 1, archived=True)).all()
+            rows = list(islice(newest_first(log_order_key, rows, archived), limit + 1))
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last.transaction_date, last.id)
+
+        logs = [format_log(row) for row in rows]
+        return jsonify({'success': True, 'logs': logs, 'next_cursor': next_cursor}), 200
+
     except Exception as e:
         print(f"Admin Logs Error: {str(e)}") 
-        return jsonify({'error': 'Internal Server Error'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Internal Server Error'}), 500
+
+# --- EXPORT TRANSACTION LOGS ---
+@bp.route('/logs/export', methods=['GET'])
+@admin_required
+def export_transaction_logs():
+    """
+    Streams every log matching the same filters as /logs as NDJSON (default)
+    or CSV. Rows are read through a server-side cursor in yield_per batches
+    and written as they arrive, so memory stays flat. When the date range
+    reaches the archive, its rows are merged into the stream in order.
+    """
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+
+    try:
+        statements = [build_logs_query(request.args)]
+        if needs_archive(request.args):
+            statements.append(build_logs_query(request.args, archived=True))
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid filter'}), 400
+
+    def generate():
+        results = [
+            db.session.execute(stmt.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+            for stmt in statements
+        ]
+        rows = newest_first(log_order_key, *results) if len(results) > 1 else results[0]
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=LOG_COLUMNS)
+            writer.writeheader()
+            while batch := list(islice(rows, EXPORT_BATCH_SIZE)):
+                for row in batch:
+                    writer.writerow(format_log(row))
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        else:
+            while batch := list(islice(rows, EXPORT_BATCH_SIZE)):
+                yield ''.join(json.dumps(format_log(row)) + '\n' for row in batch)
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    filename = f"transaction_logs_{datetime.utcnow():%Y%m%d%H%M%S}.{fmt}"
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+# --- PAYMENT STATS (AD-03) ---
+@bp.route('/stats', methods=['GET'])
+@admin_required
+def get_stats():
+    """
+    Revenue and payment-success figures read from the pre-aggregated
+    rollups, so the cost depends on the window, not on transaction history.
+    Query params: granularity (hour / day), from, to, vendor_id.
+    Defaults to daily buckets for the last 30 days.
+    """
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in ('hour', 'day'):
+        return jsonify({'error': 'granularity must be hour or day'}), 400
+
+    try:
+        date_to = _parse_date(request.args.get('to')) or datetime.utcnow()
+        date_from = _parse_date(request.args.get('from')) or (date_to - timedelta(days=30))
+        vendor_id = int(request.args['vendor_id']) if request.args.get('vendor_id') else None
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid filter'}), 400
+
+    r = TransactionRollup.__table__
+    u = User.__table__
+    sums = [
+        func.sum(r.c.txn_count).label('transactions'),
+        func.sum(r.c.amount_sum).label('amount'),
+        func.sum(r.c.success_amount).label('revenue'),
+        func.sum(r.c.success_count).label('successful'),
+        func.sum(r.c.failure_count).label('failed'),
+    ]
+    window = [
+        r.c.granularity == granularity,
+        r.c.bucket_start >= bucket_start(date_from, granularity),
+        r.c.bucket_start <= date_to,
+    ]
+    if vendor_id:
+        window.append(r.c.vendor_id == vendor_id)
+
+    def _figures(row):
+        transactions = int(row.transactions or 0)
+        successful = int(row.successful or 0)
+        return {
+            'transactions': transactions,
+            'amount': float(row.amount or 0),
+            'revenue': float(row.revenue or 0),
+            'successful': successful,
+            'failed': int(row.failed or 0),
+            'success_rate': round(successful / transactions, 4) if transactions else None
+        }
+
+    try:
+        totals = db.session.execute(select(*sums).where(*window)).one()
+
+        vendor_rows = db.session.execute(
+            select(r.c.vendor_id, u.c.business_name, u.c.username, *sums)
+            .select_from(r.outerjoin(u, u.c.id == r.c.vendor_id))
+            .where(*window)
+            .group_by(r.c.vendor_id, u.c.business_name, u.c.username)
+            .order_by(func.sum(r.c.success_amount).desc())
+        ).all()
+
+        series_rows = db.session.execute(
+            select(r.c.bucket_start, *sums)
+            .where(*window)
+            .group_by(r.c.bucket_start)
+            .order_by(r.c.bucket_start)
+        ).all()
+
+        return jsonify({
+            'success': True,
+            'granularity': granularity,
+            'from': date_from.isoformat(),
+            'to': date_to.isoformat(),
+            'totals': _figures(totals),
+            'vendors': [{
+                'vendor_id': row.vendor_id,
+                'vendor_name': row.business_name or row.username or "Unknown Vendor",
+                **_figures(row)
+            } for row in vendor_rows],
+            'series': [{'bucket': row.bucket_start.isoformat(), **_figures(row)} for row in series_rows]
+        }), 200
+
+    except Exception as e:
+        print(f"Admin Stats Error: {str(e)}")
+        return jsonify({'error': 'Internal Server Error'}), 500
+
+# --- REQUEST PROFILES ---
+@bp.route('/profiles', methods=['GET'])
+@admin_required
+def get_profiles():
+    return jsonify({'success': True, 'profiles': list_profiles()}), 200
+
+@bp.route('/profiles/<name>', methods=['GET'])
+@admin_required
+def download_profile(name):
+    if not is_valid_name(name):
+        return jsonify({'error': 'Invalid profile name'}), 400
+    directory = profile_dir()
+    path = os.path.join(directory, name)
+    if not os.path.isfile(path):
+        return jsonify({'error': 'Profile not found'}), 404
+
+    # ?format=text gives a readable summary; default is the raw pstats file
+    if request.args.get('format') == 'text':
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in ('cumulative', 'tottime', 'calls'):
+            return jsonify({'error': 'Invalid sort'}), 400
+        return Response(render_profile(path, sort=sort), mimetype='text/plain')
+    return send_from_directory(directory, name, as_attachment=True, mimetype='application/octet-stream')
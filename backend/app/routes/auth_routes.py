@@ -1,12 +1,50 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import check_password_hash, generate_password_hash
 from flask_jwt_extended import create_access_token
 from app.models import User
 from app.extensions import db
+from app.utils.passwords import hash_password, verify_password, HashPoolBusy
+from sqlalchemy import select, or_
 from sqlalchemy.exc import IntegrityError # Import this for error handling
 
 bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
+# Checked (and reported) in this order
+UNIQUE_FIELDS = ('email', 'phone_number', 'username')
+
+def _find_conflict(email, phone_number, username):
+    """Returns the first of UNIQUE_FIELDS already taken, using a single query."""
+    u = User.__table__
+    wanted = {'email': email, 'phone_number': phone_number, 'username': username}
+    rows = db.session.execute(
+        select(u.c.email, u.c.phone_number, u.c.username)
+        .where(or_(u.c.email == email, u.c.phone_number == phone_number, u.c.username == username))
+        .limit(3)
+    ).all()
+    for field in UNIQUE_FIELDS:
+        if any(getattr(row, field) == wanted[field] for row in rows):
+            return field
+    return None
+
+def _conflict_from_error(error):
+    """Maps a unique-violation (SQLite or Postgres wording) to the field."""
+    message = str(error.orig)
+    for field in UNIQUE_FIELDS:
+        if f'users.{field}' in message or f'({field})' in message or f'users_{field}' in message:
+            return field
+    return None
+
+def _conflict_message(field, username):
+    if field == 'email':
+        return 'Email already registered'
+    if field == 'phone_number':
+        return 'Phone number already registered'
+    return f'Username "{username}" is taken. Please choose another.'
+
+def _busy():
+    response = jsonify({'error': 'Server busy, please retry.'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @bp.route('/register', methods=['POST'])
 def register():
     data = request.get_json()
@@ -17,26 +55,19 @@ def register():
         if not data.get(field):
             return jsonify({'error': f'{field} is required'}), 400
 
-    # 2. Check if Email already exists
-    if User.query.filter_by(email=data.get('email')).first():
-        return jsonify({'error': 'Email already registered'}), 409
-
-    # 3. Check if Phone Number already exists (Prevents 500 Error)
-    if User.query.filter_by(phone_number=data.get('phone_number')).first():
-        return jsonify({'error': 'Phone number already registered'}), 409
-
-    # 4. Check if Username already exists (Prevents 500 Error)
+    # 2. Uniqueness: one query for email, phone number and username
     # Use provided username, or fallback to email prefix if missing
     username = data.get('username') or data.get('email').split('@')[0]
-    if User.query.filter_by(username=username).first():
-        return jsonify({'error': f'Username "{username}" is taken. Please choose another.'}), 409
+    conflict = _find_conflict(data.get('email'), data.get('phone_number'), username)
+    if conflict:
+        return jsonify({'error': _conflict_message(conflict, username)}), 409
     
     try:
         user = User(
             username=username,
             email=data.get('email'),
             phone_number=data.get('phone_number'),
-            password_hash=generate_password_hash(data.get('password')),
+            password_hash=hash_password(data.get('password')),
             role=data.get('role', 'customer'), # Default to customer if not specified
             business_name=data.get('business_name'),
             storefront_image_url=data.get('storefront_image_url')
@@ -45,15 +76,22 @@ def register():
         db.session.add(user)
         db.session.commit()
         
-        token = create_access_token(identity=str(user.id))
+        token = create_access_token(identity=str(user.id), additional_claims={'role': user.role})
         return jsonify({
             'success': True, 
             'token': token, 
             'user': {'id': user.id, 'role': user.role, 'username': user.username}
         }), 201
 
-    except IntegrityError:
+    except HashPoolBusy:
         db.session.rollback()
+        return _busy()
+    except IntegrityError as e:
+        # Lost a race with a concurrent registration: report the right field
+        db.session.rollback()
+        field = _conflict_from_error(e)
+        if field:
+            return jsonify({'error': _conflict_message(field, username)}), 409
         return jsonify({'error': 'Database conflict: User already exists.'}), 409
     except Exception as e:
         db.session.rollback()
@@ -64,11 +102,15 @@ def register():
 def login():
     data = request.get_json()
     user = User.query.filter_by(email=data.get('email')).first()
-    if not user or not check_password_hash(user.password_hash, data.get('password')):
-        return jsonify({'error': 'Invalid credentials'}), 401
+    try:
+        if not user or not verify_password(user.password_hash, data.get('password')):
+            return jsonify({'error': 'Invalid credentials'}), 401
+    except HashPoolBusy:
+        return _busy()
     
     # We do NOT reset location.auto_close_at here.
     # This preserves the vendor's "Live" status across logins.
 
-    token = create_access_token(identity=str(user.id))
+    # Role travels as a signed claim so protected routes never re-read the user
+    token = create_access_token(identity=str(user.id), additional_claims={'role': user.role})
     return jsonify({'token': token, 'user': {'id': user.id, 'role': user.role, 'name': user.business_name}}), 200
\ No newline at end of file
@@ -1,12 +1,15 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, current_app
 from app.extensions import db
-from app.models import VendorLocation, User, Order, Transaction
-from app.utils.geospatial import haversine_distance
-from app.utils.mpesa_handler import MpesaHandler
+from app.models import VendorLocation, Order, Transaction
+from app.utils.mpesa_handler import get_mpesa_handler
+from app.utils.search import item_filter
+from app.utils.spatial import find_nearby
+from app.utils.vendor_detail import detail_body, detail_cache, load_vendor_detail
 from datetime import datetime
 from flask_cors import cross_origin
 bp = Blueprint('customer', __name__, url_prefix='/api/customer')
-mpesa_handler = MpesaHandler()
+
+SEARCH_RADIUS_KM = 5.0
 
 # --- 1. SEARCH VENDORS ---
 @bp.route('/search', methods=['GET'])
@@ -17,34 +20,26 @@ def search_vendors():
         lon = float(request.args.get('lon'))
     except: return jsonify({'error': 'Invalid params'}), 400
 
-    vendors = VendorLocation.query.filter(VendorLocation.auto_close_at > datetime.utcnow()).all()
+    # Menu matching and the radius filter run in the database (see
+    # utils/search.py and utils/spatial.py); results come nearest first
+    query = VendorLocation.query.filter(
+        VendorLocation.auto_close_at > datetime.utcnow(),
+        item_filter(VendorLocation.search_text, VendorLocation.id, item, db.session.connection())
+    )
     
     results = []
-    for v in vendors:
-        dist = haversine_distance(lat, lon, v.latitude, v.longitude)
-        if dist > 5.0: continue
-
-        menu_list = v.menu_items if v.menu_items and isinstance(v.menu_items, list) else []
-        found = False
-        for i in menu_list:
-            if isinstance(i, dict):
-                if item in i.get('name', '').lower() or item in i.get('desc', '').lower():
-                    found = True; break
-            elif isinstance(i, str) and item in i.lower():
-                found = True; break
-                    
-        if found:
-            results.append({
-                'id': v.id, 
-                'vendor_id': v.vendor_id, 
-                'latitude': v.latitude, 
-                'longitude': v.longitude, 
-                'distance': round(dist, 1),
-                'menu_items': v.menu_items,
-                'name': v.vendor.business_name if v.vendor else "Unknown",
-                'image': v.vendor.storefront_image_url if v.vendor else None,
-                'status': 'Open'
-            })
+    for v, dist in find_nearby(query, lat, lon, SEARCH_RADIUS_KM):
+        results.append({
+            'id': v.id, 
+            'vendor_id': v.vendor_id, 
+            'latitude': v.latitude, 
+            'longitude': v.longitude, 
+            'distance': round(dist, 1),
+            'menu_items': v.menu_items,
+            'name': v.vendor.business_name if v.vendor else "Unknown",
+            'image': v.vendor.storefront_image_url if v.vendor else None,
+            'status': 'Open'
+        })
             
     return jsonify({'success': True, 'vendors': results}), 200
 
@@ -57,65 +52,45 @@ def get_nearby_vendors():
         rad = float(request.args.get('radius', 5000)) / 1000 
     except: return jsonify({'error': 'Invalid params'}), 400
 
-    vendors = VendorLocation.query.filter(VendorLocation.auto_close_at > datetime.utcnow()).all()
+    query = VendorLocation.query.filter(VendorLocation.auto_close_at > datetime.utcnow())
     results = []
     
-    for v in vendors:
-        dist = haversine_distance(lat, lon, v.latitude, v.longitude)
-        if dist <= rad:
-            results.append({
-                'id': v.id, 
-                'vendor_id': v.vendor_id,
-                'latitude': v.latitude, 
-                'longitude': v.longitude,
-                'distance': round(dist, 1),
-                'menu': v.menu_items,
-                'name': v.vendor.business_name if v.vendor else "Unknown",
-                'image': v.vendor.storefront_image_url if v.vendor else None,
-                'status': 'Open',
-                'updated': v.updated_at
-            })
+    for v, dist in find_nearby(query, lat, lon, rad):
+        results.append({
+            'id': v.id, 
+            'vendor_id': v.vendor_id,
+            'latitude': v.latitude, 
+            'longitude': v.longitude,
+            'distance': round(dist, 1),
+            'menu': v.menu_items,
+            'name': v.vendor.business_name if v.vendor else "Unknown",
+            'image': v.vendor.storefront_image_url if v.vendor else None,
+            'status': 'Open',
+            'updated': v.updated_at
+        })
 
     return jsonify({'success': True, 'vendors': results}), 200
 
 # --- 3. GET VENDOR DETAILS ---
 @bp.route('/vendor/<int:vendor_id>', methods=['GET'])
 def get_vendor_details(vendor_id):
+    """
+    Serves the vendor's pre-serialized detail document (rebuilt whenever its
+    menu or address changes) from the worker cache or one keyed lookup that
+    also reads the profile. Only the Open/Closed status is decided per request.
+    """
     try:
-        vendor = User.query.filter_by(id=vendor_id, role='vendor').first()
-        if not vendor or not vendor.location: return jsonify({'error': 'Not found'}), 404
-        loc = vendor.location
-        
-        status = 'Open'
-        if loc.auto_close_at and loc.auto_close_at < datetime.utcnow(): 
-            status = 'Closed'
-
-        formatted_menu = []
-        if loc.menu_items and isinstance(loc.menu_items, list):
-            for i in loc.menu_items:
-                if isinstance(i, dict):
-                    formatted_menu.append({
-                        'id': i.get('id', str(datetime.now().timestamp())), 
-                        'name': i.get('name', 'Unknown'), 
-                        'price': i.get('price', 0),
-                        'description': i.get('desc', ''), 
-                        'image': i.get('image', None), 
-                        'category': 'main'
-                    })
-
-        return jsonify({
-            'success': True,
-            'vendor': {
-                'id': vendor.id, 
-                'name': vendor.business_name, 
-                'image': vendor.storefront_image_url,
-                'address': loc.address, 
-                'status': status,
-                'menuItems': formatted_menu,
-                'categories': [{'id': 'all', 'name': 'All', 'count': len(formatted_menu)}]
-            }
-        }), 200
+        entry = detail_cache.get(vendor_id)
+        if entry is None:
+            entry = load_vendor_detail(db.session, vendor_id)
+            if entry is None: return jsonify({'error': 'Not found'}), 404
+            detail_cache.set(vendor_id, entry, ttl=current_app.config['VENDOR_DETAIL_CACHE_TTL'])
+        head, doc, auto_close_at = entry
+
+        is_open = not (auto_close_at and auto_close_at < datetime.utcnow())
+        return Response(detail_body(head, doc, is_open), mimetype='application/json')
     except Exception as e:
+        print(f"Vendor Details Error: {e}")
         return jsonify({'error': 'Server Error'}), 500
 
 # --- 4. REAL PAYMENT INTEGRATION (STK PUSH) ---
@@ -134,6 +109,7 @@ def initiate_payment():
     if not vendor_id or not amount or not phone:
         return jsonify({'success': False, 'error': 'Missing payment details'}), 400
 
+    new_order = None
     try:
         new_order = Order(
             order_number=Order.generate_order_number(),
@@ -148,14 +124,20 @@ def initiate_payment():
         )
         db.session.add(new_order)
         db.session.flush()
+        # Read what the call needs before committing: touching the expired
+        # order afterwards would reload it and open a new transaction
+        order_id, order_number = new_order.id, new_order.order_number
+        # Commit before calling Safaricom: no DB connection is held while we
+        # wait, so in-flight payments aren't capped by the pool size
+        db.session.commit()
 
         clean_phone = phone.replace('+', '')
 
-        response = mpesa_handler.initiate_stk_push(
+        response = get_mpesa_handler().initiate_stk_push(
             phone_number=clean_phone,
             amount=int(float(amount)),
-            account_reference=new_order.order_number,
-            transaction_desc=f"Order {new_order.order_number}"
+            account_reference=order_number,
+            transaction_desc=f"Order {order_number}"
         )
 
         if 'ResponseCode' in response and response['ResponseCode'] == '0':
@@ -163,7 +145,7 @@ def initiate_payment():
 
             new_txn = Transaction(
                 vendor_id=vendor_id,
-                order_id=new_order.id,
+                order_id=order_id,
                 customer_phone=phone,
                 amount=float(amount),
                 checkout_request_id=checkout_id,
@@ -176,7 +158,7 @@ def initiate_payment():
             return jsonify({
                 'success': True,
                 'message': 'STK Push initiated',
-                'order_number': new_order.order_number,
+                'order_number': order_number,
                 'checkout_id': checkout_id
             }), 200
         else:
@@ -184,7 +166,7 @@ def initiate_payment():
             
             failed_txn = Transaction(
                 vendor_id=vendor_id,
-                order_id=new_order.id,
+                order_id=order_id,
                 customer_phone=phone,
                 amount=float(amount),
                 checkout_request_id=None, 
@@ -202,6 +184,12 @@ def initiate_payment():
     except Exception as e:
         db.session.rollback()
         print(f"Payment Error: {str(e)}")
+        if new_order is not None and new_order.id is not None:
+            try:
+                new_order.status = 'Payment Failed'
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 # --- 5. M-PESA CALLBACK ---
@@ -212,7 +200,7 @@ def mpesa_callback():
         if not data or 'Body' not in data:
             return jsonify({'result': 'ignored'}), 200
 
-        processed_data = mpesa_handler.process_callback(data)
+        processed_data = get_mpesa_handler().process_callback(data)
         
         stk_callback = data['Body']['stkCallback']
         checkout_id = stk_callback['CheckoutRequestID']
@@ -1,11 +1,30 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import VendorLocation, MenuItem, User, Order, db
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import get_jwt_identity
+from app.models import VendorLocation, MenuItem, User, Order, OrderArchive, Transaction, TransactionArchive, db
+from app.utils.archival import archive_boundary, decode_cursor, encode_cursor, newest_first
 from app.utils.cloudinary_service import upload_image
+from app.utils.decorators import vendor_required
+from app.utils.heartbeat import heartbeat_buffer
+from app.utils.cache import TTLCache
+from app.utils.clustering import cluster_index
+from app.utils.vendor_detail import detail_cache
+from sqlalchemy import select, tuple_
 from datetime import datetime, timedelta
+from itertools import islice
 
 bp = Blueprint('vendor', __name__, url_prefix='/api/vendor')
 
+# Short-lived per-vendor snapshots backing /status polling
+status_cache = TTLCache(maxsize=10000)
+
+def _apply_heartbeats(rows):
+    for row in rows:
+        status_cache.invalidate(row['vendor_id'])
+        detail_cache.invalidate(row['vendor_id'])
+        cluster_index.upsert(row['vendor_id'], row['latitude'], row['longitude'], row['auto_close_at'], only_existing=True)
+
+heartbeat_buffer.add_listener(_apply_heartbeats)
+
 # --- 1. UPLOAD IMAGE ---
 @bp.route('/upload', methods=['POST'])
 def upload_file():
@@ -24,70 +43,144 @@ def upload_file():
 
 # --- 2. CHECK-IN ---
 @bp.route('/checkin', methods=['POST'])
-@jwt_required()
+@vendor_required
 def check_in():
-    vendor_id = get_jwt_identity()
+    vendor_id = int(get_jwt_identity())
     data = request.get_json()
 
-    location = VendorLocation.query.filter_by(vendor_id=vendor_id).first()
-    if not location:
-        location = VendorLocation(vendor_id=vendor_id)
-        db.session.add(location)
-
-    location.latitude = data.get('latitude')
-    location.longitude = data.get('longitude')
-    location.address = data.get('address')
-    location.menu_items = data.get('menu_items', [])
-    location.check_in() 
-    
+    now = datetime.utcnow()
+    auto_close_at = VendorLocation.upsert_check_in(
+        db.session,
+        vendor_id=vendor_id,
+        latitude=data.get('latitude'),
+        longitude=data.get('longitude'),
+        address=data.get('address'),
+        menu_items=data.get('menu_items', []),
+        now=now
+    )
     db.session.commit()
+    heartbeat_buffer.forget(vendor_id)
+    status_cache.invalidate(vendor_id)
+    detail_cache.invalidate(vendor_id)
+    try:
+        cluster_index.upsert(vendor_id, float(data.get('latitude')), float(data.get('longitude')), auto_close_at)
+    except (TypeError, ValueError):
+        cluster_index.remove(vendor_id)
 
     return jsonify({
         'success': True, 
-        'remaining_seconds': 10800,
+        'remaining_seconds': int((auto_close_at - now).total_seconds()),
         'message': 'You are live!'
     }), 200
 
 # --- 3. GET STATUS ---
 @bp.route('/status', methods=['GET'])
-@jwt_required()
+@vendor_required
 def get_status():
-    vendor_id = get_jwt_identity()
-    location = VendorLocation.query.filter_by(vendor_id=vendor_id).first()
+    """
+    Read-only: open/closed is derived from auto_close_at at read time and the
+    actual state transition is left to the scheduler. Snapshots are cached
+    briefly per vendor so dashboard polling doesn't hit the database.
+    """
+    vendor_id = int(get_jwt_identity())
+    ttl = current_app.config['STATUS_CACHE_TTL']
 
-    if not location:
-        return jsonify({'is_open': False, 'remaining_seconds': 0, 'menu_items': []}), 200
+    snapshot = status_cache.get(vendor_id)
+    if snapshot is None:
+        loc = VendorLocation.__table__
+        row = db.session.execute(
+            select(loc.c.is_open, loc.c.auto_close_at, loc.c.address, loc.c.menu_items)
+            .where(loc.c.vendor_id == vendor_id)
+        ).first()
+        snapshot = dict(row._mapping) if row else {}
+        status_cache.set(vendor_id, snapshot, ttl=ttl)
 
-    now = datetime.utcnow()
-    remaining = 0
-    
-    if location.is_open and location.auto_close_at:
-        delta = location.auto_close_at - now
-        remaining = int(delta.total_seconds())
+    if not snapshot:
+        payload = {'is_open': False, 'remaining_seconds': 0, 'menu_items': []}
+    else:
+        remaining = 0
+        if snapshot['is_open'] and snapshot['auto_close_at']:
+            remaining = int((snapshot['auto_close_at'] - datetime.utcnow()).total_seconds())
 
-    if remaining <= 0 and location.is_open:
-        location.is_open = False
-        location.updated_at = datetime.utcnow()
-        db.session.commit()
-        return jsonify({'is_open': False, 'remaining_seconds': 0, 'menu_items': location.menu_items}), 200
+        if remaining <= 0:
+            payload = {'is_open': False, 'remaining_seconds': 0, 'menu_items': snapshot['menu_items']}
+        else:
+            payload = {
+                'is_open': True,
+                'remaining_seconds': remaining,
+                'address': snapshot['address'],
+                'menu_items': snapshot['menu_items'] or []
+            }
 
-    return jsonify({
-        'is_open': True,
-        'remaining_seconds': remaining,
-        'address': location.address,
-        'menu_items': location.menu_items or []
-    }), 200
+    response = jsonify(payload)
+    response.headers['Cache-Control'] = f'private, max-age={ttl}'
+    return response, 200
 
 # --- 4. GET ORDERS (NEW) ---
+VENDOR_ORDERS_MAX_PAGE = 500
+
+def vendor_orders_query(vendor_id, date_from=None, date_to=None, cursor=None, limit=None, archived=False):
+    """A vendor's orders with their M-Pesa receipt, newest first, from the hot or archive tables."""
+    o = (OrderArchive if archived else Order).__table__
+    t = (TransactionArchive if archived else Transaction).__table__
+    stmt = (
+        select(o.c.id, o.c.customer_phone, o.c.total_amount, o.c.status, o.c.created_at, o.c['items'],
+               o.c.delivery_location, o.c.customer_latitude, o.c.customer_longitude, t.c.mpesa_receipt_number)
+        .select_from(o.outerjoin(t, t.c.order_id == o.c.id))
+        .where(o.c.vendor_id == vendor_id)
+        .order_by(o.c.created_at.desc(), o.c.id.desc())
+    )
+    if date_from:
+        stmt = stmt.where(o.c.created_at >= date_from)
+    if date_to:
+        stmt = stmt.where(o.c.created_at <= date_to)
+    if cursor:
+        ts, order_id = cursor
+        stmt = stmt.where(tuple_(o.c.created_at, o.c.id) < tuple_(ts, order_id))
+    if limit:
+        stmt = stmt.limit(limit)
+    return stmt
+
+def order_key(row):
+    return (row.created_at or datetime.min, row.id)
+
 @bp.route('/orders', methods=['GET'])
-@jwt_required()
+@vendor_required
 def get_vendor_orders():
-    vendor_id = get_jwt_identity()
-    
-    orders = Order.query.filter_by(vendor_id=vendor_id).order_by(Order.created_at.desc()).all()
-    
+    """
+    One page of the vendor's orders, newest first.
+    Query params: limit, cursor (from the previous page's next_cursor),
+    from / to (ISO dates). Settled orders older than ARCHIVE_AFTER_DAYS are
+    archived; pages continue into them once the live orders run out.
+    """
+    vendor_id = int(get_jwt_identity())
+    try:
+        limit = min(int(request.args.get('limit', current_app.config['VENDOR_ORDERS_PAGE_SIZE'])),
+                    VENDOR_ORDERS_MAX_PAGE)
+        cursor = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+        date_from = datetime.fromisoformat(request.args['from']) if request.args.get('from') else None
+        date_to = datetime.fromisoformat(request.args['to']) if request.args.get('to') else None
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid limit, cursor or from/to date'}), 400
+
+    # Fetch one extra row to know whether another page exists
+    rows = db.session.execute(vendor_orders_query(vendor_id, date_from, date_to, cursor, limit + 1)).all()
+    # The archive is read only when the page reaches back past the live orders
+    page_full = len(rows) > limit and rows[-1].created_at is not None
+    boundary = archive_boundary(OrderArchive.created_at, OrderArchive.vendor_id == vendor_id)
+    if boundary is not None and (not date_from or date_from <= boundary) \
+            and not (page_full and rows[-1].created_at > boundary):
+        archived = db.session.execute(
+            vendor_orders_query(vendor_id, date_from, date_to, cursor, limit + 1, archived=True)).all()
+        rows = list(islice(newest_first(order_key, rows, archived), limit + 1))
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
     output = []
-    for order in orders:
+    for order in rows:
         output.append({
             'id': order.id,
             'customer_phone': order.customer_phone,
@@ -99,14 +192,14 @@ def get_vendor_orders():
             # Pass Coordinates for Mapping
             'customer_lat': order.customer_latitude,
             'customer_lon': order.customer_longitude,
-            'mpesa_receipt_number': order.transaction.mpesa_receipt_number if order.transaction else None
+            'mpesa_receipt_number': order.mpesa_receipt_number
         })
     
-    return jsonify({'success': True, 'orders': output}), 200
+    return jsonify({'success': True, 'orders': output, 'next_cursor': next_cursor}), 200
 
 # --- 5. CLOSE VENDOR ---
 @bp.route('/close', methods=['POST'])
-@jwt_required()
+@vendor_required
 def close_vendor():
     vendor_id = get_jwt_identity()
     location = VendorLocation.query.filter_by(vendor_id=vendor_id).first()
@@ -115,5 +208,31 @@ def close_vendor():
         location.is_open = False
         location.auto_close_at = datetime.utcnow() 
         db.session.commit()
+    heartbeat_buffer.forget(int(vendor_id))
+    status_cache.invalidate(int(vendor_id))
+    detail_cache.invalidate(int(vendor_id))
+    cluster_index.remove(int(vendor_id))
         
-    return jsonify({'success': True}), 200
\ No newline at end of file
+    return jsonify({'success': True}), 200
+
+# --- 6. LOCATION HEARTBEAT ---
+@bp.route('/heartbeat', methods=['POST'])
+@vendor_required
+def heartbeat():
+    """
+    Lightweight position update for vendors on the move.
+    Only moves the pin and extends the freshness timer; menu and address are
+    untouched. Pings are buffered and written in batches.
+    """
+    vendor_id = int(get_jwt_identity())
+    data = request.get_json() or {}
+
+    try:
+        lat = float(data.get('latitude'))
+        lon = float(data.get('longitude'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'latitude and longitude are required'}), 400
+
+    queued = heartbeat_buffer.record(vendor_id, lat, lon)
+
+    return jsonify({'success': True, 'queued': queued}), 202
\ No newline at end of file
@@ -0,0 +1,308 @@
+"""
+Synthetic data loader: vendors clustered around Nairobi neighbourhoods, with
+menus, orders and transactions, at whatever scale you ask for.
+
+Rows are written with Core executemany batches (COPY on Postgres) instead of
+ORM objects, so a million-row dataset loads in seconds. The ORM listeners
+don't fire for Core inserts, which is why vendor_locations.menu_items (and
+its search_text) is written alongside menu_items here.
+
+    python seed.py synthetic --vendors 10000 --orders 1000000
+"""
+import csv
+import io
+import json
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import JSON, DateTime, func, select
+from werkzeug.security import generate_password_hash
+
+# (name, latitude, longitude, relative size, spread in metres)
+NEIGHBOURHOODS = [
+    ('CBD', -1.2864, 36.8232, 10, 900),
+    ('Westlands', -1.2676, 36.8108, 7, 1200),
+    ('Eastleigh', -1.2741, 36.8514, 8, 1300),
+    ('Gikomba', -1.2849, 36.8370, 6, 600),
+    ('Ngara', -1.2740, 36.8225, 4, 700),
+    ('Kilimani', -1.2906, 36.7846, 4, 1400),
+    ('Kibera', -1.3127, 36.7875, 7, 1200),
+    ('Industrial Area', -1.3081, 36.8450, 4, 1800),
+    ('South B', -1.3103, 36.8336, 3, 900),
+    ('Umoja', -1.2833, 36.8993, 5, 1300),
+    ('Kawangware', -1.2833, 36.7500, 5, 1100),
+    ('Kasarani', -1.2233, 36.8980, 4, 1800),
+    ('Githurai', -1.1996, 36.9144, 4, 1500),
+    ('Rongai', -1.3962, 36.7442, 3, 1800),
+    ('Karen', -1.3197, 36.7073, 1, 2500),
+]
+NAIROBI = (-1.2864, 36.8172)
+
+FOODS = ['Samosa', 'Chapati', 'Mandazi', 'Smokie', 'Mutura', 'Nyama Choma', 'Githeri', 'Ugali',
+         'Sukuma Wiki', 'Bhajia', 'Roasted Maize', 'Chips Masala', 'Pilau', 'Kebab', 'Chai', 'Uji',
+         'Matoke', 'Mukimo', 'Viazi Karai', 'Kachumbari', 'Mahamri', 'Egg Roll', 'Fish Fry', 'Tilapia']
+PRICES = [20, 30, 50, 70, 80, 100, 120, 150, 200, 250, 350]
+ORDER_STATUSES = ['Completed'] * 6 + ['Paid', 'Payment Failed', 'Pending Payment', 'New Order']
+TXN_STATUSES = {'Completed': 'COMPLETED', 'Paid': 'COMPLETED', 'Payment Failed': 'FAILED',
+                'Pending Payment': 'PENDING'}
+DEFAULT_PASSWORD = 'Vendor@2026'
+METRES_PER_DEGREE = 111320
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _json(value):
+    return None if value is None else json.dumps(value)
+
+
+def _datetime(value):
+    return None if value is None else value.isoformat(sep=' ')
+
+
+def _converters(table, columns):
+    """Per-column serialisers for JSON and DateTime, in the form SQLAlchemy itself stores them."""
+    converters = []
+    for name in columns:
+        column_type = table.c[name].type
+        if isinstance(column_type, JSON):
+            converters.append(_json)
+        elif isinstance(column_type, DateTime):
+            converters.append(_datetime)
+        else:
+            converters.append(None)
+    return converters
+
+
+def _serialised(table, batch):
+    columns = list(batch[0])
+    converters = _converters(table, columns)
+    convert = [(i, conv) for i, conv in enumerate(converters) if conv is not None]
+    rows = []
+    for row in batch:
+        values = [row[c] for c in columns]
+        for i, conv in convert:
+            values[i] = conv(values[i])
+        rows.append(values)
+    return columns, rows
+
+
+class BulkLoader:
+    """
+    Writes batches of dicts into a table on one connection. On Postgres
+    (psycopg2) batches are streamed with COPY ... FROM STDIN. On SQLite rows
+    are pre-serialised and handed straight to the driver's executemany,
+    skipping SQLAlchemy's per-row type processing. Anything else goes
+    through a Core executemany.
+    """
+
+    def __init__(self, conn, batch_size=10000):
+        self.conn = conn
+        self.batch_size = batch_size
+        dialect = conn.dialect
+        if dialect.name == 'postgresql' and dialect.driver == 'psycopg2':
+            self.mode = 'copy'
+        elif dialect.name == 'sqlite':
+            self.mode = 'driver'
+        else:
+            self.mode = 'core'
+
+    def load(self, table, rows):
+        count = 0
+        for batch in _batched(rows, self.batch_size):
+            if self.mode == 'copy':
+                self._copy(table, batch)
+            elif self.mode == 'driver':
+                self._driver_executemany(table, batch)
+            else:
+                # executemany takes its columns from the first row, so every row needs the same keys
+                self.conn.execute(table.insert(), batch)
+            count += len(batch)
+        return count
+
+    def _copy(self, table, batch):
+        columns, rows = _serialised(table, batch)
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for values in rows:
+            # Unquoted empty fields are NULL in COPY's CSV format
+            writer.writerow(['' if v is None else v for v in values])
+        buf.seek(0)
+        cursor = self.conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+        finally:
+            cursor.close()
+
+    def _driver_executemany(self, table, batch):
+        columns, rows = _serialised(table, batch)
+        sql = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        self.conn.exec_driver_sql(sql, [tuple(values) for values in rows])
+
+
+def _next_id(conn, table):
+    return (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def _jitter(rng, lat, lon, spread_m):
+    """Gaussian scatter around a point, spread given in metres."""
+    dlat = rng.gauss(0, spread_m) / METRES_PER_DEGREE
+    dlon = rng.gauss(0, spread_m) / (METRES_PER_DEGREE * math.cos(math.radians(lat)))
+    return lat + dlat, lon + dlon
+
+
+def seed(engine, vendors=1000, orders=10000, seed=1, batch_size=10000, password=DEFAULT_PASSWORD,
+         hash_method='pbkdf2:sha256:600000', open_ratio=0.7, overdue_ratio=0.02, days=90, now=None):
+    """
+    Appends a synthetic dataset and returns a summary (row counts, seconds,
+    admin_id, hot_vendor_id, center).
+
+    Every seeded vendor logs in with `password`; it is hashed once and the
+    hash reused for every row. Order volume is long-tailed: the first
+    vendors seeded are the busiest. `overdue_ratio` of vendors are still
+    open past their auto_close_at, for the scheduler to close.
+    """
+    from app.models import MenuItem, Order, Transaction, User, VendorLocation
+    from app.utils.search import menu_search_text
+    from app.utils.vendor_detail import build_detail_doc
+
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    started = time.perf_counter()
+    password_hash = generate_password_hash(password, hash_method)
+    weights = [n[3] for n in NEIGHBOURHOODS]
+
+    users, items, locations = User.__table__, MenuItem.__table__, VendorLocation.__table__
+    orders_table, txns_table = Order.__table__, Transaction.__table__
+
+    with engine.begin() as conn:
+        loader = BulkLoader(conn, batch_size)
+        first_user = _next_id(conn, users)
+        first_item = _next_id(conn, items)
+        first_location = _next_id(conn, locations)
+        first_order = _next_id(conn, orders_table)
+        first_txn = _next_id(conn, txns_table)
+
+        admin_id = conn.execute(select(users.c.id).where(users.c.role == 'admin').limit(1)).scalar()
+        vendor_ids = range(first_user, first_user + vendors)
+        counts = {'users': 0}
+
+        if admin_id is None:
+            admin_id = first_user + vendors
+            counts['users'] += loader.load(users, [{
+                'id': admin_id, 'username': f'seed_admin{admin_id}', 'email': f'admin{admin_id}@seed.test',
+                'phone_number': f'+2546{admin_id:08d}', 'password_hash': password_hash, 'role': 'admin',
+                'business_name': None, 'owner_name': 'Seed Admin', 'created_at': now}])
+
+        # --- Vendors, menus and locations ---
+        menus, places = {}, {}
+
+        def vendor_rows():
+            for vendor_id in vendor_ids:
+                hood = rng.choices(NEIGHBOURHOODS, weights=weights)[0]
+                places[vendor_id] = (hood[0], *_jitter(rng, hood[1], hood[2], hood[4]))
+                yield {'id': vendor_id, 'username': f'seed_vendor{vendor_id}', 'email': f'vendor{vendor_id}@seed.test',
+                       'phone_number': f'+2547{vendor_id:08d}', 'password_hash': password_hash, 'role': 'vendor',
+                       'business_name': f"{rng.choice(FOODS)} Spot {hood[0]} #{vendor_id}",
+                       'owner_name': f'Owner {vendor_id}', 'created_at': now - timedelta(days=rng.randint(0, days))}
+
+        def item_rows():
+            item_id = first_item
+            for vendor_id in vendor_ids:
+                menu = []
+                for name in rng.sample(FOODS, rng.randint(3, 8)):
+                    price = rng.choice(PRICES)
+                    menu.append({'name': name, 'price': price, 'image': None, 'available': True})
+                    yield {'id': item_id, 'vendor_id': vendor_id, 'name': name, 'price': price,
+                           'image_url': None, 'is_available': True, 'created_at': now}
+                    item_id += 1
+                menus[vendor_id] = menu
+
+        def location_rows():
+            for n, vendor_id in enumerate(vendor_ids):
+                roll = rng.random()
+                if roll < overdue_ratio:
+                    is_open, close_at = True, now - timedelta(seconds=rng.randint(1, 600))
+                elif roll < overdue_ratio + open_ratio:
+                    is_open, close_at = True, now + timedelta(seconds=rng.randint(60, 3 * 3600))
+                else:
+                    is_open, close_at = False, None
+                hood, lat, lon = places[vendor_id]
+                address = f'{hood}, Nairobi'
+                yield {'id': first_location + n, 'vendor_id': vendor_id, 'latitude': lat, 'longitude': lon,
+                       'address': address, 'menu_items': menus[vendor_id],
+                       'search_text': menu_search_text(menus[vendor_id]),
+                       'detail_doc': build_detail_doc(address, menus[vendor_id]),
+                       'is_open': is_open,
+                       'last_checkin': close_at - timedelta(hours=3) if close_at else None,
+                       'auto_close_at': close_at, 'created_at': now, 'updated_at': now}
+
+        counts['users'] += loader.load(users, vendor_rows())
+        counts['menu_items'] = loader.load(items, item_rows())
+        counts['vendor_locations'] = loader.load(locations, location_rows())
+
+        # --- Orders and their payments ---
+        txn_batch = []
+
+        def pick_vendor():
+            if rng.random() < 0.5:
+                # Pareto tail: a handful of stalls take a big share of orders
+                return first_user + min(int(rng.paretovariate(1.2)) - 1, vendors - 1)
+            return first_user + rng.randrange(vendors)
+
+        def order_rows():
+            txn_id = first_txn
+            for order_id in range(first_order, first_order + orders):
+                vendor_id = pick_vendor()
+                created = now - timedelta(seconds=rng.randint(0, days * 86400))
+                status = rng.choice(ORDER_STATUSES)
+                chosen = rng.sample(menus[vendor_id], rng.randint(1, min(3, len(menus[vendor_id]))))
+                lines = [{'name': i['name'], 'price': i['price'], 'quantity': rng.randint(1, 3)} for i in chosen]
+                total = float(sum(l['price'] * l['quantity'] for l in lines))
+                phone = f'2547{rng.randrange(10 ** 8):08d}'
+                _, lat, lon = places[vendor_id]
+                cust_lat, cust_lon = _jitter(rng, lat, lon, 400)
+                yield {'id': order_id, 'order_number': f'ORD-S{order_id:012d}', 'vendor_id': vendor_id,
+                       'customer_phone': phone, 'items': lines, 'total_amount': total, 'status': status,
+                       'delivery_location': None, 'customer_latitude': cust_lat, 'customer_longitude': cust_lon,
+                       'created_at': created}
+                if status in TXN_STATUSES:
+                    txn_status = TXN_STATUSES[status]
+                    txn_batch.append({
+                        'id': txn_id, 'vendor_id': vendor_id, 'order_id': order_id, 'customer_phone': phone,
+                        'amount': total, 'checkout_request_id': f'ws_CO_S{txn_id:012d}',
+                        'mpesa_receipt_number': f'S{txn_id:011d}' if txn_status == 'COMPLETED' else None,
+                        'transaction_date': created, 'status': txn_status,
+                        'created_at': created, 'updated_at': created})
+                    txn_id += 1
+
+        counts['orders'] = counts['transactions'] = 0
+        for batch in _batched(order_rows(), batch_size):
+            counts['orders'] += loader.load(orders_table, batch)
+            counts['transactions'] += loader.load(txns_table, txn_batch)
+            txn_batch.clear()
+
+        if conn.dialect.name == 'postgresql':
+            # Explicit ids don't advance the serial sequences
+            for table in (users, items, locations, orders_table, txns_table):
+                conn.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {table.name}))"
+                )
+
+    return {
+        'counts': counts,
+        'seconds': round(time.perf_counter() - started, 2),
+        'admin_id': admin_id,
+        'hot_vendor_id': first_user,
+        'center': NAIROBI,
+    }
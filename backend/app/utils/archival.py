@@ -0,0 +1,128 @@
+import base64
+import heapq
+from datetime import datetime, timedelta
+from itertools import islice
+from sqlalchemy import DateTime, delete, exists, false, func, insert, literal, or_, select, tuple_
+from app.extensions import db
+from app.models import (Order, OrderArchive, RollupWatermark, Transaction, TransactionArchive,
+                        SUCCESS_STATUSES)
+from app.utils.metrics import registry
+from app.utils.rollups import WATERMARK_NAME
+
+# Final states: nothing writes to these rows any more
+ARCHIVABLE_ORDER_STATUSES = ('Completed', 'Paid', 'Payment Failed')
+ARCHIVABLE_TXN_STATUSES = SUCCESS_STATUSES + ('FAILED', )
+
+ARCHIVED_ROWS = registry.counter('archived_rows_total', 'Rows moved to the archive tables.', ('table',))
+
+
+def _move(session, source, target, ids, now):
+    """Copies rows `ids` of `source` into `target` and deletes them from `source`."""
+    # Hot-only bookkeeping columns (e.g. the rollup's rolled_*) stay behind
+    columns = [column.name for column in source.columns if column.name in target.c]
+    session.execute(
+        insert(target).from_select(
+            columns + ['archived_at'],
+            select(*(source.c[name] for name in columns), literal(now, DateTime)).where(source.c.id.in_(ids))
+        )
+    )
+    session.execute(delete(source).where(source.c.id.in_(ids)))
+
+
+def archive_old_rows(max_age_days, batch_size=1000, max_batches=None, session=None, now=None):
+    """
+    Moves settled orders and transactions older than `max_age_days` from the
+    hot tables into orders_archive / transactions_archive, `batch_size`
+    orders (or standalone transactions) per commit, so locks stay short and
+    a crash loses at most one batch of work, never rows.
+
+    An order moves together with its transaction. Transactions the stats
+    rollups haven't folded in yet (updated after the rollup watermark) stay
+    hot, and so do their orders.
+
+    Returns {'orders': n, 'transactions': n} moved.
+    """
+    session = session or db.session
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=max_age_days)
+
+    o = Order.__table__
+    t = Transaction.__table__
+    oa = OrderArchive.__table__
+    ta = TransactionArchive.__table__
+
+    watermark = session.get(RollupWatermark, WATERMARK_NAME)
+    if watermark is None:
+        unsettled = t.c.id.isnot(None)
+        settled = false()
+    else:
+        unsettled = or_(t.c.status.is_(None), t.c.status.notin_(ARCHIVABLE_TXN_STATUSES),
+                        t.c.updated_at.is_(None), t.c.updated_at >= cutoff,
+                        tuple_(t.c.updated_at, t.c.id) > tuple_(watermark.last_updated_at, watermark.last_id))
+        settled = ~unsettled
+
+    order_batch = (
+        select(o.c.id)
+        .where(o.c.status.in_(ARCHIVABLE_ORDER_STATUSES), o.c.created_at < cutoff)
+        .where(~exists().where(t.c.order_id == o.c.id, unsettled))
+        .order_by(o.c.id)
+        .limit(batch_size)
+    )
+    # Aged by updated_at (part of `settled`): transaction_date can be NULL
+    standalone_batch = (
+        select(t.c.id)
+        .where(t.c.order_id.is_(None), settled)
+        .order_by(t.c.id)
+        .limit(batch_size)
+    )
+
+    def batches():
+        while True:
+            order_ids = session.execute(order_batch).scalars().all()
+            if not order_ids:
+                break
+            yield order_ids, session.execute(select(t.c.id).where(t.c.order_id.in_(order_ids))).scalars().all()
+        while True:
+            txn_ids = session.execute(standalone_batch).scalars().all()
+            if not txn_ids:
+                break
+            yield [], txn_ids
+
+    moved = {'orders': 0, 'transactions': 0}
+    for order_ids, txn_ids in islice(batches(), max_batches):
+        # Transactions first: their order_id cascades on order delete
+        if txn_ids:
+            _move(session, t, ta, txn_ids, now)
+        if order_ids:
+            _move(session, o, oa, order_ids, now)
+        session.commit()
+        moved['orders'] += len(order_ids)
+        moved['transactions'] += len(txn_ids)
+        ARCHIVED_ROWS.inc(len(order_ids), table=o.name)
+        ARCHIVED_ROWS.inc(len(txn_ids), table=t.name)
+    return moved
+
+
+def archive_boundary(column, *criteria, session=None):
+    """
+    Newest `column` value in an archive table (matching `criteria`), or None
+    when nothing is archived. Every archived row is at or before it, so a
+    read whose window ends after it never needs the archive.
+    """
+    session = session or db.session
+    return session.execute(select(func.max(column)).where(*criteria)).scalar()
+
+
+def newest_first(key, *sources):
+    """Merges row iterables that are each sorted newest first by `key`."""
+    return heapq.merge(*sources, key=key, reverse=True)
+
+
+def encode_cursor(ts, row_id):
+    """Keyset cursor for (timestamp, id) pages that may continue into the archive."""
+    return base64.urlsafe_b64encode(f"{ts.isoformat()}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    ts, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.fromisoformat(ts), int(row_id)
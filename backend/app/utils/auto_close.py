@@ -0,0 +1,120 @@
+import heapq
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from app.extensions import db
+from app.models import VendorLocation
+
+
+class AutoCloser:
+    """
+    Closes vendors at their auto_close_at instead of on a fixed poll.
+
+    Upcoming deadlines (anything due before the next refresh, plus a margin)
+    are kept in a min-heap rebuilt from the database every
+    `refresh_interval` seconds. The scheduler sleeps until the earliest
+    deadline and then closes everything that is due with one bulk UPDATE.
+    """
+
+    def __init__(self, refresh_interval=60):
+        self.refresh_interval = refresh_interval
+        self._heap = []             # (auto_close_at, vendor_id); entries may be stale
+        self.next_refresh = None
+        self.stats = {
+            'sweeps': 0,
+            'closed': 0,
+            'lag_count': 0,
+            'lag_sum': 0.0,
+            'lag_max': 0.0,
+            'last_lag': None,
+            'last_sweep_at': None,
+            'tracked': 0,
+        }
+
+    def refresh(self, session=None, now=None):
+        """Reloads deadlines falling inside the next two refresh intervals."""
+        session = session or db.session
+        now = now or datetime.utcnow()
+        horizon = now + timedelta(seconds=self.refresh_interval * 2)
+
+        loc = VendorLocation.__table__
+        rows = session.execute(
+            select(loc.c.auto_close_at, loc.c.vendor_id)
+            .where(loc.c.is_open == True)
+            .where(loc.c.auto_close_at.isnot(None))
+            .where(loc.c.auto_close_at <= horizon)
+        ).all()
+        # Don't hold the read transaction open while sleeping
+        session.rollback()
+
+        self._heap = [(row.auto_close_at, row.vendor_id) for row in rows]
+        heapq.heapify(self._heap)
+        self.next_refresh = now + timedelta(seconds=self.refresh_interval)
+        self.stats['tracked'] = len(self._heap)
+
+    def next_deadline(self):
+        return self._heap[0][0] if self._heap else None
+
+    def next_wakeup(self, now=None):
+        """When the scheduler should next call close_due() or refresh()."""
+        now = now or datetime.utcnow()
+        candidates = [self.next_refresh or now]
+        if self._heap:
+            candidates.append(self._heap[0][0])
+        return min(candidates)
+
+    def due(self, now=None):
+        now = now or datetime.utcnow()
+        return bool(self._heap) and self._heap[0][0] <= now
+
+    def close_due(self, session=None, now=None):
+        """
+        Closes every open vendor whose auto_close_at has passed in a single
+        UPDATE ... RETURNING vendor_id and records how late each closure was.
+        Returns the closed vendor ids.
+        """
+        session = session or db.session
+        now = now or datetime.utcnow()
+
+        # Deadlines we knew about, to measure lag for the rows that close
+        known = {}
+        while self._heap and self._heap[0][0] <= now:
+            deadline, vendor_id = heapq.heappop(self._heap)
+            known[vendor_id] = deadline
+
+        loc = VendorLocation.__table__
+        where = [loc.c.is_open == True, loc.c.auto_close_at.isnot(None), loc.c.auto_close_at <= now]
+        values = {'is_open': False, 'auto_close_at': None, 'updated_at': now}
+
+        if session.get_bind().dialect.update_returning:
+            closed = session.execute(
+                update(loc).where(*where).values(**values).returning(loc.c.vendor_id)
+            ).scalars().all()
+        else:
+            closed = session.execute(select(loc.c.vendor_id).where(*where)).scalars().all()
+            if closed:
+                session.execute(update(loc).where(loc.c.vendor_id.in_(closed)).values(**values))
+        session.commit()
+
+        # Stale heap entries (vendor extended or closed by hand) simply don't
+        # come back from the UPDATE
+        wall_now = datetime.utcnow()
+        for vendor_id in closed:
+            deadline = known.get(vendor_id)
+            if deadline is None:
+                continue
+            lag = max((wall_now - deadline).total_seconds(), 0.0)
+            self.stats['lag_count'] += 1
+            self.stats['lag_sum'] += lag
+            self.stats['lag_max'] = max(self.stats['lag_max'], lag)
+            self.stats['last_lag'] = lag
+
+        self.stats['sweeps'] += 1
+        self.stats['closed'] += len(closed)
+        self.stats['last_sweep_at'] = now
+        self.stats['tracked'] = len(self._heap)
+        return closed
+
+    def metrics(self):
+        stats = dict(self.stats)
+        stats['lag_avg'] = stats['lag_sum'] / stats['lag_count'] if stats['lag_count'] else None
+        return stats
@@ -1,6 +1,33 @@
-import cloudinary
-import cloudinary.uploader
 import os
+from flask import current_app, has_app_context
+from app.utils.metrics import external_call
+
+UPLOAD_FOLDER = "local_vendor_app/menu_items"
+
+def _credentials():
+    cfg = current_app.config if has_app_context() else {}
+    return {
+        'cloud_name': cfg.get('CLOUDINARY_CLOUD_NAME') or os.getenv('CLOUDINARY_CLOUD_NAME'),
+        'api_key': cfg.get('CLOUDINARY_API_KEY') or os.getenv('CLOUDINARY_API_KEY'),
+        'api_secret': cfg.get('CLOUDINARY_API_SECRET') or os.getenv('CLOUDINARY_API_SECRET'),
+    }
+
+def _timeout():
+    """(connect, read) timeout for the SDK's shared urllib3 pool."""
+    import urllib3
+
+    cfg = current_app.config if has_app_context() else {}
+    return urllib3.Timeout(connect=cfg.get('EXTERNAL_HTTP_CONNECT_TIMEOUT', 5),
+                           read=cfg.get('EXTERNAL_HTTP_TIMEOUT', 30))
+
+def _cloudinary():
+    """Imports and configures the Cloudinary SDK on first upload."""
+    import cloudinary
+    import cloudinary.uploader
+
+    if not cloudinary.config().cloud_name:
+        cloudinary.config(**_credentials())
+    return cloudinary
 
 def upload_image(file_obj):
     """
@@ -10,20 +37,16 @@ def upload_image(file_obj):
         return None
 
     try:
-        # Check if config exists, if not, load from env
-        if not cloudinary.config().cloud_name:
-            cloudinary.config(
-                cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
-                api_key=os.getenv('CLOUDINARY_API_KEY'),
-                api_secret=os.getenv('CLOUDINARY_API_SECRET')
-            )
+        cloudinary = _cloudinary()
 
         # Upload to a specific folder
-        upload_result = cloudinary.uploader.upload(
-            file_obj,
-            folder="local_vendor_app/menu_items"
-        )
+        with external_call('cloudinary', 'upload'):
+            upload_result = cloudinary.uploader.upload(
+                file_obj,
+                folder=UPLOAD_FOLDER,
+                timeout=_timeout()
+            )
         return upload_result.get('secure_url')
     except Exception as e:
         print(f"Cloudinary Upload Error: {e}")
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,195 @@
+import heapq
+import math
+import threading
+import time
+from datetime import datetime
+
+
+class _Cell:
+    __slots__ = ('members', 'sum_lat', 'sum_lon', 'bounds')
+
+    def __init__(self):
+        self.members = {}       # vendor_id -> (lat, lon)
+        self.sum_lat = 0.0
+        self.sum_lon = 0.0
+        self.bounds = None      # (south, west, north, east); None = recompute
+
+    def add(self, vendor_id, lat, lon):
+        self.members[vendor_id] = (lat, lon)
+        self.sum_lat += lat
+        self.sum_lon += lon
+        if self.bounds is not None:
+            s, w, n, e = self.bounds
+            self.bounds = (min(s, lat), min(w, lon), max(n, lat), max(e, lon))
+
+    def remove(self, vendor_id):
+        lat, lon = self.members.pop(vendor_id)
+        self.sum_lat -= lat
+        self.sum_lon -= lon
+        # Only a point on the edge can shrink the box
+        if self.bounds is not None and (lat in (self.bounds[0], self.bounds[2]) or lon in (self.bounds[1], self.bounds[3])):
+            self.bounds = None
+
+    def get_bounds(self):
+        if self.bounds is None:
+            lats = [p[0] for p in self.members.values()]
+            lons = [p[1] for p in self.members.values()]
+            self.bounds = (min(lats), min(lons), max(lats), max(lons))
+        return self.bounds
+
+
+class ClusterIndex:
+    """
+    Grid clusters of live vendors, precomputed for every zoom level below
+    `expand_zoom` and updated incrementally on check-in, heartbeat and close.
+
+    At zoom z the world is cut into square cells of 360 / 2**z / divisions
+    degrees. Each cell keeps its members, coordinate sums (for the centroid)
+    and a lazily recomputed bounding box.
+
+    The index is per process. Vendors closed by the scheduler in another
+    process drop out once their auto_close_at passes, and a periodic resync
+    from the database picks up check-ins handled by other workers.
+    """
+
+    def __init__(self, expand_zoom=16, divisions=8):
+        self.expand_zoom = expand_zoom
+        self.divisions = divisions
+        self._lock = threading.RLock()
+        self._reset()
+        self.loaded_at = None
+
+    def _reset(self):
+        self._vendors = {}      # vendor_id -> (lat, lon, auto_close_at)
+        self._levels = [dict() for _ in range(self.expand_zoom)]
+        self._deadlines = []    # heap of (auto_close_at, vendor_id), may hold stale entries
+
+    @property
+    def loaded(self):
+        return self.loaded_at is not None
+
+    def _cell_size(self, zoom):
+        return 360.0 / (2 ** zoom) / self.divisions
+
+    def _key(self, zoom, lat, lon):
+        size = self._cell_size(zoom)
+        return (math.floor(lat / size), math.floor(lon / size))
+
+    def _insert(self, vendor_id, lat, lon, auto_close_at):
+        self._vendors[vendor_id] = (lat, lon, auto_close_at)
+        for zoom, cells in enumerate(self._levels):
+            key = self._key(zoom, lat, lon)
+            cell = cells.get(key)
+            if cell is None:
+                cell = cells[key] = _Cell()
+                cell.bounds = (lat, lon, lat, lon)
+            cell.add(vendor_id, lat, lon)
+        if auto_close_at:
+            heapq.heappush(self._deadlines, (auto_close_at, vendor_id))
+
+    def _delete(self, vendor_id):
+        entry = self._vendors.pop(vendor_id, None)
+        if entry is None:
+            return
+        lat, lon, _ = entry
+        for zoom, cells in enumerate(self._levels):
+            key = self._key(zoom, lat, lon)
+            cell = cells[key]
+            cell.remove(vendor_id)
+            if not cell.members:
+                del cells[key]
+
+    def load(self, rows, now=None):
+        """Rebuilds the index from (vendor_id, latitude, longitude, auto_close_at) rows."""
+        now = now or datetime.utcnow()
+        with self._lock:
+            self._reset()
+            for vendor_id, lat, lon, auto_close_at in rows:
+                if lat is None or lon is None or (auto_close_at and auto_close_at <= now):
+                    continue
+                self._insert(vendor_id, lat, lon, auto_close_at)
+            self.loaded_at = time.monotonic()
+
+    def upsert(self, vendor_id, lat, lon, auto_close_at, only_existing=False):
+        """Moves or adds one vendor. No-op until the index has been loaded."""
+        with self._lock:
+            if not self.loaded or (only_existing and vendor_id not in self._vendors):
+                return
+            current = self._vendors.get(vendor_id)
+            if current and current[0] == lat and current[1] == lon:
+                # Same spot: only the deadline moves
+                self._vendors[vendor_id] = (lat, lon, auto_close_at)
+                if auto_close_at:
+                    heapq.heappush(self._deadlines, (auto_close_at, vendor_id))
+                return
+            self._delete(vendor_id)
+            self._insert(vendor_id, lat, lon, auto_close_at)
+
+    def remove(self, vendor_id):
+        with self._lock:
+            self._delete(vendor_id)
+
+    def expire(self, now=None):
+        """Drops vendors whose auto_close_at has passed."""
+        now = now or datetime.utcnow()
+        with self._lock:
+            while self._deadlines and self._deadlines[0][0] <= now:
+                deadline, vendor_id = heapq.heappop(self._deadlines)
+                entry = self._vendors.get(vendor_id)
+                # Skip stale heap entries for vendors whose deadline moved
+                if entry and entry[2] == deadline:
+                    self._delete(vendor_id)
+
+    def needs_resync(self, interval):
+        return not self.loaded or time.monotonic() - self.loaded_at >= interval
+
+    def _cells_in(self, zoom, south, west, north, east):
+        cells = self._levels[zoom]
+        lo = self._key(zoom, south, west)
+        hi = self._key(zoom, north, east)
+        span = (hi[0] - lo[0] + 1) * (hi[1] - lo[1] + 1)
+        if span <= len(cells):
+            for ix in range(lo[0], hi[0] + 1):
+                for iy in range(lo[1], hi[1] + 1):
+                    cell = cells.get((ix, iy))
+                    if cell is not None:
+                        yield cell
+        else:
+            for (ix, iy), cell in cells.items():
+                if lo[0] <= ix <= hi[0] and lo[1] <= iy <= hi[1]:
+                    yield cell
+
+    def clusters(self, south, west, north, east, zoom):
+        """Clusters whose cell overlaps the viewport at the given zoom."""
+        zoom = max(0, min(int(zoom), self.expand_zoom - 1))
+        result = []
+        with self._lock:
+            for cell in self._cells_in(zoom, south, west, north, east):
+                count = len(cell.members)
+                s, w, n, e = cell.get_bounds()
+                cluster = {
+                    'count': count,
+                    'latitude': cell.sum_lat / count,
+                    'longitude': cell.sum_lon / count,
+                    'bounds': {'south': s, 'west': w, 'north': n, 'east': e}
+                }
+                if count == 1:
+                    cluster['vendor_id'] = next(iter(cell.members))
+                result.append(cluster)
+        return result
+
+    def vendors_in(self, south, west, north, east):
+        """Ids of individual vendors inside the viewport."""
+        with self._lock:
+            ids = []
+            for cell in self._cells_in(self.expand_zoom - 1, south, west, north, east):
+                for vendor_id, (lat, lon) in cell.members.items():
+                    if south <= lat <= north and west <= lon <= east:
+                        ids.append(vendor_id)
+            return ids
+
+    def __len__(self):
+        return len(self._vendors)
+
+
+cluster_index = ClusterIndex()
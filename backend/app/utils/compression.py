@@ -0,0 +1,169 @@
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from flask import request
+from app.utils.metrics import SIZE_BUCKETS, registry
+
+try:
+    import brotli
+except ImportError:     # optional: gzip only
+    brotli = None
+
+COMPRESSION_BYTES_IN = registry.counter(
+    'http_compression_bytes_in_total', 'Response bytes before compression.', ('endpoint', 'encoding'))
+COMPRESSION_BYTES_OUT = registry.counter(
+    'http_compression_bytes_out_total', 'Response bytes after compression.', ('endpoint', 'encoding'))
+COMPRESSION_CPU = registry.counter(
+    'http_compression_cpu_seconds_total', 'CPU time spent compressing responses.', ('endpoint', 'encoding'))
+COMPRESSION_CACHE = registry.counter(
+    'http_compression_cache_total', 'Compressed-body cache lookups.', ('result',))
+COMPRESSED_SIZE = registry.histogram(
+    'http_compressed_size_bytes', 'Compressed body size by endpoint.', ('endpoint', 'encoding'), buckets=SIZE_BUCKETS)
+
+
+def compress_body(data, encoding, gzip_level=6, brotli_quality=4):
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    # mtime=0 keeps the output deterministic, so equal bodies compress to equal bytes
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def choose_encoding(accept_encodings, brotli_available):
+    """The best encoding the client accepts ('br' over 'gzip' on ties), or None."""
+    offers = ('br', 'gzip') if brotli_available else ('gzip', )
+    best, best_quality = None, 0
+    for encoding in offers:
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class BodyCache:
+    """
+    LRU of compressed bodies keyed by (ETag, encoding), bounded by total
+    bytes. Identical responses (the same nearby grid cell, an unchanged
+    menu) are compressed once per worker.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._items.get(key)
+            if body is not None:
+                self._items.move_to_end(key)
+            return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._items[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class Compressor:
+    """
+    Negotiated gzip/brotli compression of finished responses.
+
+    Only bodies of at least COMPRESSION_MIN_SIZE bytes with a type from
+    COMPRESSION_MIMETYPES are compressed; streamed responses, responses
+    that already carry a Content-Encoding and error pages pass through
+    untouched. GET responses get a strong ETag of the uncompressed body,
+    which keys a per-process cache of the compressed bytes; the compressed
+    representation's ETag carries the encoding as a suffix, and a matching
+    If-None-Match is answered with 304 without compressing.
+    """
+
+    def __init__(self, app=None):
+        self.cache = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['compress'] = self
+        if not app.config['COMPRESSION_ENABLED']:
+            return
+        cfg = app.config
+        self.min_size = cfg['COMPRESSION_MIN_SIZE']
+        self.mimetypes = set(cfg['COMPRESSION_MIMETYPES'])
+        self.gzip_level = cfg['COMPRESSION_LEVEL']
+        self.brotli_quality = cfg['COMPRESSION_BROTLI_QUALITY']
+        self.cache = BodyCache(cfg['COMPRESSION_CACHE_BYTES']) if cfg['COMPRESSION_CACHE_BYTES'] else None
+        app.after_request(self.compress_response)
+
+    def _eligible(self, response):
+        if response.direct_passthrough or response.is_streamed:
+            return False
+        if response.status_code < 200 or response.status_code in (204, 206, 304) or response.status_code >= 400:
+            return False
+        if 'Content-Encoding' in response.headers or response.mimetype not in self.mimetypes:
+            return False
+        return (response.calculate_content_length() or 0) >= self.min_size
+
+    def compress_response(self, response):
+        if not self._eligible(response):
+            return response
+        # Caches in front of us must keep one copy per encoding
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings, brotli is not None)
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        endpoint = request.endpoint or 'unmatched'
+        etag = None
+        if request.method == 'GET':
+            etag, weak = response.get_etag()
+            if etag is None:
+                etag, weak = hashlib.sha1(data).hexdigest(), False
+            if weak:
+                etag = None
+
+        original_etag = response.headers.get('ETag')
+        if etag:
+            # Answer revalidation of the compressed representation before
+            # spending CPU on it
+            response.set_etag(f'{etag}-{encoding}')
+            response.make_conditional(request)
+            if response.status_code == 304:
+                return response
+
+        key = (etag, encoding)
+        body = self.cache.get(key) if self.cache is not None and etag else None
+        if body is None:
+            started = time.thread_time()
+            body = compress_body(data, encoding, self.gzip_level, self.brotli_quality)
+            COMPRESSION_CPU.inc(time.thread_time() - started, endpoint=endpoint, encoding=encoding)
+            if self.cache is not None and etag:
+                COMPRESSION_CACHE.inc(result='miss')
+                self.cache.put(key, body)
+        else:
+            COMPRESSION_CACHE.inc(result='hit')
+
+        if len(body) >= len(data):
+            if original_etag is None:
+                response.headers.pop('ETag', None)
+            else:
+                response.headers['ETag'] = original_etag
+            return response
+
+        COMPRESSION_BYTES_IN.inc(len(data), endpoint=endpoint, encoding=encoding)
+        COMPRESSION_BYTES_OUT.inc(len(body), endpoint=endpoint, encoding=encoding)
+        COMPRESSED_SIZE.observe(len(body), endpoint=endpoint, encoding=encoding)
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,153 @@
+import threading
+import time
+from flask import current_app, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+from sqlalchemy.sql.dml import UpdateBase
+from app.utils.metrics import registry
+
+REPLICA_BIND = 'replica'
+
+REPLICA_ROUTING = registry.counter(
+    'db_replica_routing_total', 'Read-only requests by the engine they were routed to.', ('target', 'reason'))
+
+
+class RoutingSession(Session):
+    """
+    Sends reads to the replica bind while `info['use_replica']` is set (see
+    ReadReplicaRouter). Flushes and INSERT/UPDATE/DELETE statements always
+    go to the primary, and once a session has written, every later read in
+    it stays on the primary too, so it sees its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('use_replica'):
+            if self._flushing or isinstance(clause, UpdateBase):
+                self.info['use_replica'] = False
+            else:
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaMonitor:
+    """
+    Cached replica health: reachable and no further behind than max_lag
+    seconds. Checked at most every `check_interval` seconds per process.
+    """
+
+    def __init__(self, engine, max_lag=5.0, check_interval=5.0):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag = None
+        self.healthy = True
+        self.reason = None
+        self.checked_at = None
+        self._lock = threading.Lock()
+
+    def measure_lag(self):
+        """Seconds of replication lag; 0 where the database can't report it (e.g. SQLite)."""
+        with self.engine.connect() as conn:
+            if self.engine.dialect.name == 'postgresql':
+                lag = conn.execute(text(
+                    "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+                )).scalar()
+                # An idle primary replays nothing; no WAL waiting means no real lag
+                pending = conn.execute(text(
+                    "SELECT pg_is_in_recovery() AND pg_last_wal_receive_lsn() IS DISTINCT FROM pg_last_wal_replay_lsn()"
+                )).scalar()
+                return float(lag) if pending else 0.0
+            conn.execute(text("SELECT 1"))
+            return 0.0
+
+    def check(self, now=None):
+        now = now or time.monotonic()
+        if self.checked_at is not None and now - self.checked_at < self.check_interval:
+            return self.healthy
+        with self._lock:
+            if self.checked_at is not None and now - self.checked_at < self.check_interval:
+                return self.healthy
+            try:
+                self.lag = self.measure_lag()
+                self.healthy = self.lag <= self.max_lag
+                self.reason = None if self.healthy else 'lag'
+            except Exception as e:
+                print(f"Replica Check Error: {e}")
+                self.lag, self.healthy, self.reason = None, False, 'unreachable'
+            self.checked_at = now
+        return self.healthy
+
+
+class ReadReplicaRouter:
+    """
+    Routes GET/HEAD requests to the replica bind, except the endpoints in
+    REPLICA_PRIMARY_ENDPOINTS that must read their own writes (e.g. payment
+    status right after the callback). Falls back to the primary while the
+    replica is lagging or down.
+    """
+
+    def __init__(self, app=None):
+        self.monitor = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from app.extensions import db
+
+        app.extensions['read_replica'] = self
+        with app.app_context():
+            engine = db.engines.get(REPLICA_BIND)
+        if engine is None:
+            return
+        self.monitor = ReplicaMonitor(engine, app.config['REPLICA_MAX_LAG'], app.config['REPLICA_CHECK_INTERVAL'])
+        app.before_request(self._route_request)
+        app.teardown_request(self._end_request)
+
+    def replica_available(self):
+        if self.monitor is None:
+            return False
+        if self.monitor.check():
+            return True
+        REPLICA_ROUTING.inc(target='primary', reason=self.monitor.reason)
+        return False
+
+    def _route_request(self):
+        from app.extensions import db
+
+        # Always decide afresh: the session can outlive a request (e.g. in tests)
+        db.session.info['use_replica'] = False
+        if request.method not in ('GET', 'HEAD') or request.endpoint in current_app.config['REPLICA_PRIMARY_ENDPOINTS']:
+            return None
+        if self.replica_available():
+            db.session.info['use_replica'] = True
+            REPLICA_ROUTING.inc(target='replica', reason='read')
+        return None
+
+    def _end_request(self, exc):
+        from app.extensions import db
+
+        db.session.info.pop('use_replica', None)
+
+
+class replica_reads:
+    """
+    Context manager for report code outside GET requests (scripts, jobs):
+    reads inside it go to the replica if one is configured and healthy.
+    """
+
+    def __enter__(self):
+        from app.extensions import db
+
+        router = current_app.extensions.get('read_replica') if has_app_context() else None
+        self._previous = db.session.info.get('use_replica', False)
+        if router is not None and router.replica_available():
+            db.session.info['use_replica'] = True
+        return self
+
+    def __exit__(self, *exc):
+        from app.extensions import db
+
+        db.session.info['use_replica'] = self._previous
+        return False
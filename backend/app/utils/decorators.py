@@ -1,15 +1,28 @@
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from flask import jsonify
 from functools import wraps
-from app.models import User
+from app.utils.user_cache import get_user, is_revoked
+
+def _token_role():
+    """
+    Role from the signed token claim; no database round trip. Tokens issued
+    before the claim existed fall back to the cached user lookup.
+    """
+    claims = get_jwt()
+    user_id = get_jwt_identity()
+    if is_revoked(user_id, claims.get('iat')):
+        return None
+    role = claims.get('role')
+    if role is None:
+        user = get_user(user_id)
+        role = user['role'] if user else None
+    return role
 
 def vendor_required(fn):
     @wraps(fn)
     @jwt_required()
     def wrapper(*args, **kwargs):
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        if not user or user.role != 'vendor':
+        if _token_role() != 'vendor':
             return jsonify({'error': 'Vendor access required'}), 403
         return fn(*args, **kwargs)
     return wrapper
@@ -18,9 +31,7 @@ def admin_required(fn):
     @wraps(fn)
     @jwt_required()
     def wrapper(*args, **kwargs):
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        if not user or user.role != 'admin':
+        if _token_role() != 'admin':
             return jsonify({'error': 'Admin access required'}), 403
         return fn(*args, **kwargs)
     return wrapper
@@ -18,3 +18,14 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     r = 6371
 
     return c * r
+
+def bounding_box(lat, lon, radius_km):
+    """
+    (south, west, north, east) in degrees around a point, wide enough to hold
+    every point within radius_km. Used to let the latitude/longitude indexes
+    narrow a radius query before the exact haversine check.
+    """
+    dlat = math.degrees(radius_km / 6371)
+    # Longitude degrees shrink towards the poles; clamp to avoid dividing by ~0
+    dlon = math.degrees(radius_km / (6371 * max(math.cos(math.radians(lat)), 0.01)))
+    return lat - dlat, lon - dlon, lat + dlat, lon + dlon
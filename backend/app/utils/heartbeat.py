@@ -0,0 +1,182 @@
+import atexit
+import threading
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import bindparam, update
+from app.extensions import db
+from app.utils.geospatial import haversine_distance
+
+
+class HeartbeatBuffer:
+    """
+    Coalesces vendor location pings in memory and writes them in batches.
+
+    A ping only touches latitude, longitude and the freshness timer; the menu
+    and address written by a full check-in are left alone. Once init_app has
+    run, queued pings are also flushed by a timer (so a vendor's last ping
+    is written without further traffic) and at interpreter exit.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}      # vendor_id -> (lat, lon, seen_at)
+        self._persisted = {}    # vendor_id -> (lat, lon, written_at)
+        self._last_flush = datetime.utcnow()
+        self._listeners = []
+        self._app = None
+        self._timer = None
+        self._interval = None
+
+    def init_app(self, app):
+        self._app = app
+        if self._interval is None:
+            atexit.register(self._flush_in_app)
+        self._interval = app.config['HEARTBEAT_FLUSH_INTERVAL']
+
+    def _schedule(self):
+        # Called with the lock held: one pending timer at a time
+        if self._timer is None and self._app is not None:
+            self._timer = threading.Timer(self._interval, self._on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+        self._flush_in_app()
+        with self._lock:
+            if self._pending:     # failed flush or pings queued meanwhile
+                self._schedule()
+
+    def _flush_in_app(self):
+        app = self._app
+        if app is None:
+            return
+        with app.app_context():
+            try:
+                self.flush()
+            finally:
+                db.session.remove()
+
+    def add_listener(self, fn):
+        """Registers fn(rows) to be called after every successful flush."""
+        self._listeners.append(fn)
+
+    def record(self, vendor_id, latitude, longitude, now=None):
+        """
+        Queues a ping. Returns False when the ping was absorbed because the
+        vendor has barely moved since the last write.
+        """
+        now = now or datetime.utcnow()
+        cfg = current_app.config
+
+        with self._lock:
+            last = self._persisted.get(vendor_id)
+            if last and vendor_id not in self._pending:
+                moved_km = haversine_distance(last[0], last[1], latitude, longitude)
+                age = (now - last[2]).total_seconds()
+                if moved_km * 1000 < cfg['HEARTBEAT_MIN_DISTANCE_M'] and age < cfg['HEARTBEAT_MIN_INTERVAL']:
+                    return False
+
+            # Latest ping wins; older unflushed pings for the vendor are dropped
+            self._pending[vendor_id] = (latitude, longitude, now)
+            self._schedule()
+
+            due = (
+                len(self._pending) >= cfg['HEARTBEAT_BATCH_SIZE'] or
+                (now - self._last_flush).total_seconds() >= cfg['HEARTBEAT_FLUSH_INTERVAL']
+            )
+
+        if due:
+            self.flush(now)
+        return True
+
+    def flush(self, now=None):
+        """Writes every pending ping in one executemany UPDATE."""
+        now = now or datetime.utcnow()
+
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            self._last_flush = now
+
+        if not batch:
+            return 0
+
+        from app.models import VendorLocation, CHECKIN_DURATION
+
+        rows = [{
+            'b_vendor_id': vendor_id,
+            'b_latitude': lat,
+            'b_longitude': lon,
+            'b_seen_at': seen_at,
+            'b_auto_close_at': seen_at + CHECKIN_DURATION,
+            'b_now': now,
+        } for vendor_id, (lat, lon, seen_at) in batch.items()]
+
+        loc = VendorLocation.__table__
+        stmt = (
+            update(loc)
+            .where(loc.c.vendor_id == bindparam('b_vendor_id'))
+            # Pings never re-open a vendor that has closed or expired
+            .where(loc.c.is_open == True)
+            .where(loc.c.auto_close_at > bindparam('b_now'))
+            .values(
+                latitude=bindparam('b_latitude'),
+                longitude=bindparam('b_longitude'),
+                last_checkin=bindparam('b_seen_at'),
+                auto_close_at=bindparam('b_auto_close_at'),
+                updated_at=bindparam('b_now'),
+            )
+        )
+
+        try:
+            db.session.execute(stmt, rows)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Heartbeat Flush Error: {e}")
+            # Put the batch back unless a newer ping arrived meanwhile
+            with self._lock:
+                for vendor_id, ping in batch.items():
+                    self._pending.setdefault(vendor_id, ping)
+            return 0
+
+        with self._lock:
+            for vendor_id, (lat, lon, _) in batch.items():
+                self._persisted[vendor_id] = (lat, lon, now)
+
+        flushed = [{
+            'vendor_id': r['b_vendor_id'],
+            'latitude': r['b_latitude'],
+            'longitude': r['b_longitude'],
+            'auto_close_at': r['b_auto_close_at'],
+        } for r in rows]
+        for fn in self._listeners:
+            try:
+                fn(flushed)
+            except Exception as e:
+                print(f"Heartbeat Listener Error: {e}")
+
+        return len(rows)
+
+    def forget(self, vendor_id):
+        """Drops any state for a vendor (after a full check-in or close)."""
+        with self._lock:
+            self._pending.pop(vendor_id, None)
+            self._persisted.pop(vendor_id, None)
+
+    def clear(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending.clear()
+            self._persisted.clear()
+            self._last_flush = datetime.utcnow()
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+
+heartbeat_buffer = HeartbeatBuffer()
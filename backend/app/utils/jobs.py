@@ -0,0 +1,274 @@
+import os
+import socket
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from app.utils.sql import dialect_insert
+
+
+def make_owner_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+# ============================================================================
+# LEADER ELECTION
+# ============================================================================
+class AdvisoryLock:
+    """
+    Postgres session-level advisory lock held on a dedicated connection.
+    The lock lives as long as the connection, so a crashed leader releases
+    it automatically.
+    """
+
+    def __init__(self, engine, name):
+        self.engine = engine
+        self.key = zlib.crc32(name.encode())
+        self._conn = None
+
+    def acquire(self):
+        """Takes or confirms leadership. Safe to call on every loop."""
+        try:
+            if self._conn is not None:
+                # Probe the held connection, then end the implicit transaction
+                # so it doesn't sit "idle in transaction" between loops
+                self._conn.execute(text("SELECT 1"))
+                self._conn.commit()
+                return True
+            conn = self.engine.connect()
+            got = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {'key': self.key}).scalar()
+            conn.commit()
+            if got:
+                self._conn = conn
+                return True
+            conn.close()
+            return False
+        except Exception as e:
+            print(f"Leader Lock Error: {e}")
+            self._drop()
+            return False
+
+    def release(self):
+        if self._conn is not None:
+            try:
+                self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': self.key})
+                self._conn.commit()
+            except Exception:
+                pass
+        self._drop()
+
+    def _drop(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+
+
+class LeaseLock:
+    """
+    Lock-table stand-in for databases without advisory locks (SQLite).
+    The leader renews a row in scheduler_locks before its lease runs out; a
+    replica takes over once the lease has expired.
+    """
+
+    def __init__(self, engine, name, owner, ttl=30):
+        self.engine = engine
+        self.name = name
+        self.owner = owner
+        self.ttl = ttl
+
+    def acquire(self):
+        from app.models import SchedulerLock
+
+        table = SchedulerLock.__table__
+        now = datetime.utcnow()
+        stmt = dialect_insert(table, self.engine.dialect.name).values(
+            name=self.name, owner=self.owner, expires_at=now + timedelta(seconds=self.ttl)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={'owner': stmt.excluded.owner, 'expires_at': stmt.excluded.expires_at},
+            # Only renew our own lease or take over an expired one
+            where=(table.c.owner == self.owner) | (table.c.expires_at < now)
+        ).returning(table.c.owner)
+
+        try:
+            with self.engine.begin() as conn:
+                return conn.execute(stmt).scalar() == self.owner
+        except Exception as e:
+            print(f"Leader Lock Error: {e}")
+            return False
+
+    def release(self):
+        from app.models import SchedulerLock
+
+        table = SchedulerLock.__table__
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(table.delete().where(table.c.name == self.name, table.c.owner == self.owner))
+        except Exception:
+            pass
+
+
+def make_leader_lock(engine, name, owner, ttl=30):
+    if engine.dialect.name == 'postgresql':
+        return AdvisoryLock(engine, name)
+    return LeaseLock(engine, name, owner, ttl=ttl)
+
+
+# ============================================================================
+# JOBS
+# ============================================================================
+class Job:
+    """
+    A unit of scheduled work.
+
+    Periodic jobs run every `interval` seconds. Deadline jobs pass
+    `next_run`, a callable returning the datetime they next want to run
+    (e.g. the earliest auto_close_at), checked after every run.
+    """
+
+    def __init__(self, name, fn, interval=None, next_run=None, max_wait=60):
+        if (interval is None) == (next_run is None):
+            raise ValueError("A job needs exactly one of interval or next_run")
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.next_run = next_run
+        self.max_wait = max_wait
+        self.next_run_at = datetime.utcnow()
+        self._running = threading.Lock()
+        self.stats = {
+            'runs': 0,
+            'failures': 0,
+            'skipped_overlaps': 0,
+            'last_duration': None,
+            'max_duration': 0.0,
+            'total_duration': 0.0,
+            'last_started_at': None,
+            'last_error': None,
+        }
+
+    @property
+    def running(self):
+        return self._running.locked()
+
+    def _schedule_next(self, now):
+        if self.interval is not None:
+            self.next_run_at = now + timedelta(seconds=self.interval)
+            return
+        wanted = self.next_run()
+        ceiling = now + timedelta(seconds=self.max_wait)
+        self.next_run_at = min(wanted, ceiling) if wanted else ceiling
+
+    def run(self, app):
+        """Runs once inside an app context. Returns False if already running."""
+        if not self._running.acquire(blocking=False):
+            self.stats['skipped_overlaps'] += 1
+            return False
+        started = time.perf_counter()
+        self.stats['last_started_at'] = datetime.utcnow()
+        try:
+            with app.app_context():
+                try:
+                    self.fn()
+                except Exception as e:
+                    self.stats['failures'] += 1
+                    self.stats['last_error'] = str(e)
+                    print(f"Job '{self.name}' Error: {e}")
+                    from app.extensions import db
+                    db.session.rollback()
+                finally:
+                    self._schedule_next(datetime.utcnow())
+        finally:
+            duration = time.perf_counter() - started
+            self.stats['runs'] += 1
+            self.stats['last_duration'] = duration
+            self.stats['total_duration'] += duration
+            self.stats['max_duration'] = max(self.stats['max_duration'], duration)
+            self._running.release()
+        return True
+
+
+class JobRunner:
+    """
+    Runs registered jobs on the elected leader only. Each job runs on its own
+    worker thread, so a slow rollup never delays an auto-close deadline, and
+    a job that is still running is never started a second time.
+    """
+
+    def __init__(self, app, leader_lock, max_sleep=10):
+        self.app = app
+        self.leader_lock = leader_lock
+        self.max_sleep = max_sleep
+        self.jobs = {}
+        self.is_leader = False
+        self._executor = None
+
+    def add(self, job):
+        self.jobs[job.name] = job
+        return job
+
+    def run_pending(self, now=None, wait=False):
+        """Starts every job that is due. Returns the names started."""
+        now = now or datetime.utcnow()
+        self.is_leader = self.leader_lock.acquire()
+        if not self.is_leader:
+            return []
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=max(len(self.jobs), 1), thread_name_prefix='job')
+
+        started, futures = [], []
+        for job in self.jobs.values():
+            if job.next_run_at > now:
+                continue
+            if job.running:
+                job.stats['skipped_overlaps'] += 1
+                continue
+            futures.append(self._executor.submit(job.run, self.app))
+            started.append(job.name)
+
+        if wait:
+            for future in futures:
+                future.result()
+        return started
+
+    def seconds_until_next(self, now=None):
+        now = now or datetime.utcnow()
+        if not self.is_leader:
+            # Followers retry well inside the leader's lease
+            return self.max_sleep
+        pending = [job.next_run_at for job in self.jobs.values() if not job.running]
+        if not pending:
+            return self.max_sleep
+        delay = (min(pending) - now).total_seconds()
+        return min(max(delay, 0.05), self.max_sleep)
+
+    def run_forever(self):
+        try:
+            while True:
+                self.run_pending()
+                time.sleep(self.seconds_until_next())
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.leader_lock.release()
+
+    def metrics(self):
+        return {
+            'is_leader': self.is_leader,
+            'jobs': {
+                name: dict(job.stats, running=job.running, next_run_at=job.next_run_at)
+                for name, job in self.jobs.items()
+            }
+        }
@@ -0,0 +1,112 @@
+import dataclasses
+import json
+import math
+import re
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:     # optional: the stdlib encoder is used instead
+    orjson = None
+
+# orjson's float formatting differs from Python's repr in two places: Python
+# switches to exponent notation below 1e-4 ("1e-05" vs "0.00001") and writes
+# "1e+16" where orjson writes "1e16". Both are spotted in the output; hits
+# inside strings only cause a (correct) fallback. The exponent pattern starts
+# with a literal so the regex engine can skip ahead instead of trying every
+# digit, which kept it cheaper than the encode itself.
+#
+# orjson also writes NaN and +/-inf as null where the stdlib writes NaN and
+# Infinity. That can't be seen in the output, so when it holds a null the
+# object itself is searched for non-finite floats.
+_SMALL_FLOAT = b'0.0000'
+_EXPONENT = re.compile(rb'e[-+]?[0-9]')
+
+
+def _has_non_finite(obj):
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, float):
+            if not math.isfinite(item):
+                return True
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+        elif dataclasses.is_dataclass(item) and not isinstance(item, type):
+            stack.extend(getattr(item, f.name) for f in dataclasses.fields(item))
+    return False
+
+
+def _has_float_mismatch(data, obj):
+    if _SMALL_FLOAT in data:
+        return True
+    for match in _EXPONENT.finditer(data):
+        if data[match.start() - 1:match.start()].isdigit():
+            return True
+    return b'null' in data and _has_non_finite(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask's default JSON provider with orjson doing the encoding.
+
+    Output is byte-for-byte what DefaultJSONProvider produces: sorted keys,
+    compact separators (indent 2 in debug), ASCII-only with \\u escapes and
+    dates as HTTP dates. Anything orjson would render differently (non-ASCII
+    text, exponent or non-finite floats, non-string keys, huge ints, custom
+    dumps() arguments) is handed to the stdlib encoder, so the fast path
+    never changes a response.
+
+    Parsing stays on the stdlib: request bodies are small, and orjson reads
+    integers beyond 64 bits as floats.
+    """
+
+    def _orjson_options(self, indent):
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def _fast_dumps(self, obj, indent=None):
+        """UTF-8 bytes identical to the stdlib output, or None if orjson can't guarantee that."""
+        if orjson is None:
+            return None
+        try:
+            data = orjson.dumps(obj, default=self.default, option=self._orjson_options(indent))
+        except (TypeError, orjson.JSONEncodeError):
+            return None
+        if self.ensure_ascii and (not data.isascii() or b'\x7f' in data):
+            return None
+        if _has_float_mismatch(data, obj):
+            return None
+        return data
+
+    def _fast_args(self, kwargs):
+        """The indent to use if `kwargs` is a form orjson can reproduce, else False."""
+        if kwargs == {'separators': (',', ':')}:
+            return None
+        if kwargs == {'indent': 2}:
+            return 2
+        return False
+
+    def dumps(self, obj, **kwargs):
+        indent = self._fast_args(kwargs)
+        if indent is not False:
+            data = self._fast_dumps(obj, indent)
+            if data is not None:
+                return data.decode()
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+
+        data = self._fast_dumps(obj, indent)
+        if data is None:
+            dump_args = {'indent': indent} if indent else {'separators': (',', ':')}
+            data = super().dumps(obj, **dump_args).encode()
+        return self._app.response_class(data + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,305 @@
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels.get(n, '') for n in self.labelnames)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}' for key, v in items
+        ]
+
+
+class Gauge(_Metric):
+    """A gauge set directly, or read from `fn` (returning {label tuple: value}) at scrape time."""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), fn=None):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self.fn = fn
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self):
+        if self.fn is not None:
+            items = list(self.fn().items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return self.header() + [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}'
+            for key, v in items if v is not None
+        ]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._data = {}     # key -> [per-bucket counts..., +Inf count], sum
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                entry = self._data[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def count(self, **labels):
+        entry = self._data.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def render(self):
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._data.items()]
+        lines = self.header()
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound) if bound == float("inf") else bound}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric, replace=False):
+        with self._lock:
+            if replace:
+                self._metrics[metric.name] = metric
+                return metric
+            # Re-registering (e.g. a second app in the same process) returns the existing one
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        # Callback gauges are rebound to whoever registered last (e.g. a rebuilt job runner)
+        return self.register(Gauge(*args, **kwargs), replace=kwargs.get('fn') is not None)
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint.', ('endpoint', 'method', 'status'))
+RESPONSE_SIZE = registry.histogram(
+    'http_response_size_bytes', 'Response body size by endpoint.', ('endpoint',), buckets=SIZE_BUCKETS)
+REQUEST_QUERIES = registry.histogram(
+    'http_request_db_queries', 'SQL statements executed per request.', ('endpoint',), buckets=COUNT_BUCKETS)
+REQUEST_DB_TIME = registry.histogram(
+    'http_request_db_seconds', 'Time spent in SQL per request.', ('endpoint',))
+DB_QUERIES = registry.counter(
+    'db_queries_total', 'SQL statements executed, including outside requests.', ('engine',))
+DB_QUERY_TIME = registry.counter(
+    'db_query_seconds_total', 'Time spent executing SQL.', ('engine',))
+REQUEST_POOL_USAGE = registry.histogram(
+    'http_request_db_pool_usage', 'Share of the DB pool checked out when the request started.', ('endpoint',),
+    buckets=(0, 0.25, 0.5, 0.75, 0.9, 1.0))
+EXTERNAL_CALLS = registry.histogram(
+    'external_call_duration_seconds', 'Outbound calls to third-party services.', ('service', 'operation', 'outcome'))
+
+
+@contextmanager
+def external_call(service, operation):
+    """Times an outbound call (M-Pesa, Cloudinary, ...)."""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        EXTERNAL_CALLS.observe(time.perf_counter() - started, service=service, operation=operation, outcome=outcome)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_started', []).append(time.perf_counter())
+
+
+def _make_after_cursor_execute(engine_name):
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get('_query_started')
+        if not stack:
+            return
+        elapsed = time.perf_counter() - stack.pop()
+        DB_QUERIES.inc(engine=engine_name)
+        DB_QUERY_TIME.inc(elapsed, engine=engine_name)
+        if has_request_context() and '_metrics_started' in g:
+            g._metrics_queries += 1
+            g._metrics_db_time += elapsed
+    return _after_cursor_execute
+
+
+def serve_metrics(port, host='0.0.0.0'):
+    """Serves /metrics from a background thread, for processes without Flask routes (the scheduler)."""
+    from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+    def wsgi_app(environ, start_response):
+        if environ.get('PATH_INFO') != '/metrics':
+            start_response('404 Not Found', [('Content-Type', 'text/plain')])
+            return [b'not found\n']
+        body = registry.render().encode()
+        start_response('200 OK', [('Content-Type', 'text/plain; version=0.0.4'),
+                                  ('Content-Length', str(len(body)))])
+        return [body]
+
+    class _QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    server = make_server(host, port, wsgi_app, handler_class=_QuietHandler)
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
+
+
+def _pool_capacity(pool):
+    """(checked out, capacity) for pools that track it (QueuePool); None otherwise."""
+    if not hasattr(pool, 'checkedout') or not hasattr(pool, 'size'):
+        return None
+    capacity = pool.size() + max(getattr(pool, '_max_overflow', 0), 0)
+    return pool.checkedout(), capacity
+
+
+def _pool_gauges(engines):
+    def read(index):
+        values = {}
+        for name, engine in engines.items():
+            usage = _pool_capacity(engine.pool)
+            if usage is not None:
+                values[(name, )] = usage[index]
+        return values
+    registry.gauge('db_pool_checked_out', 'Connections currently checked out.', ('engine',), fn=lambda: read(0))
+    registry.gauge('db_pool_capacity', 'Pool size plus max overflow.', ('engine',), fn=lambda: read(1))
+
+
+def init_metrics(app):
+    """Installs request/SQL instrumentation and the /metrics endpoint."""
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    from app.extensions import db
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            if event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+                continue
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _make_after_cursor_execute(bind_key or 'default'))
+        engines = {bind_key or 'default': engine for bind_key, engine in db.engines.items()}
+    _pool_gauges(engines)
+    default_pool = engines['default'].pool
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+        g._metrics_queries = 0
+        g._metrics_db_time = 0.0
+        usage = _pool_capacity(default_pool)
+        g._metrics_pool_usage = usage[0] / usage[1] if usage and usage[1] else None
+
+    @app.after_request
+    def _record(response):
+        # Popped: `g` outlives the request when an app context is already pushed
+        started = g.pop('_metrics_started', None)
+        if started is None:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint,
+                                method=request.method, status=str(response.status_code))
+        REQUEST_QUERIES.observe(g._metrics_queries, endpoint=endpoint)
+        REQUEST_DB_TIME.observe(g._metrics_db_time, endpoint=endpoint)
+        if g._metrics_pool_usage is not None:
+            REQUEST_POOL_USAGE.observe(g._metrics_pool_usage, endpoint=endpoint)
+        if not response.is_streamed:
+            RESPONSE_SIZE.observe(response.calculate_content_length() or 0, endpoint=endpoint)
+        return response
+
+    def metrics_view():
+        token = current_app.config['METRICS_TOKEN']
+        if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return Response('unauthorized\n', status=401, mimetype='text/plain')
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
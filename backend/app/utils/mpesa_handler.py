@@ -1,8 +1,11 @@
 import os
-import requests
 import base64
+import threading
+import time
 from datetime import datetime
 import json
+from flask import current_app, has_app_context
+from app.utils.metrics import external_call
 
 class MpesaHandler:
     def __init__(self):
@@ -10,23 +13,69 @@ class MpesaHandler:
         self.consumer_secret = os.getenv('MPESA_CONSUMER_SECRET')
         self.shortcode = os.getenv('MPESA_SHORTCODE')
         self.passkey = os.getenv('MPESA_PASSKEY')
-        self.base_url = 'https://sandbox.safaricom.co.ke'
+        # Point at a local Daraja stand-in for load tests (see benchmarks/daraja_stub.py)
+        self.base_url = os.getenv('MPESA_BASE_URL', 'https://sandbox.safaricom.co.ke').rstrip('/')
+        # (connect, read): an unreachable host fails fast, a slow STK push doesn't
+        self.timeout = (float(os.getenv('MPESA_CONNECT_TIMEOUT', 5)), float(os.getenv('MPESA_TIMEOUT', 30)))
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._token = None
+        self._token_expires = 0.0
+        self._token_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """
+        requests.Session shared by every worker thread: its pool keeps
+        connections to Safaricom alive, so a payment skips the TLS handshake.
+        """
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            with self._session_lock:
+                if self._session is None:
+                    max_connections = current_app.config['EXTERNAL_HTTP_MAX_CONNECTIONS'] if has_app_context() else 100
+                    session = requests.Session()
+                    session.mount('https://', HTTPAdapter(pool_maxsize=max_connections))
+                    session.mount('http://', HTTPAdapter(pool_maxsize=max_connections))
+                    self._session = session
+        return self._session
+
+    # --- OAuth: tokens last an hour, so fetch one per hour, not per payment ---
+    def _cached_token(self):
+        if self._token and time.monotonic() < self._token_expires:
+            return self._token
+        return None
+
+    def _store_token(self, data):
+        with self._token_lock:
+            self._token = data['access_token']
+            # Renew a minute early so a token never expires mid-request
+            self._token_expires = time.monotonic() + int(data.get('expires_in', 3599)) - 60
+        return self._token
+
+    def _drop_token(self):
+        with self._token_lock:
+            self._token = None
 
     def get_access_token(self):
+        token = self._cached_token()
+        if token:
+            return token
         url = f'{self.base_url}/oauth/v1/generate?grant_type=client_credentials'
         try:
-            response = requests.get(url, auth=(self.consumer_key, self.consumer_secret))
-            response.raise_for_status()
-            return response.json()['access_token']
+            with external_call('mpesa', 'oauth'):
+                response = self.session.get(url, auth=(self.consumer_key, self.consumer_secret), timeout=self.timeout)
+                response.raise_for_status()
+            return self._store_token(response.json())
         except Exception as e:
             print(f"Error generating token: {e}")
             return None
 
-    def initiate_stk_push(self, phone_number, amount, account_reference, transaction_desc):
-        access_token = self.get_access_token()
-        if not access_token:
-            return {'ResponseCode': '1', 'errorMessage': 'Auth Failed'}
-
+    # --- STK push ---
+    def _stk_request(self, access_token, phone_number, amount, account_reference, transaction_desc):
+        """(url, headers, payload) for a processrequest call."""
         timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
         password = base64.b64encode(f"{self.shortcode}{self.passkey}{timestamp}".encode()).decode('utf-8')
         
@@ -47,9 +96,19 @@ class MpesaHandler:
             "AccountReference": account_reference[:12],
             "TransactionDesc": transaction_desc[:12]
         }
+        return f'{self.base_url}/mpesa/stkpush/v1/processrequest', headers, payload
+
+    def initiate_stk_push(self, phone_number, amount, account_reference, transaction_desc):
+        access_token = self.get_access_token()
+        if not access_token:
+            return {'ResponseCode': '1', 'errorMessage': 'Auth Failed'}
 
+        url, headers, payload = self._stk_request(access_token, phone_number, amount, account_reference, transaction_desc)
         try:
-            response = requests.post(f'{self.base_url}/mpesa/stkpush/v1/processrequest', json=payload, headers=headers)
+            with external_call('mpesa', 'stk_push'):
+                response = self.session.post(url, json=payload, headers=headers, timeout=self.timeout)
+            if response.status_code == 401:
+                self._drop_token()
             return response.json()
         except Exception as e:
             return {'errorMessage': str(e)}
@@ -67,4 +126,11 @@ class MpesaHandler:
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
-mpesa_handler = MpesaHandler()
\ No newline at end of file
+_handler = None
+
+def get_mpesa_handler():
+    """The shared handler, created on first use (after config and env are loaded)."""
+    global _handler
+    if _handler is None:
+        _handler = MpesaHandler()
+    return _handler
\ No newline at end of file
@@ -0,0 +1,50 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashPoolBusy(Exception):
+    """Raised when too many password hashes are already queued."""
+
+
+_executor = None
+_slots = None
+_init_lock = threading.Lock()
+
+
+def _pool():
+    """Lazily builds the per-process KDF pool from config."""
+    global _executor, _slots
+    if _executor is None:
+        with _init_lock:
+            if _executor is None:
+                cfg = current_app.config
+                workers = cfg['PASSWORD_HASH_WORKERS']
+                _slots = threading.BoundedSemaphore(workers + cfg['PASSWORD_HASH_QUEUE'])
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='kdf')
+    return _executor, _slots
+
+
+def _run(fn, *args):
+    """
+    Runs one KDF call on the bounded pool. At most PASSWORD_HASH_WORKERS
+    hashes run at once, so a burst of logins can't take every core (or, for
+    scrypt, lots of memory) away from search traffic. Callers beyond the
+    queue limit get HashPoolBusy instead of piling up.
+    """
+    executor, slots = _pool()
+    if not slots.acquire(timeout=current_app.config['PASSWORD_HASH_TIMEOUT']):
+        raise HashPoolBusy()
+    try:
+        return executor.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def verify_password(password_hash, password):
+    return _run(check_password_hash, password_hash, password)
@@ -0,0 +1,127 @@
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from flask import current_app, g, request
+from flask_jwt_extended import decode_token
+from app.utils.user_cache import is_revoked
+
+PROFILE_SUFFIX = '.pstats'
+_NAME_RE = re.compile(r'^[\w.-]+\.pstats$')
+_ring_lock = threading.Lock()
+
+
+def profile_dir(app=None):
+    app = app or current_app
+    return app.config['PROFILE_DIR'] or os.path.join(app.instance_path, 'profiles')
+
+
+def is_valid_name(name):
+    return bool(_NAME_RE.match(name)) and '..' not in name
+
+
+def _admin_signed():
+    """True if the request carries a valid, unrevoked admin token in PROFILE_HEADER."""
+    token = request.headers.get(current_app.config['PROFILE_HEADER'])
+    if not token:
+        return False
+    try:
+        claims = decode_token(token)
+    except Exception:
+        return False
+    return claims.get('role') == 'admin' and not is_revoked(claims['sub'], claims.get('iat'))
+
+
+def should_profile():
+    cfg = current_app.config
+    if request.endpoint in (None, 'static') or request.method == 'OPTIONS':
+        return False
+    if _admin_signed():
+        return True
+    rate = cfg['PROFILE_SAMPLE_RATE']
+    return rate > 0 and random.random() < rate
+
+
+def list_profiles(app=None):
+    directory = profile_dir(app)
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not is_valid_name(name):
+            continue
+        stat = os.stat(os.path.join(directory, name))
+        millis, _, endpoint = name[:-len(PROFILE_SUFFIX)].rpartition('-')[0].partition('-')
+        profiles.append({
+            'name': name,
+            'endpoint': endpoint,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(int(millis) / 1000)) if millis.isdigit() else None,
+            'size': stat.st_size,
+        })
+    return profiles
+
+
+def render_profile(path, sort='cumulative', limit=50):
+    """Text summary of a pstats file (top `limit` functions)."""
+    out = io.StringIO()
+    pstats.Stats(path, stream=out).sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def _trim_ring(directory, max_files):
+    names = sorted(n for n in os.listdir(directory) if is_valid_name(n))
+    for name in names[:max(len(names) - max_files, 0)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+
+def init_profiling(app):
+    """
+    Runs selected requests under cProfile and keeps the last PROFILE_MAX_FILES
+    results in PROFILE_DIR. A request is profiled when it carries an admin
+    token in PROFILE_HEADER, or at random with PROFILE_SAMPLE_RATE.
+    """
+    if not app.config['PROFILE_ENABLED']:
+        return
+
+    @app.before_request
+    def _start_profile():
+        if not should_profile():
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread
+            return
+        safe_endpoint = re.sub(r'[^\w.]', '_', request.endpoint)
+        g._profiler = profiler
+        g._profile_name = f"{int(time.time() * 1000)}-{safe_endpoint}-{uuid.uuid4().hex[:6]}{PROFILE_SUFFIX}"
+
+    @app.after_request
+    def _tag_profile(response):
+        if g.get('_profiler') is not None:
+            response.headers['X-Profile-Id'] = g._profile_name
+        return response
+
+    @app.teardown_request
+    def _save_profile(exc):
+        profiler = g.pop('_profiler', None)
+        if profiler is None:
+            return
+        profiler.disable()
+        try:
+            directory = profile_dir(app)
+            os.makedirs(directory, exist_ok=True)
+            profiler.dump_stats(os.path.join(directory, g._profile_name))
+            with _ring_lock:
+                _trim_ring(directory, app.config['PROFILE_MAX_FILES'])
+        except Exception as e:
+            print(f"Profiling Error: {e}")
@@ -0,0 +1,201 @@
+import math
+import random
+import re
+import threading
+import time
+from flask import current_app, jsonify, request
+from sqlalchemy import select
+from app.utils.sql import dialect_insert
+
+_UNITS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+_LIMIT_RE = re.compile(r'(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?')
+
+
+def parse_limit(value):
+    """'60/minute' -> (60, 60); '10/5seconds' -> (10, 5)."""
+    match = _LIMIT_RE.fullmatch(value.strip())
+    if not match:
+        raise ValueError(f"Invalid rate limit: {value!r}")
+    count, multiplier, unit = match.groups()
+    return int(count), int(multiplier or 1) * _UNITS[unit]
+
+
+def _headroom(prev, elapsed, window, limit):
+    """
+    Sliding-window counter: the previous window counts weighted by how much
+    of it still overlaps. Returns how many hits the current window may
+    already hold for one more to be allowed.
+    """
+    return math.floor(limit - 1 - prev * (window - elapsed) / window)
+
+
+def _retry_after(prev, curr, elapsed, window, limit):
+    """Seconds until one more hit fits, given `curr` counted (allowed) hits."""
+    if curr + 1 > limit:
+        # Not before this window ends, then until enough of it has slid out
+        needed = window - elapsed + (window * (curr - limit + 1) / curr if curr else window)
+    else:
+        # Wait until enough of the previous window has slid out
+        needed = window * (prev - limit + curr + 1) / prev - elapsed
+    return max(1, math.ceil(needed))
+
+
+class MemoryStore:
+    """
+    Per-process sliding-window counters. The default backend. Only allowed
+    hits are counted, so a client retrying while limited doesn't push its
+    own block further out.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._counters = {}     # key -> [window_start, curr, prev]
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window, now=None):
+        now = now or time.time()
+        start = int(now // window) * window
+
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is None:
+                entry = self._counters[key] = [start, 0, 0]
+                if len(self._counters) > self.max_keys:
+                    self._prune(now)
+            elif entry[0] != start:
+                # Roll forward; the old window only counts if it was the previous one
+                entry[2] = entry[1] if start - entry[0] == window else 0
+                entry[0], entry[1] = start, 0
+
+            elapsed = now - start
+            if entry[1] <= _headroom(entry[2], elapsed, window, limit):
+                entry[1] += 1
+                return True, 0
+            return False, _retry_after(entry[2], entry[1], elapsed, window, limit)
+
+    def _prune(self, now):
+        stale = [k for k, (start, _, _) in self._counters.items() if now - start > 3600]
+        for key in stale:
+            del self._counters[key]
+
+
+class DatabaseStore:
+    """
+    Sliding-window counters in the rate_limit_counters table, shared by every
+    worker. Uses its own short transaction, separate from the request
+    session. The increment is conditional on the current count, so only
+    allowed hits are counted and concurrent workers can't overshoot.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def hit(self, key, limit, window, now=None):
+        from app.models import RateLimitCounter
+
+        now = now or time.time()
+        start = int(now // window) * window
+        elapsed = now - start
+        table = RateLimitCounter.__table__
+
+        with self.engine.begin() as conn:
+            prev = conn.execute(
+                select(table.c.count).where(table.c.key == key, table.c.window_start == start - window)
+            ).scalar() or 0
+            headroom = _headroom(prev, elapsed, window, limit)
+
+            curr = None
+            if headroom >= 0:
+                stmt = dialect_insert(table, self.engine.dialect.name).values(key=key, window_start=start, count=1)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[table.c.key, table.c.window_start],
+                    set_={'count': table.c.count + 1},
+                    where=table.c.count <= headroom
+                ).returning(table.c.count)
+                curr = conn.execute(stmt).scalar()
+            if curr is None:
+                # Rejected: nothing written, read the count for Retry-After
+                curr = conn.execute(
+                    select(table.c.count).where(table.c.key == key, table.c.window_start == start)
+                ).scalar() or 0
+                return False, _retry_after(prev, curr, elapsed, window, limit)
+
+            # Occasionally sweep windows nobody will read again
+            if random.random() < 0.01:
+                conn.execute(table.delete().where(table.c.window_start < start - window))
+
+        return True, 0
+
+
+class RateLimiter:
+    """
+    Per-IP and per-route limits checked before each request.
+
+    RATE_LIMIT_PER_IP caps one client across every route of the public
+    customer blueprint; RATE_LIMITS adds tighter caps for individual
+    endpoints. Endpoints in RATE_LIMIT_EXEMPT are never limited. Each
+    (rule, client) pair gets its own counter.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config['RATE_LIMIT_STORAGE']
+        if backend == 'database':
+            from app.extensions import db
+            with app.app_context():
+                store = DatabaseStore(db.engine)
+        elif backend == 'memory':
+            store = MemoryStore()
+        else:
+            raise ValueError(f"Unknown RATE_LIMIT_STORAGE: {backend}")
+
+        app.extensions['rate_limiter'] = store
+        app.before_request(self.check)
+
+    @property
+    def store(self):
+        return current_app.extensions['rate_limiter']
+
+    def client_ip(self):
+        if current_app.config['RATE_LIMIT_TRUST_PROXY'] and request.access_route:
+            return request.access_route[0]
+        return request.remote_addr or 'unknown'
+
+    def rules_for(self, endpoint, blueprint):
+        cfg = current_app.config
+        if endpoint in cfg['RATE_LIMIT_EXEMPT']:
+            return []
+        rules = []
+        if blueprint == 'customer' and cfg.get('RATE_LIMIT_PER_IP'):
+            rules.append(('ip', cfg['RATE_LIMIT_PER_IP']))
+        if endpoint in cfg['RATE_LIMITS']:
+            rules.append((endpoint, cfg['RATE_LIMITS'][endpoint]))
+        return rules
+
+    def check(self):
+        cfg = current_app.config
+        if not cfg['RATE_LIMIT_ENABLED'] or request.method == 'OPTIONS' or not request.endpoint:
+            return None
+
+        rules = self.rules_for(request.endpoint, request.blueprint)
+        if not rules:
+            return None
+
+        ip = self.client_ip()
+        for scope, rule in rules:
+            limit, window = parse_limit(rule)
+            try:
+                allowed, retry_after = self.store.hit(f"{scope}:{ip}", limit, window)
+            except Exception as e:
+                # Fail open: a broken limiter backend must not take the API down
+                print(f"Rate Limit Error: {e}")
+                return None
+            if not allowed:
+                response = jsonify({'error': 'Too many requests', 'retry_after': retry_after})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(retry_after)
+                return response
+        return None
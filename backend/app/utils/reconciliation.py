@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from app.extensions import db
+from app.models import Order, Transaction
+
+
+def expire_pending_payments(timeout_seconds, session=None, now=None):
+    """
+    Marks STK pushes that never got a callback as failed, so customers stop
+    polling and the order leaves 'Pending Payment'. A late callback still
+    wins: mpesa_callback looks the transaction up by CheckoutRequestID and
+    overwrites the status.
+
+    Returns the number of transactions expired.
+    """
+    session = session or db.session
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(seconds=timeout_seconds)
+
+    t = Transaction.__table__
+    o = Order.__table__
+
+    expired = session.execute(
+        update(t)
+        .where(t.c.status == 'PENDING', t.c.created_at < cutoff)
+        .values(status='FAILED', updated_at=now)
+    ).rowcount
+
+    session.execute(
+        update(o)
+        .where(o.c.status == 'Pending Payment', o.c.created_at < cutoff)
+        .values(status='Payment Failed')
+    )
+    session.commit()
+    return expired
@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, select, tuple_, update
+from app.extensions import db
+from app.models import Transaction, TransactionRollup, RollupWatermark, SUCCESS_STATUSES
+from app.utils.sql import dialect_insert
+
+WATERMARK_NAME = 'transactions'
+GRANULARITIES = ('hour', 'day')
+COUNTERS = ('txn_count', 'amount_sum', 'success_count', 'success_amount', 'failure_count')
+
+
+def bucket_start(ts, granularity):
+    if granularity == 'hour':
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def is_successful(status, receipt):
+    raw_status = str(status).upper() if status else 'FAILED'
+    return raw_status in SUCCESS_STATUSES or bool(receipt and raw_status != 'FAILED')
+
+
+def _upsert_buckets(session, buckets):
+    table = TransactionRollup.__table__
+    rows = [
+        dict(vendor_id=vendor_id, granularity=granularity, bucket_start=start, **counters)
+        for (vendor_id, granularity, start), counters in buckets.items()
+    ]
+
+    stmt = dialect_insert(table, session.get_bind().dialect.name)
+    if stmt is None:
+        for row in rows:
+            existing = TransactionRollup.query.filter_by(
+                vendor_id=row['vendor_id'], granularity=row['granularity'], bucket_start=row['bucket_start']
+            ).first()
+            if not existing:
+                session.add(TransactionRollup(**row))
+                continue
+            for key in COUNTERS:
+                setattr(existing, key, getattr(existing, key) + row[key])
+        return
+
+    # Additive upsert: a bucket already on disk gets this batch's deltas added
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.vendor_id, table.c.granularity, table.c.bucket_start],
+        set_={key: table.c[key] + stmt.excluded[key] for key in COUNTERS}
+    )
+    session.execute(stmt, rows)
+
+
+def refresh_rollups(session=None, batch_size=5000, settle_seconds=5, now=None):
+    """
+    Folds transactions that reached a final state since the watermark into
+    the hourly and daily rollups. Each batch and the watermark move commit
+    together, so a crash never double counts.
+
+    PENDING transactions are skipped; they are picked up once the callback
+    moves them (updated_at changes). Rows younger than `settle_seconds` are
+    left for the next run so late-committing writers aren't skipped.
+
+    What each transaction added is recorded on its row (rolled_*). When a
+    counted row changes again (a late success after expiry, a repeated
+    callback moving transaction_date) that contribution is taken back out
+    before the new one goes in.
+
+    Returns the number of transactions processed.
+    """
+    session = session or db.session
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(seconds=settle_seconds)
+
+    watermark = session.get(RollupWatermark, WATERMARK_NAME)
+    if watermark is None:
+        watermark = RollupWatermark(name=WATERMARK_NAME, last_updated_at=datetime(1970, 1, 1), last_id=0)
+        session.add(watermark)
+        session.flush()
+
+    t = Transaction.__table__
+    processed = 0
+
+    while True:
+        rows = session.execute(
+            select(t.c.id, t.c.vendor_id, t.c.amount, t.c.status, t.c.mpesa_receipt_number,
+                   t.c.transaction_date, t.c.created_at, t.c.updated_at,
+                   t.c.rolled_bucket_at, t.c.rolled_amount, t.c.rolled_success)
+            .where(tuple_(t.c.updated_at, t.c.id) > tuple_(watermark.last_updated_at, watermark.last_id))
+            .where(t.c.updated_at <= cutoff)
+            .order_by(t.c.updated_at, t.c.id)
+            .limit(batch_size)
+        ).all()
+
+        if not rows:
+            break
+
+        buckets = {}
+
+        def fold(vendor_id, ts, amount, success, sign):
+            for granularity in GRANULARITIES:
+                key = (vendor_id, granularity, bucket_start(ts, granularity))
+                counters = buckets.setdefault(key, dict.fromkeys(COUNTERS, 0))
+                counters['txn_count'] += sign
+                counters['amount_sum'] += sign * amount
+                if success:
+                    counters['success_count'] += sign
+                    counters['success_amount'] += sign * amount
+                else:
+                    counters['failure_count'] += sign
+
+        contributions = []
+        for row in rows:
+            if row.rolled_bucket_at is not None:
+                fold(row.vendor_id, row.rolled_bucket_at, row.rolled_amount, row.rolled_success, -1)
+            if row.status and row.status.upper() == 'PENDING':
+                if row.rolled_bucket_at is not None:
+                    contributions.append({'r_id': row.id, 'r_bucket_at': None, 'r_amount': None, 'r_success': None})
+                continue
+            ts = row.transaction_date or row.created_at or row.updated_at
+            success = is_successful(row.status, row.mpesa_receipt_number)
+            amount = row.amount or 0
+            fold(row.vendor_id, ts, amount, success, 1)
+            contributions.append({'r_id': row.id, 'r_bucket_at': ts, 'r_amount': amount, 'r_success': success})
+
+        if buckets:
+            _upsert_buckets(session, buckets)
+        if contributions:
+            # updated_at is kept as is: this bookkeeping must not move the row past the watermark again
+            session.execute(
+                update(t).where(t.c.id == bindparam('r_id')).values(
+                    rolled_bucket_at=bindparam('r_bucket_at'), rolled_amount=bindparam('r_amount'),
+                    rolled_success=bindparam('r_success'), updated_at=t.c.updated_at),
+                contributions
+            )
+
+        watermark.last_updated_at = rows[-1].updated_at
+        watermark.last_id = rows[-1].id
+        session.commit()
+
+        processed += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    session.commit()
+    return processed
@@ -0,0 +1,90 @@
+import weakref
+from sqlalchemy import Integer, text
+
+# SQLite: external-content FTS5 table over vendor_locations.search_text.
+# The trigram tokenizer indexes substrings, so "samo" finds "samosa" just
+# like the LIKE '%samo%' the Postgres trigram index serves.
+FTS_TABLE = 'vendor_search'
+# Trigram indexes need at least one full trigram to narrow anything down
+MIN_INDEXED_LENGTH = 3
+
+SQLITE_FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"search_text, content='vendor_locations', content_rowid='id', tokenize='trigram')",
+    f"""CREATE TRIGGER IF NOT EXISTS vendor_search_ai AFTER INSERT ON vendor_locations BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS vendor_search_ad AFTER DELETE ON vendor_locations BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS vendor_search_au AFTER UPDATE OF search_text ON vendor_locations BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+        INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+    # Index whatever is already in the table (a re-created FTS table starts empty)
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+_fts_available = weakref.WeakKeyDictionary()     # engine -> bool
+
+
+def menu_search_text(menu_items):
+    """
+    Lowercased names and descriptions of a menu, one per line, or None for a
+    menu with nothing searchable. Items are matched by substring, exactly
+    like the old in-Python walk over menu_items.
+    """
+    if not isinstance(menu_items, list):
+        return None
+    parts = []
+    for entry in menu_items:
+        if isinstance(entry, dict):
+            parts.append(str(entry.get('name') or '').lower())
+            parts.append(str(entry.get('desc') or '').lower())
+        elif isinstance(entry, str):
+            parts.append(entry.lower())
+    return '\n'.join(parts) if parts else None
+
+
+def create_sqlite_fts(target, connection, **kw):
+    """after_create hook: the FTS table and its sync triggers, where SQLite has FTS5 trigram support."""
+    if connection.dialect.name != 'sqlite':
+        return
+    try:
+        for statement in SQLITE_FTS_DDL:
+            connection.exec_driver_sql(statement)
+    except Exception as e:
+        # Old SQLite without FTS5/trigram: search falls back to LIKE
+        print(f"Search Index Error: {e}")
+
+
+def drop_sqlite_fts(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def has_fts(connection):
+    engine = connection.engine
+    available = _fts_available.get(engine)
+    if available is None:
+        available = _fts_available[engine] = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE, )
+        ).first() is not None
+    return available
+
+
+def item_filter(column, id_column, item, connection):
+    """
+    WHERE clause matching menus that mention `item` (already lowercased).
+    Postgres serves LIKE '%item%' from the pg_trgm GIN index; SQLite goes
+    through the FTS5 trigram table. Short terms can't use either index and
+    fall back to a plain LIKE.
+    """
+    if not item:
+        return column.isnot(None)
+    dialect = connection.dialect.name
+    if dialect == 'sqlite' and len(item) >= MIN_INDEXED_LENGTH and has_fts(connection):
+        phrase = '"' + item.replace('"', '""') + '"'
+        matches = text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :search_phrase")
+        return id_column.in_(matches.bindparams(search_phrase=phrase).columns(rowid=Integer))
+    return column.contains(item, autoescape=True)
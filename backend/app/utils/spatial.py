@@ -0,0 +1,162 @@
+import weakref
+from flask import current_app
+from sqlalchemy import Integer, cast, func, literal_column, text
+from sqlalchemy.types import UserDefinedType
+from app.utils.geospatial import bounding_box, haversine_distance
+
+RTREE_TABLE = 'vendor_location_rtree'
+
+# SQLite: an R*Tree of vendor points (zero-size boxes), kept in sync by triggers
+SQLITE_RTREE_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE_TABLE} USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+    f"""CREATE TRIGGER IF NOT EXISTS vendor_location_rtree_ai AFTER INSERT ON vendor_locations BEGIN
+        INSERT INTO {RTREE_TABLE} VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+    END""",
+    # Plain UPDATE: an OR REPLACE here would be overridden by the outer
+    # statement's conflict handling (the check-in upsert)
+    f"""CREATE TRIGGER IF NOT EXISTS vendor_location_rtree_au AFTER UPDATE OF latitude, longitude ON vendor_locations BEGIN
+        UPDATE {RTREE_TABLE} SET min_lat = new.latitude, max_lat = new.latitude,
+            min_lon = new.longitude, max_lon = new.longitude WHERE id = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS vendor_location_rtree_ad AFTER DELETE ON vendor_locations BEGIN
+        DELETE FROM {RTREE_TABLE} WHERE id = old.id;
+    END""",
+    f"INSERT OR REPLACE INTO {RTREE_TABLE} SELECT id, latitude, latitude, longitude, longitude FROM vendor_locations",
+]
+
+# Postgres: a generated geography column, so every write path (ORM, Core
+# upserts, heartbeats, COPY) keeps it current without app code
+POSTGIS_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS postgis",
+    "ALTER TABLE vendor_locations ADD COLUMN IF NOT EXISTS geog geography(Point, 4326) "
+    "GENERATED ALWAYS AS (ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography) STORED",
+    "CREATE INDEX IF NOT EXISTS idx_location_geog ON vendor_locations USING gist (geog)",
+]
+
+_detected = weakref.WeakKeyDictionary()     # engine -> backend name
+
+
+class Geography(UserDefinedType):
+    cache_ok = True
+
+    def get_col_spec(self, **kw):
+        return 'geography(Point, 4326)'
+
+
+class PythonBackend:
+    """
+    The fallback: a bounding box on the latitude/longitude indexes narrows
+    the rows, then haversine_distance does the exact check.
+    """
+    name = 'python'
+
+    def candidates(self, query, lat, lon, radius_km):
+        from app.models import VendorLocation
+
+        south, west, north, east = bounding_box(lat, lon, radius_km)
+        return query.filter(VendorLocation.latitude.between(south, north),
+                            VendorLocation.longitude.between(west, east))
+
+    def nearby(self, query, lat, lon, radius_km):
+        results = []
+        for location in self.candidates(query, lat, lon, radius_km):
+            distance = haversine_distance(lat, lon, location.latitude, location.longitude)
+            if distance <= radius_km:
+                results.append((location, distance))
+        results.sort(key=lambda pair: pair[1])
+        return results
+
+
+class RTreeBackend(PythonBackend):
+    """SQLite: the bounding box is answered by the R*Tree instead of two B-tree ranges."""
+    name = 'rtree'
+
+    def candidates(self, query, lat, lon, radius_km):
+        from app.models import VendorLocation
+
+        south, west, north, east = bounding_box(lat, lon, radius_km)
+        ids = text(
+            f"SELECT id FROM {RTREE_TABLE} WHERE max_lat >= :box_south AND min_lat <= :box_north "
+            "AND max_lon >= :box_west AND min_lon <= :box_east"
+        ).bindparams(box_south=south, box_north=north, box_west=west, box_east=east).columns(id=Integer)
+        return query.filter(VendorLocation.id.in_(ids))
+
+
+class PostGISBackend:
+    """Postgres + PostGIS: ST_DWithin on the GiST-indexed geography, nearest first via KNN <->."""
+    name = 'postgis'
+
+    def within(self, query, lat, lon, radius_km):
+        """`query` narrowed to radius_km, ordered nearest first, with the distance in metres added."""
+        geog = literal_column('vendor_locations.geog')
+        point = cast(func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326), Geography())
+        return (
+            query.filter(func.ST_DWithin(geog, point, radius_km * 1000))
+            .add_columns(func.ST_Distance(geog, point))
+            .order_by(geog.op('<->')(point))
+        )
+
+    def nearby(self, query, lat, lon, radius_km):
+        return [(location, meters / 1000) for location, meters in self.within(query, lat, lon, radius_km)]
+
+
+BACKENDS = {backend.name: backend for backend in (PostGISBackend(), RTreeBackend(), PythonBackend())}
+
+
+def detect_backend(connection):
+    """The best backend the connected database has been set up for."""
+    engine = connection.engine
+    name = _detected.get(engine)
+    if name is None:
+        name = 'python'
+        if connection.dialect.name == 'postgresql':
+            found = connection.exec_driver_sql(
+                "SELECT 1 FROM information_schema.columns WHERE table_name = 'vendor_locations' AND column_name = 'geog'"
+            ).first()
+            if found:
+                name = 'postgis'
+        elif connection.dialect.name == 'sqlite':
+            found = connection.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (RTREE_TABLE, )
+            ).first()
+            if found:
+                name = 'rtree'
+        _detected[engine] = name
+    return name
+
+
+def find_nearby(query, lat, lon, radius_km):
+    """
+    [(VendorLocation, distance_km)] for the rows of `query` within
+    radius_km of (lat, lon), nearest first. SPATIAL_BACKEND picks the
+    implementation ('auto' uses PostGIS or the R*Tree when the schema has
+    them, else the Python fallback).
+    """
+    name = current_app.config['SPATIAL_BACKEND']
+    if name == 'auto':
+        name = detect_backend(query.session.connection())
+    return BACKENDS[name].nearby(query, lat, lon, radius_km)
+
+
+def create_spatial_index(target, connection, **kw):
+    """after_create hook: the R*Tree on SQLite, the geography column on Postgres when PostGIS is installable."""
+    if connection.dialect.name == 'sqlite':
+        statements = SQLITE_RTREE_DDL
+    elif connection.dialect.name == 'postgresql' and connection.exec_driver_sql(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'postgis'").first():
+        statements = POSTGIS_DDL
+    else:
+        return
+    try:
+        # A savepoint, so a failure (e.g. no CREATE EXTENSION rights) doesn't abort create_all
+        with connection.begin_nested():
+            for statement in statements:
+                connection.exec_driver_sql(statement)
+    except Exception as e:
+        # Without the index the Python fallback is used
+        print(f"Spatial Index Error: {e}")
+
+
+def drop_spatial_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {RTREE_TABLE}")
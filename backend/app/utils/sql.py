@@ -0,0 +1,13 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def dialect_insert(table, dialect_name):
+    """
+    Returns an INSERT construct that supports ON CONFLICT for the given
+    dialect, or None when the backend has no native upsert.
+    """
+    if dialect_name == 'postgresql':
+        return postgresql.insert(table)
+    if dialect_name == 'sqlite':
+        return sqlite.insert(table)
+    return None
@@ -0,0 +1,188 @@
+import threading
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.utils.cache import TTLCache
+from app.utils.sql import dialect_insert
+
+# Short-lived snapshots of user rows for the rare paths that need fresh data
+user_cache = TTLCache(maxsize=10000, ttl=60)
+
+USER_FIELDS = ('id', 'username', 'email', 'phone_number', 'role', 'business_name', 'storefront_image_url')
+# Changes that must end the user's existing tokens, not just refresh the snapshot
+REVOKING_FIELDS = ('role', 'password_hash')
+
+_PENDING_KEY = 'user_cache_pending'
+
+
+def get_user(user_id):
+    """
+    Returns a dict snapshot of the user (or None), served from the cache
+    for USER_CACHE_TTL seconds.
+    """
+    user_id = int(user_id)
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        return snapshot or None
+
+    from app.models import User
+    u = User.__table__
+    row = db.session.execute(
+        select(*[u.c[f] for f in USER_FIELDS]).where(u.c.id == user_id)
+    ).first()
+    snapshot = dict(row._mapping) if row else {}
+    user_cache.set(user_id, snapshot, ttl=current_app.config['USER_CACHE_TTL'])
+    return snapshot or None
+
+
+class MemoryRevocations:
+    """Per-process revocations. The default backend."""
+
+    def __init__(self):
+        self._revoked = {}   # user_id -> unix time of revocation
+        self._lock = threading.Lock()
+
+    def revoke(self, user_id, revoked_at):
+        self._remember(user_id, revoked_at)
+
+    def _remember(self, user_id, revoked_at):
+        with self._lock:
+            self._revoked[user_id] = max(revoked_at, self._revoked.get(user_id, 0))
+
+    def revoked_at(self, user_id):
+        return self._revoked.get(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._revoked.clear()
+
+
+class DatabaseRevocations(MemoryRevocations):
+    """
+    Revocations in the user_revocations table, shared by every worker. Each
+    worker reads new rows into its local copy at most every `sync_interval`
+    seconds, so the check itself never waits on the database. Rows older
+    than `max_age` (the token lifetime) can't match a live token and are
+    swept on write.
+    """
+
+    def __init__(self, engine, sync_interval=5, max_age=3600):
+        super().__init__()
+        self.engine = engine
+        self.sync_interval = sync_interval
+        self.max_age = max_age
+        self._synced_at = 0
+        self._seen = 0          # newest revoked_at read so far
+
+    def revoke(self, user_id, revoked_at):
+        from app.models import UserRevocation
+
+        self._remember(user_id, revoked_at)
+        table = UserRevocation.__table__
+        stmt = dialect_insert(table, self.engine.dialect.name).values(user_id=user_id, revoked_at=revoked_at)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id], set_={'revoked_at': stmt.excluded.revoked_at}
+        )
+        with self.engine.begin() as conn:
+            conn.execute(stmt)
+            conn.execute(table.delete().where(table.c.revoked_at < revoked_at - self.max_age))
+
+    def revoked_at(self, user_id):
+        self._sync()
+        return super().revoked_at(user_id)
+
+    def _sync(self):
+        from app.models import UserRevocation
+
+        now = time.time()
+        with self._lock:
+            if now - self._synced_at < self.sync_interval:
+                return
+            self._synced_at = now
+            since = max(self._seen, now - self.max_age)
+
+        table = UserRevocation.__table__
+        try:
+            with self.engine.connect() as conn:
+                rows = conn.execute(
+                    select(table.c.user_id, table.c.revoked_at).where(table.c.revoked_at > since)
+                ).all()
+        except Exception as e:
+            # Keep serving from the local copy; the next sync retries
+            print(f"Revocation Sync Error: {e}")
+            return
+        for row in rows:
+            self._remember(row.user_id, row.revoked_at)
+            self._seen = max(self._seen, row.revoked_at)
+
+    def clear(self):
+        from app.models import UserRevocation
+
+        super().clear()
+        with self.engine.begin() as conn:
+            conn.execute(UserRevocation.__table__.delete())
+
+
+def init_revocations(app):
+    backend = app.config['USER_REVOCATION_STORAGE']
+    if backend == 'database':
+        with app.app_context():
+            store = DatabaseRevocations(
+                db.engine, sync_interval=app.config['USER_REVOCATION_SYNC_INTERVAL'],
+                max_age=app.config['JWT_ACCESS_TOKEN_EXPIRES'].total_seconds())
+    elif backend == 'memory':
+        store = MemoryRevocations()
+    else:
+        raise ValueError(f"Unknown USER_REVOCATION_STORAGE: {backend}")
+    app.extensions['user_revocations'] = store
+
+
+def revoke_user(user_id):
+    """
+    Rejects every token issued to the user up to now and drops the cached
+    snapshot. With the database backend other workers pick the revocation
+    up within USER_REVOCATION_SYNC_INTERVAL seconds; their cached snapshot
+    expires within USER_CACHE_TTL.
+    """
+    user_id = int(user_id)
+    current_app.extensions['user_revocations'].revoke(user_id, time.time())
+    user_cache.invalidate(user_id)
+
+
+def clear_revocations():
+    current_app.extensions['user_revocations'].clear()
+
+
+def invalidate_user(user_id):
+    user_cache.invalidate(int(user_id))
+
+
+def after_commit(session, user_id, revoke=False):
+    """
+    Revokes the user's tokens (or, with revoke=False, only drops the cached
+    snapshot) once `session` commits; nothing happens if it rolls back.
+    Called from the User model listeners, so every write path is covered.
+    """
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    pending[int(user_id)] = pending.get(int(user_id), False) or revoke
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_committed(session):
+    for user_id, revoke in session.info.pop(_PENDING_KEY, {}).items():
+        if revoke and has_app_context():
+            revoke_user(user_id)
+        else:
+            invalidate_user(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def is_revoked(user_id, issued_at):
+    revoked_at = current_app.extensions['user_revocations'].revoked_at(int(user_id))
+    return revoked_at is not None and issued_at is not None and issued_at <= revoked_at
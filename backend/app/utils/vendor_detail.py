@@ -0,0 +1,114 @@
+import json
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from app.utils.cache import TTLCache
+
+# Per-worker LRU of vendor_id -> (head bytes, document bytes, auto_close_at).
+# Writes in this worker invalidate it; the TTL bounds staleness from others.
+detail_cache = TTLCache(maxsize=10000)
+
+_PENDING_KEY = 'detail_cache_invalidate'
+
+_STATUS = {True: b'"status":"Open",', False: b'"status":"Closed",'}
+
+
+def build_detail_doc(address, menu_items):
+    """
+    JSON text of the location half of a vendor's detail view: address, the
+    formatted menu and its categories. The profile half (id, name, image)
+    and the status are added per read by detail_body(). Items without an id
+    get their position, so the stored document is reproducible.
+    """
+    formatted_menu = []
+    if menu_items and isinstance(menu_items, list):
+        for position, i in enumerate(menu_items):
+            if isinstance(i, dict):
+                formatted_menu.append({
+                    'id': i.get('id', str(position)),
+                    'name': i.get('name', 'Unknown'),
+                    'price': i.get('price', 0),
+                    'description': i.get('desc', ''),
+                    'image': i.get('image', None),
+                    'category': 'main'
+                })
+
+    return json.dumps({
+        'address': address,
+        'menuItems': formatted_menu,
+        'categories': [{'id': 'all', 'name': 'All', 'count': len(formatted_menu)}]
+    }, separators=(',', ':'), sort_keys=True)
+
+
+def invalidate_after_commit(session, vendor_id):
+    """
+    Drops the vendor's cached entry once `session` commits. Invalidating
+    inside the flush would let a concurrent read cache the old row again
+    before the write is visible.
+    """
+    if session is None:
+        detail_cache.invalidate(vendor_id)
+        return
+    session.info.setdefault(_PENDING_KEY, set()).add(vendor_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    for vendor_id in session.info.pop(_PENDING_KEY, ()):
+        detail_cache.invalidate(vendor_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def refresh_detail_doc(connection, vendor_id):
+    """
+    Rebuilds and stores a vendor's document from its current location row.
+    The caller invalidates the cache (see invalidate_after_commit).
+    """
+    from app.models import VendorLocation
+
+    loc = VendorLocation.__table__
+    row = connection.execute(
+        select(loc.c.address, loc.c.menu_items).where(loc.c.vendor_id == vendor_id)
+    ).first()
+    if row is None:
+        return None
+    doc = build_detail_doc(row.address, row.menu_items)
+    connection.execute(
+        update(loc).where(loc.c.vendor_id == vendor_id).values(detail_doc=doc, updated_at=loc.c.updated_at)
+    )
+    return doc
+
+
+def load_vendor_detail(session, vendor_id):
+    """(head bytes, document bytes, auto_close_at) in one keyed lookup, or None for an unknown vendor."""
+    from app.models import User, VendorLocation
+
+    u = User.__table__
+    loc = VendorLocation.__table__
+    row = session.execute(
+        select(loc.c.detail_doc, loc.c.auto_close_at, u.c.business_name, u.c.storefront_image_url)
+        .select_from(loc.join(u, u.c.id == loc.c.vendor_id))
+        .where(loc.c.vendor_id == vendor_id, u.c.role == 'vendor')
+    ).first()
+    if row is None:
+        return None
+
+    doc = row.detail_doc
+    if doc is None:
+        # Row written without one (e.g. a bulk load): build it, but a read never writes
+        location = session.execute(
+            select(loc.c.address, loc.c.menu_items).where(loc.c.vendor_id == vendor_id)
+        ).first()
+        doc = build_detail_doc(location.address, location.menu_items)
+
+    head = (f'{{"success":true,"vendor":{{"id":{vendor_id},"name":{json.dumps(row.business_name)},'
+            f'"image":{json.dumps(row.storefront_image_url)},')
+    return head.encode(), doc.encode(), row.auto_close_at
+
+
+def detail_body(head, doc, is_open):
+    """The response body: profile head + status + the stored document's fields."""
+    return b''.join((head, _STATUS[is_open], doc[1:], b'}\n'))
@@ -0,0 +1,118 @@
+"""
+Hot-table size and read latency under archival.
+
+Seeds a dataset with `--history` days of orders, then simulates `--days`
+more days: each day adds `--per-day` paid orders, runs the rollup and
+archival jobs as the scheduler would, and times the admin logs first page
+and the busiest vendor's order list. With archival the hot tables level off
+at about `--keep` days of orders while the archive grows.
+
+    cd backend
+    python -m benchmarks.bench_archival
+    python -m benchmarks.bench_archival --days 30 --per-day 20000 --keep 7
+    python -m benchmarks.bench_archival --no-archive      # baseline: hot tables keep growing
+"""
+import argparse
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+from benchmarks.bench_suite import _configure, _time_requests
+
+
+def _add_day(conn, first_id, vendor_ids, hot_vendor_id, per_day, now, rng):
+    """
+    `per_day` completed orders (and their transactions) over the 24h before
+    `now`, ids from `first_id` up. Returns the next free id.
+    """
+    from app.models import Order, Transaction
+
+    orders, txns = Order.__table__, Transaction.__table__
+    order_rows, txn_rows = [], []
+    for order_id in range(first_id, first_id + per_day):
+        vendor_id = hot_vendor_id if rng.random() < 0.05 else rng.choice(vendor_ids)
+        created = now - timedelta(seconds=rng.randint(0, 86399))
+        order_rows.append({
+            'id': order_id, 'order_number': f'ORD-B{order_id:012d}', 'vendor_id': vendor_id,
+            'customer_phone': '254711000000', 'items': [{'name': 'Chai', 'price': 30, 'quantity': 1}],
+            'total_amount': 30.0, 'status': 'Completed', 'created_at': created})
+        txn_rows.append({
+            'id': order_id, 'vendor_id': vendor_id, 'order_id': order_id, 'customer_phone': '254711000000',
+            'amount': 30.0, 'checkout_request_id': f'ws_CO_B{order_id:012d}',
+            'mpesa_receipt_number': f'B{order_id:011d}', 'transaction_date': created, 'status': 'COMPLETED',
+            'created_at': created, 'updated_at': created})
+    conn.execute(orders.insert(), order_rows)
+    conn.execute(txns.insert(), txn_rows)
+    return first_id + per_day
+
+
+def run(args):
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import func, select
+    from app import create_app
+    from app.extensions import db
+    from app.models import Order, OrderArchive, Transaction, User
+    from app.seed_data import seed
+    from app.utils.archival import archive_old_rows
+    from app.utils.rollups import refresh_rollups
+
+    app = create_app('production')
+    rng = random.Random(args.seed)
+    now = datetime(2026, 1, 1)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        info = seed(db.engine, vendors=args.vendors, orders=args.per_day * args.history, days=args.history,
+                    seed=args.seed, hash_method='pbkdf2:sha256:1000', now=now)
+        # Ids keep increasing past anything archived, as the serial sequences would
+        next_id = max(db.session.execute(select(func.max(Transaction.id))).scalar(),
+                      db.session.execute(select(func.max(Order.id))).scalar()) + 1
+        vendor_ids = db.session.execute(select(User.id).where(User.role == 'vendor')).scalars().all()
+        vendor_headers = {'Authorization': 'Bearer ' + create_access_token(
+            identity=str(info['hot_vendor_id']), additional_claims={'role': 'vendor'})}
+        admin_headers = {'Authorization': 'Bearer ' + create_access_token(
+            identity=str(info['admin_id']), additional_claims={'role': 'admin'})}
+
+    print(f"{'day':>4} {'hot orders':>11} {'hot txns':>9} {'archived':>9} {'logs p50 ms':>12} {'orders p50 ms':>14}")
+    with app.test_client() as client:
+        for day in range(1, args.days + 1):
+            now += timedelta(days=1)
+            with app.app_context():
+                with db.engine.begin() as conn:
+                    next_id = _add_day(conn, next_id, vendor_ids, info['hot_vendor_id'], args.per_day, now, rng)
+                refresh_rollups(now=now)
+                if not args.no_archive:
+                    archive_old_rows(args.keep, batch_size=args.batch_size, now=now)
+                hot_orders = db.session.execute(select(func.count()).select_from(Order)).scalar()
+                hot_txns = db.session.execute(select(func.count()).select_from(Transaction)).scalar()
+                archived = db.session.execute(select(func.count()).select_from(OrderArchive)).scalar()
+                db.session.remove()
+
+            logs = _time_requests(client, lambda: client.get('/api/admin/logs', headers=admin_headers),
+                                  args.iterations)
+            orders = _time_requests(client, lambda: client.get('/api/vendor/orders', headers=vendor_headers),
+                                    max(args.iterations // 5, 3))
+            print(f"{day:>4} {hot_orders:>11} {hot_txns:>9} {archived:>9} {logs['p50_ms']:>12} {orders['p50_ms']:>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', help='SQLAlchemy URL (default: temp SQLite file)')
+    parser.add_argument('--vendors', type=int, default=500)
+    parser.add_argument('--history', type=int, default=14, help='days of orders seeded up front')
+    parser.add_argument('--days', type=int, default=14, help='days to simulate')
+    parser.add_argument('--per-day', type=int, default=5000)
+    parser.add_argument('--keep', type=int, default=7, help='ARCHIVE_AFTER_DAYS')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--no-archive', action='store_true')
+    args = parser.parse_args()
+
+    _configure(args.db or 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='vendor-bench-'), 'bench.sqlite'))
+    run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Login throughput benchmark.
+
+Drives /api/auth/login through the Flask test client from several client
+threads against one app (one "worker") and reports logins per second, for
+each configured hash method.
+
+    cd backend
+    python -m benchmarks.bench_auth --threads 8 --logins 200
+    python -m benchmarks.bench_auth --method pbkdf2:sha256:600000 --hash-workers 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+from app import create_app
+from app.extensions import db
+from app.models import User
+from werkzeug.security import generate_password_hash
+
+
+def run(method, hash_workers, threads, logins):
+    app = create_app('production')
+    app.config['PASSWORD_HASH_METHOD'] = method
+    app.config['PASSWORD_HASH_WORKERS'] = hash_workers
+
+    # The pool is per process; rebuild it for this configuration
+    import app.utils.passwords as passwords
+    passwords._executor = None
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username='bench', email='bench@test.com', phone_number='+254700999999',
+                            password_hash=generate_password_hash('Bench123!', method), role='vendor'))
+        db.session.commit()
+
+    def login(_):
+        with app.test_client() as client:
+            response = client.post('/api/auth/login', json={'email': 'bench@test.com', 'password': 'Bench123!'})
+            return response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        codes = list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - started
+
+    ok = codes.count(200)
+    return {
+        'method': method,
+        'hash_workers': hash_workers,
+        'client_threads': threads,
+        'logins': logins,
+        'ok': ok,
+        'busy': codes.count(503),
+        'seconds': round(elapsed, 3),
+        'logins_per_sec_per_worker': round(ok / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--method', action='append', help='werkzeug hash method (repeatable)')
+    parser.add_argument('--hash-workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--logins', type=int, default=100)
+    args = parser.parse_args()
+
+    for method in args.method or ['scrypt', 'pbkdf2:sha256:600000', 'pbkdf2:sha256:100000']:
+        print(run(method, args.hash_workers, args.threads, args.logins))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Response compression benchmark.
+
+Encodes payloads shaped like the heaviest endpoints (see bench_json.py) and
+reports, per endpoint and setting, the compressed size, the saving and the
+CPU time per response, so COMPRESSION_LEVEL / COMPRESSION_BROTLI_QUALITY can
+be picked with numbers. Brotli rows are skipped unless the package is
+installed. In production the same figures come from the
+http_compression_* metrics.
+
+    cd backend
+    python -m benchmarks.bench_compression --repeat 20
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app import create_app
+from app.utils.compression import brotli, compress_body
+from benchmarks.bench_json import payloads
+
+SETTINGS = [('gzip', 1), ('gzip', 6), ('gzip', 9), ('br', 1), ('br', 4), ('br', 6)]
+
+
+def time_compress(data, encoding, level, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.thread_time()
+        body = compress_body(data, encoding, gzip_level=level, brotli_quality=level)
+        best = min(best, time.thread_time() - started)
+    return best, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    app = create_app('production', blueprints=())
+    for name, payload in payloads(random.Random(1)).items():
+        data = app.json.response(payload).get_data()
+        for encoding, level in SETTINGS:
+            if encoding == 'br' and brotli is None:
+                continue
+            cpu, body = time_compress(data, encoding, level, args.repeat)
+            print({
+                'payload': name,
+                'encoding': f'{encoding}-{level}',
+                'bytes': len(data),
+                'compressed': len(body),
+                'saved_pct': round((1 - len(body) / len(data)) * 100, 1),
+                'cpu_ms': round(cpu * 1000, 2),
+            })
+
+
+if __name__ == '__main__':
+    main()
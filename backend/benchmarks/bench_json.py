@@ -0,0 +1,85 @@
+"""
+JSON response encoding benchmark.
+
+Builds payloads shaped like the heaviest endpoints (admin logs page, a busy
+vendor's orders, nearby with menus) and times Flask's default provider
+against FastJSONProvider, checking the bytes are identical.
+
+    cd backend
+    python -m benchmarks.bench_json --repeat 20
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from flask.json.provider import DefaultJSONProvider
+from app import create_app
+from app.seed_data import FOODS, NEIGHBOURHOODS
+from app.utils.json_provider import FastJSONProvider
+
+
+def payloads(rng):
+    now = datetime(2026, 1, 15, 12, 0)
+    menu = lambda: [{'name': name, 'price': rng.choice([50, 80, 120]), 'image': None, 'available': True}
+                    for name in rng.sample(FOODS, rng.randint(3, 8))]
+
+    logs = {'success': True, 'next_cursor': 'MjAyNi0wMS0xNVQxMjowMDowMHwxMjM0', 'logs': [{
+        'id': n, 'vendor_id': rng.randint(1, 5000), 'vendor_name': f'Vendor {n}',
+        'timestamp': (now - timedelta(minutes=n)).isoformat(), 'amount': float(rng.choice([50, 120, 350])),
+        'receipt': f'S{n:011d}', 'status': 'Successful', 'customer_phone': '254712345678',
+        'order_id': f'ORD-S{n:012d}'} for n in range(500)]}
+
+    orders = {'success': True, 'orders': [{
+        'id': n, 'customer_phone': '254712345678', 'amount': 170.0, 'status': 'Paid',
+        'created_at': now - timedelta(minutes=n), 'items': [{'name': 'Samosa', 'price': 50, 'quantity': 2},
+                                                           {'name': 'Chai', 'price': 70, 'quantity': 1}],
+        'delivery_location': None, 'customer_lat': -1.2864 + n * 1e-4, 'customer_lon': 36.8172,
+        'mpesa_receipt_number': f'S{n:011d}'} for n in range(5000)]}
+
+    nearby = {'success': True, 'vendors': [{
+        'id': n, 'vendor_id': n, 'latitude': hood[1] + rng.uniform(-0.01, 0.01),
+        'longitude': hood[2] + rng.uniform(-0.01, 0.01), 'distance': round(rng.uniform(0, 5), 1),
+        'menu': menu(), 'name': f'Spot {hood[0]} #{n}', 'image': None, 'status': 'Open'}
+        for n, hood in enumerate(rng.choices(NEIGHBOURHOODS, k=500))]}
+
+    return {'admin_logs_page': logs, 'vendor_orders_5000': orders, 'nearby_500': nearby}
+
+
+def time_response(provider, payload, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = provider.response(payload).get_data()
+        best = min(best, time.perf_counter() - started)
+    return best, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--debug', action='store_true', help='indented output, as in debug mode')
+    args = parser.parse_args()
+
+    app = create_app('production', blueprints=())
+    app.debug = args.debug
+    default, fast = DefaultJSONProvider(app), FastJSONProvider(app)
+
+    for name, payload in payloads(random.Random(1)).items():
+        default_s, default_body = time_response(default, payload, args.repeat)
+        fast_s, fast_body = time_response(fast, payload, args.repeat)
+        print({
+            'payload': name,
+            'bytes': len(default_body),
+            'identical': default_body == fast_body,
+            'default_ms': round(default_s * 1000, 2),
+            'fast_ms': round(fast_s * 1000, 2),
+            'speedup': round(default_s / fast_s, 1),
+        })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Instrumentation overhead benchmark.
+
+Times the same request mix with METRICS_ENABLED off and on, single-threaded
+through the Flask test client, and reports the per-request cost of the
+latency/SQL hooks.
+
+    cd backend
+    python -m benchmarks.bench_metrics --requests 2000 --vendors 200
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+from app import create_app
+from app.config import config
+from app.extensions import db
+from app.models import User, VendorLocation
+
+PATHS = ['/', '/api/customer/nearby?lat=-1.2864&lon=36.8172', '/api/customer/search?item=samosa&lat=-1.2864&lon=36.8172']
+
+
+def build_app(metrics_enabled, vendors):
+    config['production'].METRICS_ENABLED = metrics_enabled
+    app = create_app('production')
+    app.config['RATE_LIMIT_ENABLED'] = False
+
+    rng = random.Random(1)
+    with app.app_context():
+        db.create_all()
+        for n in range(vendors):
+            user = User(username=f'v{n}', email=f'v{n}@bench.test', phone_number=f'+2547{n:08d}',
+                        password_hash='x', role='vendor', business_name=f'Vendor {n}')
+            db.session.add(user)
+            db.session.flush()
+            location = VendorLocation(vendor_id=user.id, latitude=-1.2864 + rng.uniform(-0.05, 0.05),
+                                      longitude=36.8172 + rng.uniform(-0.05, 0.05),
+                                      menu_items=[{'name': 'Samosa', 'price': 50}])
+            location.check_in()
+            db.session.add(location)
+        db.session.commit()
+    return app
+
+
+def run(metrics_enabled, requests, vendors):
+    app = build_app(metrics_enabled, vendors)
+    results = {}
+    with app.test_client() as client:
+        for path in PATHS:
+            for _ in range(20):
+                client.get(path)
+            started = time.perf_counter()
+            for _ in range(requests):
+                client.get(path)
+            results[path] = (time.perf_counter() - started) / requests * 1e6
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--vendors', type=int, default=100)
+    args = parser.parse_args()
+
+    off = run(False, args.requests, args.vendors)
+    on = run(True, args.requests, args.vendors)
+    for path in PATHS:
+        print({
+            'path': path,
+            'us_per_request_off': round(off[path], 1),
+            'us_per_request_on': round(on[path], 1),
+            'overhead_us': round(on[path] - off[path], 1),
+            'overhead_pct': round((on[path] - off[path]) / off[path] * 100, 1),
+        })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Cold-start benchmark for the app factory.
+
+Runs `python -X importtime` on a fresh interpreter that builds the app, and
+reports wall time, total import time and the slowest top-level imports.
+With --max-ms it exits non-zero when the median start-up exceeds the budget,
+so CI can catch cold-start regressions for autoscaled workers.
+
+    cd backend
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --blueprints none --runs 10 --max-ms 800
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def run_once(blueprints):
+    code = f"from app import create_app; create_app('production', blueprints={blueprints})"
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - started
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((module, int(cumulative_us), len(indent) // 2))
+    return wall, imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blueprints', default='all', help="'all', 'none' or a comma-separated list")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--max-ms', type=float, help='fail if median wall time exceeds this')
+    args = parser.parse_args()
+
+    blueprints = {'all': None, 'none': ()}.get(args.blueprints)
+    if args.blueprints not in ('all', 'none'):
+        blueprints = tuple(args.blueprints.split(','))
+
+    walls, last = [], []
+    for _ in range(args.runs):
+        wall, imports = run_once(blueprints)
+        walls.append(wall * 1000)
+        last = imports
+
+    top_level = sorted((i for i in last if i[2] == 1), key=lambda i: i[1], reverse=True)
+    median = statistics.median(walls)
+    print(f"blueprints={args.blueprints} runs={args.runs}")
+    print(f"wall time: median {median:.0f}ms, min {min(walls):.0f}ms, max {max(walls):.0f}ms")
+    print(f"import time (last run): {sum(i[1] for i in top_level) / 1000:.0f}ms across {len(last)} modules")
+    print(f"\nSlowest top-level imports:")
+    for module, cumulative_us, _ in top_level[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f}ms  {module}")
+
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"\nFAIL: median start-up {median:.0f}ms exceeds budget {args.max_ms:.0f}ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
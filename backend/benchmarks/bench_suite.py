@@ -0,0 +1,210 @@
+"""
+End-to-end benchmark suite on a synthetic city-sized dataset.
+
+Generates vendors, menus, orders and transactions (see app/seed_data.py), then
+times the hot read paths through the Flask test client plus the scheduler's
+auto-close sweep, and writes the results as JSON so runs can be compared.
+
+    cd backend
+    python -m benchmarks.bench_suite --vendors 10000 --orders 1000000
+    python -m benchmarks.bench_suite --db postgresql://localhost/vendor_bench --vendors 100000
+    python -m benchmarks.bench_suite --compare benchmarks/results/<earlier>.json
+
+--db defaults to a fresh SQLite file in a temp directory. Point it at an
+existing, already-generated database with --reuse to skip generation.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+def _configure(db_url):
+    # Config reads these at import time
+    os.environ['DATABASE_URL'] = db_url
+    os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+    os.environ.setdefault('METRICS_ENABLED', 'false')
+    os.environ.setdefault('PROFILE_ENABLED', 'false')
+    os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-jwt-secret-key-with-enough-length')
+
+
+def _summary(samples):
+    samples = sorted(samples)
+    ms = [s * 1000 for s in samples]
+    return {
+        'n': len(ms),
+        'mean_ms': round(statistics.fmean(ms), 3),
+        'p50_ms': round(ms[len(ms) // 2], 3),
+        'p95_ms': round(ms[min(int(len(ms) * 0.95), len(ms) - 1)], 3),
+        'min_ms': round(ms[0], 3),
+        'max_ms': round(ms[-1], 3),
+    }
+
+
+def _time_requests(client, make_request, iterations, warmup=3):
+    for _ in range(warmup):
+        make_request()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        response = make_request()
+        samples.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise RuntimeError(f"Benchmark request failed ({response.status_code}): {response.get_data(as_text=True)[:200]}")
+    result = _summary(samples)
+    result['response_bytes'] = len(response.get_data())
+    return result
+
+
+def _git_rev():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def run(args):
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+    from app.extensions import db
+    from app.utils.auto_close import AutoCloser
+    from app.seed_data import NAIROBI, seed
+
+    app = create_app('production')
+    info = {'counts': None, 'seconds': None, 'hot_vendor_id': 2, 'admin_id': 1, 'center': NAIROBI}
+
+    with app.app_context():
+        if not args.reuse:
+            db.drop_all()
+            db.create_all()
+            print(f"Generating {args.vendors} vendors / {args.orders} orders ...")
+            info = seed(db.engine, vendors=args.vendors, orders=args.orders, seed=args.seed,
+                        hash_method='pbkdf2:sha256:1000')
+            print(f"  done in {info['seconds']}s: {info['counts']}")
+
+        vendor_headers = {'Authorization': 'Bearer ' + create_access_token(
+            identity=str(info['hot_vendor_id']), additional_claims={'role': 'vendor'})}
+        admin_headers = {'Authorization': 'Bearer ' + create_access_token(
+            identity=str(info['admin_id']), additional_claims={'role': 'admin'})}
+
+    rng = random.Random(args.seed)
+    lat, lon = info['center']
+
+    def point():
+        return lat + rng.uniform(-0.05, 0.05), lon + rng.uniform(-0.05, 0.05)
+
+    n = args.iterations
+    results = {}
+    with app.test_client() as client:
+        def search():
+            p = point()
+            return client.get(f'/api/customer/search?item=samosa&lat={p[0]}&lon={p[1]}')
+
+        def nearby():
+            p = point()
+            return client.get(f'/api/customer/nearby?lat={p[0]}&lon={p[1]}&radius=2000')
+
+        def details():
+            return client.get(f'/api/customer/vendor/{rng.randint(2, args.vendors + 1)}')
+
+        def hot_vendor_orders():
+            return client.get('/api/vendor/orders', headers=vendor_headers)
+
+        def admin_logs():
+            return client.get('/api/admin/logs', headers=admin_headers)
+
+        def admin_logs_vendor():
+            return client.get(f'/api/admin/logs?vendor_id={rng.randint(2, args.vendors + 1)}', headers=admin_headers)
+
+        benches = {
+            'search_vendors': search,
+            'get_nearby_vendors': nearby,
+            'get_vendor_details': details,
+            'get_vendor_orders_hot': hot_vendor_orders,
+            'get_transaction_logs': admin_logs,
+            'get_transaction_logs_by_vendor': admin_logs_vendor,
+        }
+        for name, fn in benches.items():
+            if args.only and name not in args.only:
+                continue
+            print(f"Timing {name} ...")
+            iterations = max(n // 10, 3) if name == 'get_vendor_orders_hot' else n
+            results[name] = _time_requests(client, fn, iterations)
+
+    if not args.only or 'auto_close_sweep' in args.only:
+        # One-shot: the sweep closes the overdue vendors, so it can't be repeated
+        with app.app_context():
+            closer = AutoCloser(refresh_interval=app.config['AUTO_CLOSE_REFRESH_INTERVAL'])
+            started = time.perf_counter()
+            closer.refresh()
+            closed = closer.close_due()
+            elapsed = time.perf_counter() - started
+            results['auto_close_sweep'] = {'n': 1, 'seconds': round(elapsed, 4), 'closed': len(closed)}
+
+    with app.app_context():
+        dialect = db.engine.dialect.name
+
+    return {
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+        'git_rev': _git_rev(),
+        'python': platform.python_version(),
+        'database': dialect,
+        'scale': {'vendors': args.vendors, 'orders': args.orders, 'seed': args.seed, 'iterations': n},
+        'dataset': info['counts'],
+        'generate_seconds': info['seconds'],
+        'results': results,
+    }
+
+
+def compare(current, previous):
+    print(f"\nvs {previous.get('git_rev')} ({previous.get('timestamp')}):")
+    for name, result in current['results'].items():
+        before = previous.get('results', {}).get(name)
+        key = 'p50_ms' if 'p50_ms' in result else 'seconds'
+        if not before or key not in before:
+            continue
+        change = (result[key] - before[key]) / before[key] * 100 if before[key] else 0
+        print(f"  {name:34s} {before[key]:>10} -> {result[key]:>10} {key}  ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', help='SQLAlchemy URL (default: temp SQLite file)')
+    parser.add_argument('--reuse', action='store_true', help='use the existing data in --db')
+    parser.add_argument('--vendors', type=int, default=10000)
+    parser.add_argument('--orders', type=int, default=200000)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--only', action='append', help='benchmark name to run (repeatable)')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='earlier results file to diff against')
+    args = parser.parse_args()
+
+    db_url = args.db or 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='vendor-bench-'), 'bench.sqlite')
+    _configure(db_url)
+
+    report = run(args)
+    output = args.output or os.path.join(RESULTS_DIR, report['timestamp'].replace(':', '') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for name, result in report['results'].items():
+        print(f"{name:36s} {result}")
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Local stand-in for the Safaricom Daraja API, for load tests.
+
+Answers the OAuth and STK push endpoints MpesaHandler calls and, after a
+simulated "customer types their PIN" delay, POSTs the result to the
+CallBackURL from the push request, like Daraja does. Point the app at it
+with MPESA_BASE_URL.
+
+    cd backend
+    python -m benchmarks.daraja_stub --port 8099 --pin-delay 2 --failure-rate 0.1
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.request
+import uuid
+from collections import Counter
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+
+class _ThreadingServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class DarajaStub:
+    def __init__(self, pin_delay=2.0, failure_rate=0.0, latency=0.0, seed=None):
+        self.pin_delay = pin_delay
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.stats = Counter()
+        self.callback_latencies = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    # --- Daraja endpoints ---
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if self.latency:
+            time.sleep(self.latency)
+
+        if path == '/oauth/v1/generate':
+            self._count('oauth')
+            return self._json(start_response, {'access_token': uuid.uuid4().hex, 'expires_in': '3599'})
+
+        if path == '/mpesa/stkpush/v1/processrequest':
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+            payload = json.loads(environ['wsgi.input'].read(length) or b'{}')
+            checkout_id = f"ws_CO_{uuid.uuid4().hex[:20]}"
+            self._count('stk_push')
+            timer = threading.Timer(self.pin_delay, self._send_callback, (payload.get('CallBackURL'), checkout_id))
+            timer.daemon = True
+            timer.start()
+            return self._json(start_response, {
+                'MerchantRequestID': uuid.uuid4().hex[:12],
+                'CheckoutRequestID': checkout_id,
+                'ResponseCode': '0',
+                'ResponseDescription': 'Success. Request accepted for processing',
+                'CustomerMessage': 'Success. Request accepted for processing',
+            })
+
+        start_response('404 Not Found', [('Content-Type', 'application/json')])
+        return [b'{"errorMessage": "not found"}']
+
+    def _send_callback(self, url, checkout_id):
+        if not url:
+            self._count('callback_skipped')
+            return
+        failed = self.rng.random() < self.failure_rate
+        callback = {'Body': {'stkCallback': {
+            'MerchantRequestID': uuid.uuid4().hex[:12],
+            'CheckoutRequestID': checkout_id,
+            'ResultCode': 1032 if failed else 0,
+            'ResultDesc': 'Request cancelled by user' if failed else 'The service request is processed successfully.',
+        }}}
+        if not failed:
+            callback['Body']['stkCallback']['CallbackMetadata'] = {'Item': [
+                {'Name': 'Amount', 'Value': 1},
+                {'Name': 'MpesaReceiptNumber', 'Value': uuid.uuid4().hex[:10].upper()},
+                {'Name': 'PhoneNumber', 'Value': 254700000000},
+            ]}
+
+        request = urllib.request.Request(url, data=json.dumps(callback).encode(),
+                                         headers={'Content-Type': 'application/json'}, method='POST')
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                self._count(f'callback_{response.status}')
+        except urllib.error.HTTPError as e:
+            self._count(f'callback_{e.code}')
+        except Exception:
+            self._count('callback_error')
+        with self._lock:
+            self.callback_latencies.append(time.perf_counter() - started)
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    @staticmethod
+    def _json(start_response, body):
+        data = json.dumps(body).encode()
+        start_response('200 OK', [('Content-Type', 'application/json'), ('Content-Length', str(len(data)))])
+        return [data]
+
+    # --- Lifecycle ---
+    def start(self, host='127.0.0.1', port=0):
+        self._server = make_server(host, port, self, server_class=_ThreadingServer, handler_class=_QuietHandler)
+        threading.Thread(target=self._server.serve_forever, name='daraja-stub', daemon=True).start()
+        return f"http://{host}:{self._server.server_port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--pin-delay', type=float, default=2.0, help='seconds before the callback is sent')
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--latency', type=float, default=0.0, help='added to every Daraja response')
+    args = parser.parse_args()
+
+    stub = DarajaStub(args.pin_delay, args.failure_rate, args.latency)
+    print(f"Daraja stub on {stub.start(port=args.port)}")
+    try:
+        while True:
+            time.sleep(10)
+            print(dict(stub.stats))
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,416 @@
+"""
+Closed-loop load test of the customer journey.
+
+Each virtual customer runs nearby -> search -> vendor details -> pay ->
+payment-status polling until the (stubbed) M-Pesa callback lands, then
+thinks and starts over. With --arrival-rate, journeys instead start as a
+Poisson process (open loop) capped at --max-in-flight.
+
+By default the app is started under gunicorn (gthread workers) on a seeded
+SQLite file, with M-Pesa pointed at benchmarks/daraja_stub.py. Reports
+throughput, latency percentiles and error rates per stage, plus DB pool
+saturation scraped from /metrics.
+
+    cd backend
+    python -m benchmarks.load_test --users 20 --duration 60
+    python -m benchmarks.load_test --arrival-rate 5 --duration 120 --workers 2 --threads 8
+    python -m benchmarks.load_test --target http://127.0.0.1:5000 --users 10   # already running server
+
+With --target, start the server yourself with MPESA_BASE_URL pointing at a
+running stub and RATE_LIMIT_ENABLED=false.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+from benchmarks.daraja_stub import DarajaStub
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+STAGES = ['nearby', 'search', 'vendor_details', 'pay', 'payment_status', 'confirmation', 'callback']
+ENDPOINT_STAGES = {
+    'customer.get_nearby_vendors': 'nearby',
+    'customer.search_vendors': 'search',
+    'customer.get_vendor_details': 'vendor_details',
+    'customer.initiate_payment': 'pay',
+    'customer.check_payment_status': 'payment_status',
+    'customer.mpesa_callback': 'callback',
+}
+_METRIC_RE = re.compile(r'^([a-zA-Z_:][\w:]*)(\{[^}]*\})? (\S+)$')
+
+
+# ============================================================================
+# STATS
+# ============================================================================
+class StageStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(Counter)
+
+    def record(self, stage, seconds, error=None):
+        with self._lock:
+            self.latencies[stage].append(seconds)
+            if error:
+                self.errors[stage][error] += 1
+
+    def summary(self, duration):
+        report = {}
+        for stage in STAGES:
+            samples = sorted(self.latencies.get(stage, []))
+            if not samples:
+                continue
+            errors = self.errors.get(stage, Counter())
+            ms = [s * 1000 for s in samples]
+
+            def pct(p):
+                return round(ms[min(int(len(ms) * p), len(ms) - 1)], 2)
+
+            report[stage] = {
+                'count': len(ms),
+                'throughput_per_sec': round(len(ms) / duration, 2),
+                'error_rate': round(sum(errors.values()) / len(ms), 4),
+                'errors': dict(errors),
+                'mean_ms': round(statistics.fmean(ms), 2),
+                'p50_ms': pct(0.50),
+                'p95_ms': pct(0.95),
+                'p99_ms': pct(0.99),
+                'max_ms': round(ms[-1], 2),
+            }
+        return report
+
+
+def scrape(target):
+    """Parses the /metrics page into {'name{labels}': value}."""
+    values = {}
+    try:
+        text = requests.get(f"{target}/metrics", timeout=5).text
+    except requests.RequestException:
+        return values
+    for line in text.splitlines():
+        match = _METRIC_RE.match(line)
+        if match:
+            values[match.group(1) + (match.group(2) or '')] = float(match.group(3))
+    return values
+
+
+class PoolSampler(threading.Thread):
+    """Samples db_pool_checked_out from /metrics (summed over workers that answer)."""
+
+    def __init__(self, target, interval=0.5):
+        super().__init__(name='pool-sampler', daemon=True)
+        self.target = target
+        self.interval = interval
+        self.samples = []
+        self.capacity = None
+        self._stop = threading.Event()
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            values = scrape(self.target)
+            key = 'db_pool_checked_out{engine="default"}'
+            if key in values:
+                self.samples.append(values[key])
+                self.capacity = values.get('db_pool_capacity{engine="default"}')
+
+    def stop(self):
+        self._stop.set()
+
+    def summary(self):
+        if not self.samples:
+            return None
+        return {
+            'capacity_per_worker': self.capacity,
+            'checked_out_mean': round(statistics.fmean(self.samples), 2),
+            'checked_out_max': max(self.samples),
+            'saturated_share': round(sum(1 for s in self.samples if self.capacity and s >= self.capacity)
+                                     / len(self.samples), 4),
+        }
+
+
+def pool_usage_by_stage(before, after):
+    """Mean pool usage at request start per stage, from the /metrics deltas."""
+    usage = {}
+    for endpoint, stage in ENDPOINT_STAGES.items():
+        labels = f'{{endpoint="{endpoint}"}}'
+        count = after.get(f'http_request_db_pool_usage_count{labels}', 0) - before.get(f'http_request_db_pool_usage_count{labels}', 0)
+        if count <= 0:
+            continue
+        total = after.get(f'http_request_db_pool_usage_sum{labels}', 0) - before.get(f'http_request_db_pool_usage_sum{labels}', 0)
+        le = f'{{endpoint="{endpoint}",le="0.9"}}'
+        below = after.get(f'http_request_db_pool_usage_bucket{le}', 0) - before.get(f'http_request_db_pool_usage_bucket{le}', 0)
+        usage[stage] = {'mean': round(total / count, 3), 'over_90pct_share': round((count - below) / count, 4)}
+    return usage
+
+
+# ============================================================================
+# CUSTOMER JOURNEY
+# ============================================================================
+class Customer:
+    def __init__(self, target, stats, args, rng):
+        self.target = target
+        self.stats = stats
+        self.args = args
+        self.rng = rng
+        self.session = requests.Session()
+
+    def _call(self, stage, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.target + path, timeout=30, **kwargs)
+        except requests.RequestException as e:
+            self.stats.record(stage, time.perf_counter() - started, type(e).__name__)
+            return None
+        error = f"http_{response.status_code}" if response.status_code >= 400 else None
+        self.stats.record(stage, time.perf_counter() - started, error)
+        return None if error else response
+
+    def journey(self):
+        from app.seed_data import FOODS, NEIGHBOURHOODS
+
+        rng = self.rng
+        _, lat, lon, _, _ = rng.choice(NEIGHBOURHOODS)
+        lat += rng.uniform(-0.01, 0.01)
+        lon += rng.uniform(-0.01, 0.01)
+
+        response = self._call('nearby', 'GET', f'/api/customer/nearby?lat={lat}&lon={lon}&radius=2000')
+        vendors = response.json().get('vendors', []) if response else []
+        self._call('search', 'GET', f'/api/customer/search?item={rng.choice(FOODS)}&lat={lat}&lon={lon}')
+        if not vendors:
+            return 'no_vendor'
+
+        vendor = rng.choice(vendors)
+        response = self._call('vendor_details', 'GET', f"/api/customer/vendor/{vendor['vendor_id']}")
+        if not response:
+            return 'details_failed'
+        menu = response.json()['vendor']['menuItems'] or [{'name': 'Item', 'price': 50}]
+        item = rng.choice(menu)
+
+        response = self._call('pay', 'POST', '/api/customer/pay', json={
+            'vendorId': vendor['vendor_id'],
+            'amount': item['price'] or 1,
+            'phone': f"2547{rng.randrange(10 ** 8):08d}",
+            'items': [{'name': item['name'], 'price': item['price'], 'quantity': 1}],
+            'customerLat': lat,
+            'customerLon': lon,
+        })
+        if not response:
+            return 'pay_failed'
+        checkout_id = response.json()['checkout_id']
+
+        paid_at = time.perf_counter()
+        deadline = paid_at + self.args.poll_timeout
+        while time.perf_counter() < deadline:
+            time.sleep(self.args.poll_interval)
+            response = self._call('payment_status', 'GET', f'/api/customer/payment-status/{checkout_id}')
+            status = response.json().get('status') if response else None
+            if status and status != 'PENDING':
+                # A declined payment is a normal outcome (see --failure-rate), not a server error
+                self.stats.record('confirmation', time.perf_counter() - paid_at)
+                return 'paid' if status in ('SUCCESSFUL', 'COMPLETED') else 'payment_declined'
+        self.stats.record('confirmation', time.perf_counter() - paid_at, 'timeout')
+        return 'timeout'
+
+
+def run_closed_loop(target, stats, args, deadline):
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def user(n):
+        customer = Customer(target, stats, args, random.Random(args.seed + n))
+        while time.time() < deadline:
+            outcome = customer.journey()
+            with lock:
+                outcomes[outcome] += 1
+            time.sleep(customer.rng.expovariate(1 / args.think_time) if args.think_time else 0)
+
+    threads = [threading.Thread(target=user, args=(n, ), daemon=True) for n in range(args.users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return outcomes
+
+
+def run_open_loop(target, stats, args, deadline):
+    outcomes = Counter()
+    lock = threading.Lock()
+    slots = threading.BoundedSemaphore(args.max_in_flight)
+    rng = random.Random(args.seed)
+
+    def one(n):
+        try:
+            outcome = Customer(target, stats, args, random.Random(args.seed + n)).journey()
+            with lock:
+                outcomes[outcome] += 1
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=args.max_in_flight) as pool:
+        n = 0
+        while time.time() < deadline:
+            time.sleep(rng.expovariate(args.arrival_rate))
+            if not slots.acquire(blocking=False):
+                with lock:
+                    outcomes['dropped_arrival'] += 1
+                continue
+            n += 1
+            pool.submit(one, n)
+    return outcomes
+
+
+# ============================================================================
+# SERVER UNDER TEST
+# ============================================================================
+def seed_database(db_url, vendors, orders):
+    env = dict(os.environ, DATABASE_URL=db_url)
+    code = ("from app import create_app; from app.extensions import db; from app.seed_data import seed\n"
+            "app = create_app('production')\n"
+            "with app.app_context():\n"
+            "    db.create_all()\n"
+            f"    print(seed(db.engine, vendors={vendors}, orders={orders}, hash_method='pbkdf2:sha256:1000')['counts'])\n")
+    subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, env=env, check=True)
+
+
+def start_server(args, db_url, stub_url, port):
+    target = f"http://127.0.0.1:{port}"
+    env = dict(
+        os.environ,
+        DATABASE_URL=db_url,
+        MPESA_BASE_URL=stub_url,
+        MPESA_CALLBACK_URL=f"{target}/api/customer/callback",
+        MPESA_CONSUMER_KEY='load-test', MPESA_CONSUMER_SECRET='load-test',
+        MPESA_SHORTCODE='174379', MPESA_PASSKEY='load-test',
+        RATE_LIMIT_ENABLED='false', METRICS_ENABLED='true', PROFILE_ENABLED='false',
+    )
+    if args.server == 'gunicorn':
+        if shutil.which('gunicorn') is None:
+            sys.exit("gunicorn is not installed (pip install -r requirements.txt), or use --server werkzeug")
+        cmd = ['gunicorn', '--workers', str(args.workers), '--worker-class', 'gthread',
+               '--threads', str(args.threads), '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+               "app:create_app('production')"]
+    else:
+        print("Warning: werkzeug's dev server is not representative of production throughput.")
+        cmd = [sys.executable, '-c',
+               f"from app import create_app; create_app('production').run(port={port}, threaded=True)"]
+
+    process = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env)
+    for _ in range(100):
+        try:
+            requests.get(target + '/', timeout=1)
+            return target, process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    sys.exit("Server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', help='URL of an already running server')
+    parser.add_argument('--server', choices=['gunicorn', 'werkzeug'], default='gunicorn')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--port', type=int, default=8098)
+    parser.add_argument('--db', help='SQLAlchemy URL (default: temp SQLite file, seeded)')
+    parser.add_argument('--vendors', type=int, default=2000)
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=10, help='closed-loop virtual customers')
+    parser.add_argument('--arrival-rate', type=float, help='journeys per second (open loop)')
+    parser.add_argument('--max-in-flight', type=int, default=200)
+    parser.add_argument('--think-time', type=float, default=1.0, help='mean seconds between journeys')
+    parser.add_argument('--duration', type=float, default=60)
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--poll-timeout', type=float, default=60)
+    parser.add_argument('--pin-delay', type=float, default=2.0)
+    parser.add_argument('--failure-rate', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='results file (default: benchmarks/results/load-<timestamp>.json)')
+    args = parser.parse_args()
+
+    stub = DarajaStub(pin_delay=args.pin_delay, failure_rate=args.failure_rate, seed=args.seed)
+    stub_url = stub.start()
+    process = None
+    if args.target:
+        target = args.target.rstrip('/')
+    else:
+        db_url = args.db or 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='vendor-load-'), 'load.sqlite')
+        if not args.db:
+            print(f"Seeding {args.vendors} vendors into {db_url} ...")
+            seed_database(db_url, args.vendors, args.orders)
+        target, process = start_server(args, db_url, stub_url, args.port)
+
+    stats = StageStats()
+    sampler = PoolSampler(target)
+    before = scrape(target)
+    sampler.start()
+    started = time.time()
+    try:
+        mode = 'open' if args.arrival_rate else 'closed'
+        print(f"Running {mode}-loop load against {target} for {args.duration:.0f}s ...")
+        runner = run_open_loop if args.arrival_rate else run_closed_loop
+        outcomes = runner(target, stats, args, started + args.duration)
+        elapsed = time.time() - started
+        # Let in-flight callbacks land before reading the final numbers
+        time.sleep(min(args.pin_delay + 1, 10))
+        sampler.stop()
+        after = scrape(target)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        stub.stop()
+
+    for seconds in stub.callback_latencies:
+        stats.record('callback', seconds)
+    callback_errors = {k: v for k, v in stub.stats.items() if k.startswith('callback_') and k != 'callback_200'}
+    stages = stats.summary(elapsed)
+    if 'callback' in stages:
+        stages['callback']['errors'] = callback_errors
+        stages['callback']['error_rate'] = round(sum(callback_errors.values()) / stages['callback']['count'], 4)
+
+    report = {
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+        'target': target,
+        'server': None if args.target else {'kind': args.server, 'workers': args.workers, 'threads': args.threads},
+        'mode': 'open' if args.arrival_rate else 'closed',
+        'load': {'users': args.users, 'arrival_rate': args.arrival_rate, 'think_time': args.think_time,
+                 'duration': round(elapsed, 1)},
+        'journeys': dict(outcomes),
+        'journeys_per_sec': round(sum(outcomes.values()) / elapsed, 2),
+        'stages': stages,
+        'db_pool': sampler.summary(),
+        'db_pool_usage_by_stage': pool_usage_by_stage(before, after),
+        'daraja_stub': dict(stub.stats),
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, 'load-' + report['timestamp'].replace(':', '') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\nJourneys: {report['journeys']} ({report['journeys_per_sec']}/s)")
+    for stage, s in stages.items():
+        print(f"  {stage:16s} n={s['count']:<6} {s['throughput_per_sec']:>7}/s  p50={s['p50_ms']:>8}ms  "
+              f"p95={s['p95_ms']:>8}ms  p99={s['p99_ms']:>8}ms  err={s['error_rate']:.2%}")
+    print(f"  db pool: {report['db_pool']}")
+    print(f"\nWrote {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,9 @@ from flask import current_app
 
 from alembic import context
 
+from app.utils.search import FTS_TABLE
+from app.utils.spatial import RTREE_TABLE
+
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -45,6 +48,32 @@ target_db = current_app.extensions['migrate'].db
 # ... etc.
 
 
+# Objects the migrations create outside the models, which autogenerate would
+# otherwise try to drop (or, for PostgreSQL-only indexes, add on SQLite):
+# - SQLite: the FTS5 and R*Tree virtual tables and their shadow tables;
+# - PostgreSQL: the generated geog column, its GiST index and PostGIS's
+#   spatial_ref_sys table.
+UNMANAGED_TABLES = {FTS_TABLE, RTREE_TABLE, 'spatial_ref_sys'}
+UNMANAGED_TABLES.update(f'{FTS_TABLE}_{shadow}' for shadow in ('data', 'idx', 'content', 'docsize', 'config'))
+UNMANAGED_TABLES.update(f'{RTREE_TABLE}_{shadow}' for shadow in ('node', 'parent', 'rowid'))
+UNMANAGED_COLUMNS = {('vendor_locations', 'geog')}
+UNMANAGED_INDEXES = {'idx_location_geog'}
+POSTGRESQL_ONLY_INDEXES = {'idx_location_search_text_trgm'}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'table':
+        return name not in UNMANAGED_TABLES
+    if type_ == 'column':
+        return (object.table.name, name) not in UNMANAGED_COLUMNS
+    if type_ == 'index':
+        if name in UNMANAGED_INDEXES:
+            return False
+        if name in POSTGRESQL_ONLY_INDEXES:
+            return context.get_context().dialect.name == 'postgresql'
+    return True
+
+
 def get_metadata():
     if hasattr(target_db, 'metadatas'):
         return target_db.metadatas[None]
@@ -100,6 +129,7 @@ def run_migrations_online():
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
+            include_object=include_object,
             **conf_args
         )
 
@@ -0,0 +1,79 @@
+"""Record each transaction's rollup contribution
+
+Revision ID: 0ba394bd255c
+Revises: 52b08cec478c
+Create Date: 2026-10-19 21:04:17.318460
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0ba394bd255c'
+down_revision = '52b08cec478c'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+SUCCESS_STATUSES = ('COMPLETED', 'SUCCESS', 'SUCCESSFUL')
+
+
+def _is_successful(status, receipt):
+    # Frozen copy of app.utils.rollups.is_successful as of this revision
+    raw_status = str(status).upper() if status else 'FAILED'
+    return raw_status in SUCCESS_STATUSES or bool(receipt and raw_status != 'FAILED')
+
+
+def upgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rolled_bucket_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('rolled_amount', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('rolled_success', sa.Boolean(), nullable=True))
+
+    # Rows the rollup job has already counted (at or before its watermark)
+    # get the contribution it made recorded, in id order one batch at a time
+    conn = op.get_bind()
+    watermarks = sa.table('rollup_watermarks', sa.column('name', sa.String),
+                          sa.column('last_updated_at', sa.DateTime), sa.column('last_id', sa.Integer))
+    watermark = conn.execute(
+        sa.select(watermarks.c.last_updated_at, watermarks.c.last_id).where(watermarks.c.name == 'transactions')
+    ).first()
+    if watermark is None:
+        return
+
+    txns = sa.table('transactions', sa.column('id', sa.Integer), sa.column('amount', sa.Float),
+                    sa.column('status', sa.String), sa.column('mpesa_receipt_number', sa.String),
+                    sa.column('transaction_date', sa.DateTime), sa.column('created_at', sa.DateTime),
+                    sa.column('updated_at', sa.DateTime), sa.column('rolled_bucket_at', sa.DateTime),
+                    sa.column('rolled_amount', sa.Float), sa.column('rolled_success', sa.Boolean))
+    update = txns.update().where(txns.c.id == sa.bindparam('txn_id')).values(
+        rolled_bucket_at=sa.bindparam('bucket_at'), rolled_amount=sa.bindparam('txn_amount'),
+        rolled_success=sa.bindparam('success'))
+    counted = sa.tuple_(txns.c.updated_at, txns.c.id) <= sa.tuple_(
+        sa.literal(watermark.last_updated_at, sa.DateTime), sa.literal(watermark.last_id))
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(txns.c.id, txns.c.amount, txns.c.status, txns.c.mpesa_receipt_number,
+                      txns.c.transaction_date, txns.c.created_at, txns.c.updated_at)
+            .where(txns.c.id > last_id, counted)
+            .order_by(txns.c.id).limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        params = [
+            {'txn_id': row.id, 'bucket_at': row.transaction_date or row.created_at or row.updated_at,
+             'txn_amount': row.amount or 0, 'success': _is_successful(row.status, row.mpesa_receipt_number)}
+            for row in rows if not (row.status and row.status.upper() == 'PENDING')
+        ]
+        if params:
+            conn.execute(update, params)
+        last_id = rows[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_column('rolled_success')
+        batch_op.drop_column('rolled_amount')
+        batch_op.drop_column('rolled_bucket_at')
@@ -0,0 +1,29 @@
+"""Add scheduler locks
+
+Revision ID: 3996d9b1449c
+Revises: d3cb7d89aa71
+Create Date: 2026-10-19 11:26:05.904315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3996d9b1449c'
+down_revision = 'd3cb7d89aa71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('scheduler_locks',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('owner', sa.String(length=100), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('scheduler_locks')
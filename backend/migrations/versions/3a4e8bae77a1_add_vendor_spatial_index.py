@@ -0,0 +1,63 @@
+"""Add vendor spatial index
+
+Revision ID: 3a4e8bae77a1
+Revises: ab929a0c5323
+Create Date: 2026-10-19 16:20:31.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a4e8bae77a1'
+down_revision = 'ab929a0c5323'
+branch_labels = None
+depends_on = None
+
+SQLITE_RTREE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS vendor_location_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+    """CREATE TRIGGER IF NOT EXISTS vendor_location_rtree_ai AFTER INSERT ON vendor_locations BEGIN
+        INSERT INTO vendor_location_rtree VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS vendor_location_rtree_au AFTER UPDATE OF latitude, longitude ON vendor_locations BEGIN
+        UPDATE vendor_location_rtree SET min_lat = new.latitude, max_lat = new.latitude,
+            min_lon = new.longitude, max_lon = new.longitude WHERE id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS vendor_location_rtree_ad AFTER DELETE ON vendor_locations BEGIN
+        DELETE FROM vendor_location_rtree WHERE id = old.id;
+    END""",
+    # Backfill
+    "INSERT OR REPLACE INTO vendor_location_rtree SELECT id, latitude, latitude, longitude, longitude FROM vendor_locations",
+]
+
+
+def upgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == 'postgresql':
+        available = conn.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'postgis'")).first()
+        if not available:
+            # The app falls back to the haversine scan; re-run this revision once PostGIS is installed
+            print("PostGIS is not available on this server; skipping the geography column.")
+            return
+        op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+        # Generated, so adding it backfills every row and later writes need no app code
+        op.execute(
+            "ALTER TABLE vendor_locations ADD COLUMN IF NOT EXISTS geog geography(Point, 4326) "
+            "GENERATED ALWAYS AS (ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography) STORED"
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS idx_location_geog ON vendor_locations USING gist (geog)")
+    elif conn.dialect.name == 'sqlite':
+        for statement in SQLITE_RTREE:
+            op.execute(statement)
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS idx_location_geog")
+        op.execute("ALTER TABLE vendor_locations DROP COLUMN IF EXISTS geog")
+    elif conn.dialect.name == 'sqlite':
+        for trigger in ('vendor_location_rtree_ai', 'vendor_location_rtree_au', 'vendor_location_rtree_ad'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS vendor_location_rtree")
@@ -0,0 +1,29 @@
+"""Add rate limit counters
+
+Revision ID: 4a07eced584c
+Revises: 3996d9b1449c
+Create Date: 2026-10-19 12:41:17.330948
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a07eced584c'
+down_revision = '3996d9b1449c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rate_limit_counters',
+    sa.Column('key', sa.String(length=200), nullable=False),
+    sa.Column('window_start', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('key', 'window_start')
+    )
+
+
+def downgrade():
+    op.drop_table('rate_limit_counters')
@@ -0,0 +1,67 @@
+"""Add vendor detail document
+
+Revision ID: 52b08cec478c
+Revises: f7300a001c2a
+Create Date: 2026-10-19 18:12:40.552913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+
+
+# revision identifiers, used by Alembic.
+revision = '52b08cec478c'
+down_revision = 'f7300a001c2a'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def _detail_doc(address, menu_items):
+    # Frozen copy of app.utils.vendor_detail.build_detail_doc as of this revision
+    formatted_menu = []
+    if menu_items and isinstance(menu_items, list):
+        for position, i in enumerate(menu_items):
+            if isinstance(i, dict):
+                formatted_menu.append({
+                    'id': i.get('id', str(position)),
+                    'name': i.get('name', 'Unknown'),
+                    'price': i.get('price', 0),
+                    'description': i.get('desc', ''),
+                    'image': i.get('image', None),
+                    'category': 'main'
+                })
+    return json.dumps({
+        'address': address,
+        'menuItems': formatted_menu,
+        'categories': [{'id': 'all', 'name': 'All', 'count': len(formatted_menu)}]
+    }, separators=(',', ':'), sort_keys=True)
+
+
+def upgrade():
+    with op.batch_alter_table('vendor_locations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('detail_doc', sa.Text(), nullable=True))
+
+    # Backfill in id order, one batch at a time
+    conn = op.get_bind()
+    locations = sa.table('vendor_locations', sa.column('id', sa.Integer), sa.column('address', sa.String),
+                         sa.column('menu_items', sa.JSON), sa.column('detail_doc', sa.Text))
+    update = locations.update().where(locations.c.id == sa.bindparam('location_id')).values(
+        detail_doc=sa.bindparam('doc'))
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(locations.c.id, locations.c.address, locations.c.menu_items)
+            .where(locations.c.id > last_id).order_by(locations.c.id).limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        conn.execute(update, [{'location_id': row.id, 'doc': _detail_doc(row.address, row.menu_items)} for row in rows])
+        last_id = rows[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table('vendor_locations', schema=None) as batch_op:
+        batch_op.drop_column('detail_doc')
@@ -0,0 +1,33 @@
+"""Add user revocations
+
+Revision ID: 9c99a8d90148
+Revises: 0ba394bd255c
+Create Date: 2026-10-19 21:38:52.604117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c99a8d90148'
+down_revision = '0ba394bd255c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_revocations',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('revoked_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    with op.batch_alter_table('user_revocations', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_revocations_revoked_at'), ['revoked_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_revocations', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_revocations_revoked_at'))
+
+    op.drop_table('user_revocations')
@@ -0,0 +1,91 @@
+"""Add vendor search text
+
+Revision ID: ab929a0c5323
+Revises: 4a07eced584c
+Create Date: 2026-10-19 15:02:48.671205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ab929a0c5323'
+down_revision = '4a07eced584c'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS vendor_search USING fts5("
+    "search_text, content='vendor_locations', content_rowid='id', tokenize='trigram')",
+    """CREATE TRIGGER IF NOT EXISTS vendor_search_ai AFTER INSERT ON vendor_locations BEGIN
+        INSERT INTO vendor_search(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS vendor_search_ad AFTER DELETE ON vendor_locations BEGIN
+        INSERT INTO vendor_search(vendor_search, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS vendor_search_au AFTER UPDATE OF search_text ON vendor_locations BEGIN
+        INSERT INTO vendor_search(vendor_search, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+        INSERT INTO vendor_search(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+    "INSERT INTO vendor_search(vendor_search) VALUES ('rebuild')",
+]
+
+
+def _search_text(menu_items):
+    # Frozen copy of app.utils.search.menu_search_text as of this revision
+    if not isinstance(menu_items, list):
+        return None
+    parts = []
+    for entry in menu_items:
+        if isinstance(entry, dict):
+            parts.append(str(entry.get('name') or '').lower())
+            parts.append(str(entry.get('desc') or '').lower())
+        elif isinstance(entry, str):
+            parts.append(entry.lower())
+    return '\n'.join(parts) if parts else None
+
+
+def upgrade():
+    with op.batch_alter_table('vendor_locations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_text', sa.Text(), nullable=True))
+
+    # Backfill from menu_items in id order, one batch at a time
+    conn = op.get_bind()
+    locations = sa.table('vendor_locations', sa.column('id', sa.Integer), sa.column('menu_items', sa.JSON),
+                         sa.column('search_text', sa.Text))
+    update = locations.update().where(locations.c.id == sa.bindparam('location_id')).values(
+        search_text=sa.bindparam('text'))
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(locations.c.id, locations.c.menu_items)
+            .where(locations.c.id > last_id).order_by(locations.c.id).limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        conn.execute(update, [{'location_id': row.id, 'text': _search_text(row.menu_items)} for row in rows])
+        last_id = rows[-1].id
+
+    if conn.dialect.name == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index('idx_location_search_text_trgm', 'vendor_locations', ['search_text'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'})
+    elif conn.dialect.name == 'sqlite':
+        for statement in SQLITE_FTS:
+            op.execute(statement)
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == 'postgresql':
+        op.drop_index('idx_location_search_text_trgm', table_name='vendor_locations')
+    elif conn.dialect.name == 'sqlite':
+        for trigger in ('vendor_search_ai', 'vendor_search_ad', 'vendor_search_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS vendor_search")
+
+    with op.batch_alter_table('vendor_locations', schema=None) as batch_op:
+        batch_op.drop_column('search_text')
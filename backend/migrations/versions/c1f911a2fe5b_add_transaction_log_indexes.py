@@ -0,0 +1,33 @@
+"""Add transaction log indexes
+
+Revision ID: c1f911a2fe5b
+Revises: 7e9d23e4f08c
+Create Date: 2026-10-19 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c1f911a2fe5b'
+down_revision = '7e9d23e4f08c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pagination orders by (transaction_date, id), so the date must be set
+    op.execute("UPDATE transactions SET transaction_date = created_at WHERE transaction_date IS NULL")
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.create_index('idx_txn_date_id', ['transaction_date', 'id'], unique=False)
+        batch_op.create_index('idx_txn_vendor_date', ['vendor_id', 'transaction_date', 'id'], unique=False)
+        batch_op.create_index('idx_txn_status_date', ['status', 'transaction_date', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('idx_txn_status_date')
+        batch_op.drop_index('idx_txn_vendor_date')
+        batch_op.drop_index('idx_txn_date_id')
@@ -0,0 +1,61 @@
+"""Add transaction rollups
+
+Revision ID: d3cb7d89aa71
+Revises: c1f911a2fe5b
+Create Date: 2026-10-19 10:03:51.627719
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3cb7d89aa71'
+down_revision = 'c1f911a2fe5b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('transaction_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('vendor_id', sa.Integer(), nullable=False),
+    sa.Column('granularity', sa.String(length=5), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('txn_count', sa.Integer(), nullable=False),
+    sa.Column('amount_sum', sa.Float(), nullable=False),
+    sa.Column('success_count', sa.Integer(), nullable=False),
+    sa.Column('success_amount', sa.Float(), nullable=False),
+    sa.Column('failure_count', sa.Integer(), nullable=False),
+    sa.CheckConstraint("granularity IN ('hour', 'day')", name='check_rollup_granularity'),
+    sa.ForeignKeyConstraint(['vendor_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('vendor_id', 'granularity', 'bucket_start', name='uq_rollup_bucket')
+    )
+    with op.batch_alter_table('transaction_rollups', schema=None) as batch_op:
+        batch_op.create_index('idx_rollup_granularity_bucket', ['granularity', 'bucket_start'], unique=False)
+
+    op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('last_updated_at', sa.DateTime(), nullable=False),
+    sa.Column('last_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    # The rollup job follows updated_at, which used to stay NULL until the first update
+    op.execute("UPDATE transactions SET updated_at = COALESCE(transaction_date, created_at) WHERE updated_at IS NULL")
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.create_index('idx_txn_updated_id', ['updated_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('idx_txn_updated_id')
+
+    op.drop_table('rollup_watermarks')
+
+    with op.batch_alter_table('transaction_rollups', schema=None) as batch_op:
+        batch_op.drop_index('idx_rollup_granularity_bucket')
+
+    op.drop_table('transaction_rollups')
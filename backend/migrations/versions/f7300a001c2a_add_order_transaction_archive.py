@@ -0,0 +1,78 @@
+"""Add order and transaction archive tables
+
+Revision ID: f7300a001c2a
+Revises: 3a4e8bae77a1
+Create Date: 2026-10-19 17:05:12.318840
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7300a001c2a'
+down_revision = '3a4e8bae77a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('orders_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('order_number', sa.String(length=30), nullable=False),
+    sa.Column('vendor_id', sa.Integer(), nullable=False),
+    sa.Column('customer_phone', sa.String(length=15), nullable=False),
+    sa.Column('items', sa.JSON(), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('delivery_location', sa.String(length=255), nullable=True),
+    sa.Column('customer_latitude', sa.Float(), nullable=True),
+    sa.Column('customer_longitude', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('orders_archive', schema=None) as batch_op:
+        batch_op.create_index('idx_order_archive_vendor_created', ['vendor_id', 'created_at', 'id'], unique=False)
+
+    op.create_table('transactions_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('vendor_id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=True),
+    sa.Column('customer_phone', sa.String(length=15), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('checkout_request_id', sa.String(length=100), nullable=True),
+    sa.Column('mpesa_receipt_number', sa.String(length=50), nullable=True),
+    sa.Column('transaction_date', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('transactions_archive', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_transactions_archive_order_id'), ['order_id'], unique=False)
+        batch_op.create_index('idx_txn_archive_date_id', ['transaction_date', 'id'], unique=False)
+        batch_op.create_index('idx_txn_archive_vendor_date', ['vendor_id', 'transaction_date', 'id'], unique=False)
+        batch_op.create_index('idx_txn_archive_status_date', ['status', 'transaction_date', 'id'], unique=False)
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.create_index('idx_txn_order', ['order_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('idx_txn_order')
+
+    with op.batch_alter_table('transactions_archive', schema=None) as batch_op:
+        batch_op.drop_index('idx_txn_archive_status_date')
+        batch_op.drop_index('idx_txn_archive_vendor_date')
+        batch_op.drop_index('idx_txn_archive_date_id')
+        batch_op.drop_index(batch_op.f('ix_transactions_archive_order_id'))
+
+    op.drop_table('transactions_archive')
+
+    with op.batch_alter_table('orders_archive', schema=None) as batch_op:
+        batch_op.drop_index('idx_order_archive_vendor_created')
+
+    op.drop_table('orders_archive')
@@ -1,46 +1,98 @@
-import time
 from datetime import datetime
 from app import create_app, db
-from app.models import VendorLocation
+from app.utils.archival import archive_old_rows
+from app.utils.auto_close import AutoCloser
+from app.utils.jobs import Job, JobRunner, make_leader_lock, make_owner_id
+from app.utils.metrics import registry, serve_metrics
+from app.utils.reconciliation import expire_pending_payments
+from app.utils.rollups import refresh_rollups
 import os
 
-app = create_app(os.getenv('FLASK_CONFIG') or 'default')
+app = create_app(os.getenv('FLASK_CONFIG') or 'default', blueprints=())
+
+def build_runner(app):
+    """
+    Registers the background jobs. Start as many scheduler processes as you
+    like for HA: only the one holding the leader lock runs them.
+    """
+    cfg = app.config
+    with app.app_context():
+        engine = db.engine
+    lock = make_leader_lock(engine, 'scheduler', make_owner_id(), ttl=cfg['SCHEDULER_LOCK_TTL'])
+    runner = JobRunner(app, lock, max_sleep=max(cfg['SCHEDULER_LOCK_TTL'] // 3, 1))
+
+    # --- Auto-close: deadline job woken at the earliest auto_close_at ---
+    closer = AutoCloser(refresh_interval=cfg['AUTO_CLOSE_REFRESH_INTERVAL'])
+
+    def auto_close():
+        if closer.next_refresh is None or closer.next_refresh <= datetime.utcnow():
+            closer.refresh()
+        if closer.due():
+            closed = closer.close_due()
+            if closed:
+                m = closer.metrics()
+                print(f"Scheduler: Auto-closed {len(closed)} vendors "
+                      f"(lag last={m['last_lag']:.2f}s max={m['lag_max']:.2f}s).")
+
+    runner.add(Job('auto_close', auto_close, next_run=closer.next_wakeup))
+
+    # --- Payment reconciliation: expire STK pushes that never called back ---
+    def reconcile_payments():
+        expired = expire_pending_payments(cfg['PAYMENT_PENDING_TIMEOUT'])
+        if expired:
+            print(f"Scheduler: Expired {expired} pending payments.")
+
+    runner.add(Job('reconcile_payments', reconcile_payments, interval=cfg['RECONCILE_INTERVAL']))
+
+    # --- Rollups: fold new payments into the admin stats ---
+    def rollups():
+        processed = refresh_rollups()
+        if processed:
+            print(f"Scheduler: Rolled up {processed} transactions.")
+
+    runner.add(Job('rollups', rollups, interval=cfg['ROLLUP_INTERVAL']))
+
+    # --- Archival: move settled orders/transactions to the cold tables ---
+    def archive():
+        moved = archive_old_rows(cfg['ARCHIVE_AFTER_DAYS'], batch_size=cfg['ARCHIVE_BATCH_SIZE'],
+                                 max_batches=cfg['ARCHIVE_MAX_BATCHES'])
+        if moved['orders'] or moved['transactions']:
+            print(f"Scheduler: Archived {moved['orders']} orders, {moved['transactions']} transactions.")
+
+    runner.add(Job('archive', archive, interval=cfg['ARCHIVE_INTERVAL']))
+
+    register_metrics(runner, closer)
+    return runner
+
+def register_metrics(runner, closer):
+    """Exposes job and auto-close stats through the metrics registry."""
+    def job_stat(key):
+        return lambda: {(name, ): job.stats[key] for name, job in runner.jobs.items()}
+
+    registry.gauge('scheduler_is_leader', 'Whether this process holds the scheduler lock.',
+                   fn=lambda: {(): int(runner.is_leader)})
+    registry.gauge('scheduler_job_runs', 'Job runs since start.', ('job',), fn=job_stat('runs'))
+    registry.gauge('scheduler_job_failures', 'Failed job runs since start.', ('job',), fn=job_stat('failures'))
+    registry.gauge('scheduler_job_last_duration_seconds', 'Duration of the last run.', ('job',),
+                   fn=job_stat('last_duration'))
+    registry.gauge('scheduler_job_max_duration_seconds', 'Longest run since start.', ('job',),
+                   fn=job_stat('max_duration'))
+    registry.gauge('auto_close_closed', 'Vendors auto-closed since start.',
+                   fn=lambda: {(): closer.metrics()['closed']})
+    registry.gauge('auto_close_lag_seconds', 'Delay between auto_close_at and the actual close.', ('stat',),
+                   fn=lambda: {(stat, ): closer.metrics()[f'lag_{stat}'] for stat in ('avg', 'max')})
 
 def run_scheduler():
     """
-    Dedicated process to monitor vendor inactivity.
+    Dedicated process for background jobs.
     Run this as a separate worker in production.
     """
-    print("Scheduler: Starting vendor auto-close monitor...")
-    
-    while True:
-        with app.app_context():
-            try:
-                now = datetime.utcnow()
-                # Find vendors that are OPEN and past their closing time
-                expired_locations = VendorLocation.query.filter(
-                    VendorLocation.auto_close_at.isnot(None),
-                    VendorLocation.auto_close_at <= now,
-                    VendorLocation.is_open == True
-                ).all()
-
-                if expired_locations:
-                    count = 0
-                    for location in expired_locations:
-                        location.is_open = False
-                        location.auto_close_at = None
-                        location.updated_at = now
-                        count += 1
-                    
-                    db.session.commit()
-                    print(f"[{now}] Scheduler: Auto-closed {count} vendors.")
-                
-            except Exception as e:
-                print(f"Scheduler Error: {e}")
-                db.session.rollback()
-        
-        # Check every 5 minutes
-        time.sleep(300)
+    print("Scheduler: Starting job runner...")
+    runner = build_runner(app)
+    port = os.getenv('SCHEDULER_METRICS_PORT')
+    if port:
+        serve_metrics(int(port))
+    runner.run_forever()
 
 if __name__ == "__main__":
-    run_scheduler()
\ No newline at end of file
+    run_scheduler()
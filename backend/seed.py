@@ -1,9 +1,11 @@
 from app import create_app, db
 from app.models import User  # Make sure this import path matches your project structure
+from app.seed_data import seed
 from werkzeug.security import generate_password_hash
+import argparse
 
 # Initialize the Flask app context
-app = create_app()
+app = create_app(blueprints=())
 
 def seed_admin():
     with app.app_context():
@@ -44,5 +46,26 @@ def seed_admin():
             db.session.rollback()
             print(f"❌ Failed to seed admin: {str(e)}")
 
+def seed_synthetic(vendors, orders, random_seed, batch_size):
+    """Bulk-loads a synthetic Nairobi dataset (see app/seed_data.py)."""
+    with app.app_context():
+        print(f"Seeding {vendors} vendors and {orders} orders...")
+        summary = seed(db.engine, vendors=vendors, orders=orders, seed=random_seed, batch_size=batch_size,
+                       hash_method=app.config['PASSWORD_HASH_METHOD'])
+        print(f"✅ Loaded {summary['counts']} in {summary['seconds']}s")
+
 if __name__ == '__main__':
-    seed_admin()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Seed the database.')
+    sub = parser.add_subparsers(dest='command')
+    sub.add_parser('admin', help='create the admin user (default)')
+    synthetic = sub.add_parser('synthetic', help='bulk-load synthetic vendors, menus, orders and payments')
+    synthetic.add_argument('--vendors', type=int, default=1000)
+    synthetic.add_argument('--orders', type=int, default=10000)
+    synthetic.add_argument('--seed', type=int, default=1)
+    synthetic.add_argument('--batch-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.command == 'synthetic':
+        seed_synthetic(args.vendors, args.orders, args.seed, args.batch_size)
+    else:
+        seed_admin()
\ No newline at end of file
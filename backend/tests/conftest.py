@@ -0,0 +1,80 @@
+import os
+
+# Config reads DATABASE_URL at import time, so point it at SQLite before the
+# app package is imported.
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import db
+from app.models import User, VendorLocation
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    app.config['JWT_SECRET_KEY'] = 'test-jwt-secret-key-with-enough-length'
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def make_vendor(app):
+    """Creates a vendor (optionally checked in) and returns (user, headers)."""
+    counter = {'n': 0}
+
+    def _make(lat=-1.2864, lon=36.8172, checked_in=True, menu=None, name=None):
+        counter['n'] += 1
+        n = counter['n']
+        user = User(
+            username=f'vendor{n}',
+            email=f'vendor{n}@test.com',
+            phone_number=f'+2547100000{n:02d}',
+            password_hash='x',
+            role='vendor',
+            business_name=name or f'Vendor {n}'
+        )
+        db.session.add(user)
+        db.session.commit()
+
+        if checked_in:
+            location = VendorLocation(
+                vendor_id=user.id,
+                latitude=lat,
+                longitude=lon,
+                menu_items=menu if menu is not None else [{'name': 'Samosa', 'price': 50}]
+            )
+            location.check_in()
+            db.session.add(location)
+            db.session.commit()
+
+        token = create_access_token(identity=str(user.id), additional_claims={'role': 'vendor'})
+        return user, {'Authorization': f'Bearer {token}'}
+
+    return _make
+
+
+@pytest.fixture
+def admin_headers(app):
+    admin = User(
+        username='admin',
+        email='admin@test.com',
+        phone_number='+254700000001',
+        password_hash='x',
+        role='admin'
+    )
+    db.session.add(admin)
+    db.session.commit()
+    token = create_access_token(identity=str(admin.id), additional_claims={'role': 'admin'})
+    return {'Authorization': f'Bearer {token}'}
@@ -0,0 +1,214 @@
+import json
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.models import Order, Transaction
+
+
+def _seed_transactions(vendor, count=7):
+    base = datetime(2026, 3, 1, 12, 0, 0)
+    for i in range(count):
+        order = Order(
+            order_number=f'ORD-TEST-{i:04d}',
+            vendor_id=vendor.id,
+            customer_phone='254711000000',
+            items=[],
+            total_amount=100 + i,
+            status='Paid' if i % 2 == 0 else 'Payment Failed'
+        )
+        db.session.add(order)
+        db.session.flush()
+        db.session.add(Transaction(
+            vendor_id=vendor.id,
+            order_id=order.id,
+            customer_phone='254711000000',
+            amount=100 + i,
+            status='SUCCESSFUL' if i % 2 == 0 else 'FAILED',
+            mpesa_receipt_number=f'RCP{i}' if i % 2 == 0 else None,
+            transaction_date=base + timedelta(hours=i)
+        ))
+    db.session.commit()
+
+
+def test_logs_keyset_pagination(client, make_vendor, admin_headers):
+    vendor, _ = make_vendor(name='Mama Mboga')
+    _seed_transactions(vendor)
+
+    seen = []
+    cursor = None
+    while True:
+        url = '/api/admin/logs?limit=3' + (f'&cursor={cursor}' if cursor else '')
+        data = client.get(url, headers=admin_headers).get_json()
+        seen.extend(data['logs'])
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+
+    assert len(seen) == 7
+    timestamps = [log['timestamp'] for log in seen]
+    assert timestamps == sorted(timestamps, reverse=True)
+    assert seen[0]['vendor_name'] == 'Mama Mboga'
+    assert seen[0]['order_id'] == 'ORD-TEST-0006'
+
+
+def test_logs_filters(client, make_vendor, admin_headers):
+    vendor, _ = make_vendor()
+    other, _ = make_vendor()
+    _seed_transactions(vendor)
+
+    data = client.get('/api/admin/logs?status=Successful', headers=admin_headers).get_json()
+    assert len(data['logs']) == 4
+    assert all(log['status'] == 'Successful' for log in data['logs'])
+
+    data = client.get('/api/admin/logs?status=failed&from=2026-03-01T14:00:00', headers=admin_headers).get_json()
+    assert [log['amount'] for log in data['logs']] == [105, 103]
+
+    data = client.get(f'/api/admin/logs?vendor_id={other.id}', headers=admin_headers).get_json()
+    assert data['logs'] == []
+
+    assert client.get('/api/admin/logs?from=yesterday', headers=admin_headers).status_code == 400
+
+
+def test_logs_require_admin(client, make_vendor):
+    _, vendor_headers = make_vendor()
+    assert client.get('/api/admin/logs', headers=vendor_headers).status_code == 403
+    assert client.get('/api/admin/logs/export', headers=vendor_headers).status_code == 403
+
+
+def test_logs_export_streams(client, make_vendor, admin_headers):
+    vendor, _ = make_vendor()
+    _seed_transactions(vendor)
+
+    response = client.get('/api/admin/logs/export?status=successful', headers=admin_headers)
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(lines) == 4
+
+    response = client.get('/api/admin/logs/export?format=csv', headers=admin_headers)
+    assert response.mimetype == 'text/csv'
+    rows = response.get_data(as_text=True).strip().splitlines()
+    assert rows[0].startswith('id,vendor_id,vendor_name')
+    assert len(rows) == 8
+
+
+def test_rollups_are_incremental(client, make_vendor, admin_headers):
+    from app.utils.rollups import refresh_rollups
+    from app.models import TransactionRollup
+
+    vendor, _ = make_vendor()
+    _seed_transactions(vendor, count=4)
+    now = datetime.utcnow() + timedelta(minutes=1)
+    assert refresh_rollups(now=now) == 4
+    # Nothing new past the watermark
+    assert refresh_rollups(now=now) == 0
+
+    txn = Transaction(vendor_id=vendor.id, customer_phone='254711000000', amount=500,
+                      status='PENDING', transaction_date=datetime(2026, 3, 1, 12, 30))
+    db.session.add(txn)
+    db.session.commit()
+    assert refresh_rollups(now=now + timedelta(minutes=1)) == 1
+
+    day = TransactionRollup.query.filter_by(vendor_id=vendor.id, granularity='day').one()
+    assert (day.txn_count, day.success_count, day.failure_count) == (4, 2, 2)
+
+    # The callback settles the pending payment; only that change is folded in
+    txn.status = 'SUCCESSFUL'
+    db.session.commit()
+    assert refresh_rollups(now=now + timedelta(minutes=2)) == 1
+
+    db.session.expire_all()
+    day = TransactionRollup.query.filter_by(vendor_id=vendor.id, granularity='day').one()
+    assert (day.txn_count, day.success_count, day.success_amount) == (5, 3, 100 + 102 + 500)
+    assert TransactionRollup.query.filter_by(vendor_id=vendor.id, granularity='hour').count() == 4
+
+
+def test_rollups_replace_a_changed_contribution(client, make_vendor):
+    from app.utils.rollups import refresh_rollups
+    from app.models import TransactionRollup
+
+    vendor, _ = make_vendor()
+    txn = Transaction(vendor_id=vendor.id, customer_phone='254711000000', amount=100,
+                      status='FAILED', transaction_date=datetime(2026, 3, 1, 12, 30))
+    db.session.add(txn)
+    db.session.commit()
+    now = datetime.utcnow() + timedelta(minutes=1)
+    assert refresh_rollups(now=now) == 1
+
+    # A late success callback, then Safaricom repeating it: each rewrites
+    # status/transaction_date, and each replaces what was counted before
+    for minute, paid_at in enumerate((datetime(2026, 3, 2, 9, 0), datetime(2026, 3, 2, 9, 5)), start=2):
+        txn.status = 'SUCCESSFUL'
+        txn.mpesa_receipt_number = 'RCP-LATE'
+        txn.transaction_date = paid_at
+        db.session.commit()
+        assert refresh_rollups(now=now + timedelta(minutes=minute)) == 1
+
+    db.session.expire_all()
+    days = {day.bucket_start: day for day in TransactionRollup.query.filter_by(vendor_id=vendor.id, granularity='day')}
+    first, second = days[datetime(2026, 3, 1)], days[datetime(2026, 3, 2)]
+    assert (first.txn_count, first.amount_sum, first.failure_count) == (0, 0, 0)
+    assert (second.txn_count, second.amount_sum, second.success_count, second.failure_count) == (1, 100, 1, 0)
+    hours = TransactionRollup.query.filter_by(vendor_id=vendor.id, granularity='hour', txn_count=1).all()
+    assert [hour.bucket_start for hour in hours] == [datetime(2026, 3, 2, 9)]
+
+
+def test_stats_read_from_rollups(client, make_vendor, admin_headers):
+    from app.utils.rollups import refresh_rollups
+
+    vendor, _ = make_vendor(name='Kibanda')
+    _seed_transactions(vendor, count=4)
+    refresh_rollups(now=datetime.utcnow() + timedelta(minutes=1))
+
+    data = client.get('/api/admin/stats?from=2026-03-01&to=2026-03-02', headers=admin_headers).get_json()
+    assert data['totals']['transactions'] == 4
+    assert data['totals']['revenue'] == 100 + 102
+    assert data['totals']['success_rate'] == 0.5
+    assert data['vendors'][0]['vendor_name'] == 'Kibanda'
+    assert len(data['series']) == 1
+
+    data = client.get('/api/admin/stats?granularity=hour&from=2026-03-01&to=2026-03-02', headers=admin_headers).get_json()
+    assert [b['transactions'] for b in data['series']] == [1, 1, 1, 1]
+
+    assert client.get('/api/admin/stats?granularity=week', headers=admin_headers).status_code == 400
+
+
+def test_vendor_clusters(client, make_vendor, admin_headers):
+    from app.utils.clustering import cluster_index
+    cluster_index.loaded_at = None
+
+    # Two vendors in the CBD, one in Westlands
+    make_vendor(lat=-1.2864, lon=36.8172)
+    make_vendor(lat=-1.2870, lon=36.8180)
+    make_vendor(lat=-1.2676, lon=36.8108)
+    bbox = 'bbox=36.0,-2.0,37.5,-0.5'
+
+    data = client.get(f'/api/admin/vendors/clusters?{bbox}&zoom=5', headers=admin_headers).get_json()
+    assert sum(c['count'] for c in data['clusters']) == 3
+    assert len(data['clusters']) == 1
+    bounds = data['clusters'][0]['bounds']
+    assert bounds['south'] == -1.2870 and bounds['north'] == -1.2676
+
+    data = client.get(f'/api/admin/vendors/clusters?{bbox}&zoom=17', headers=admin_headers).get_json()
+    assert data['clusters'] == []
+    assert len(data['vendors']) == 3
+
+    assert client.get('/api/admin/vendors/clusters?zoom=5', headers=admin_headers).status_code == 400
+
+
+def test_vendor_clusters_follow_checkin_and_close(client, make_vendor, admin_headers):
+    from app.utils.clustering import cluster_index
+    cluster_index.loaded_at = None
+    bbox = 'bbox=36.0,-2.0,37.5,-0.5'
+
+    _, headers = make_vendor(lat=-1.2864, lon=36.8172)
+    client.get(f'/api/admin/vendors/clusters?{bbox}&zoom=5', headers=admin_headers)
+
+    new_vendor, new_headers = make_vendor(checked_in=False)
+    client.post('/api/vendor/checkin', headers=new_headers, json={'latitude': -1.30, 'longitude': 36.80})
+    data = client.get(f'/api/admin/vendors/clusters?{bbox}&zoom=5', headers=admin_headers).get_json()
+    assert sum(c['count'] for c in data['clusters']) == 2
+
+    client.post('/api/vendor/close', headers=headers)
+    data = client.get(f'/api/admin/vendors/clusters?{bbox}&zoom=5', headers=admin_headers).get_json()
+    assert data['clusters'][0]['count'] == 1
+    assert data['clusters'][0]['vendor_id'] == new_vendor.id
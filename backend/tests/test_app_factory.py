@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+from app import create_app
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_building_the_app_does_not_import_external_clients():
+    code = ("import sys; from app import create_app; create_app('production'); "
+            "print(','.join(m for m in ('cloudinary', 'requests', 'dotenv') if m in sys.modules))")
+    env = dict(os.environ, DATABASE_URL='sqlite://')
+    result = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ''
+
+
+def test_blueprint_selection():
+    app = create_app(blueprints=['customer'])
+    blueprints = {rule.endpoint.split('.')[0] for rule in app.url_map.iter_rules() if '.' in rule.endpoint}
+    assert blueprints == {'customer'}
+
+    assert not any(rule.endpoint.startswith(('admin.', 'vendor.'))
+                   for rule in create_app(blueprints=()).url_map.iter_rules())
@@ -0,0 +1,136 @@
+import json
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.models import Order, OrderArchive, Transaction, TransactionArchive
+from app.utils.archival import archive_old_rows
+from app.utils.rollups import refresh_rollups
+
+NOW = datetime(2026, 6, 1, 12, 0, 0)
+
+
+def _add_order(vendor, n, days_ago, status='Paid', txn_status='SUCCESSFUL'):
+    created = NOW - timedelta(days=days_ago, minutes=n)
+    order = Order(order_number=f'ORD-ARC-{n:04d}', vendor_id=vendor.id, customer_phone='254711000000',
+                  items=[{'name': 'Chai', 'price': 30, 'quantity': 1}], total_amount=30,
+                  status=status, created_at=created)
+    db.session.add(order)
+    db.session.flush()
+    if txn_status:
+        db.session.add(Transaction(
+            vendor_id=vendor.id, order_id=order.id, customer_phone='254711000000', amount=30,
+            checkout_request_id=f'ws_CO_ARC{n}', status=txn_status,
+            mpesa_receipt_number=f'ARC{n}' if txn_status == 'SUCCESSFUL' else None,
+            transaction_date=created, created_at=created, updated_at=created))
+    return order
+
+
+def _history(vendor, old=6, recent=4):
+    """`old` settled orders 60+ days back and `recent` ones from the last week."""
+    for n in range(old):
+        _add_order(vendor, n, 60 + n)
+    for n in range(old, old + recent):
+        _add_order(vendor, n, n - old)
+    db.session.commit()
+    refresh_rollups(now=NOW)
+
+
+def test_archive_moves_settled_rows_in_batches(app, make_vendor):
+    vendor, _ = make_vendor()
+    _history(vendor)
+    _add_order(vendor, 100, 90, status='Pending Payment', txn_status='PENDING')    # not settled
+    _add_order(vendor, 101, 90, status='New Order', txn_status=None)                # never paid
+    db.session.commit()
+
+    moved = archive_old_rows(30, batch_size=2, max_batches=2, now=NOW)
+    assert moved == {'orders': 4, 'transactions': 4}
+
+    moved = archive_old_rows(30, batch_size=2, now=NOW)
+    assert moved == {'orders': 2, 'transactions': 2}
+    assert archive_old_rows(30, now=NOW) == {'orders': 0, 'transactions': 0}
+
+    assert Order.query.count() == 6
+    assert Transaction.query.count() == 5
+    assert OrderArchive.query.count() == 6
+    archived = db.session.get(TransactionArchive, 1)
+    assert archived.mpesa_receipt_number == 'ARC0' and archived.archived_at == NOW
+
+
+def test_archive_waits_for_rollups(app, make_vendor):
+    vendor, _ = make_vendor()
+    _add_order(vendor, 0, 60)
+    db.session.commit()
+
+    # The stats haven't counted it yet
+    assert archive_old_rows(30, now=NOW) == {'orders': 0, 'transactions': 0}
+    refresh_rollups(now=NOW)
+    assert archive_old_rows(30, now=NOW) == {'orders': 1, 'transactions': 1}
+
+
+def test_logs_page_through_hot_and_archive(client, make_vendor, admin_headers):
+    vendor, _ = make_vendor()
+    _history(vendor)
+    archive_old_rows(30, now=NOW)
+
+    # Newest page is served from the hot table alone
+    data = client.get('/api/admin/logs?limit=3', headers=admin_headers).get_json()
+    assert [log['receipt'] for log in data['logs']] == ['ARC6', 'ARC7', 'ARC8']
+
+    seen, cursor = [], None
+    while True:
+        url = '/api/admin/logs?limit=3' + (f'&cursor={cursor}' if cursor else '')
+        data = client.get(url, headers=admin_headers).get_json()
+        seen.extend(data['logs'])
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+    assert [log['receipt'] for log in seen] == [f'ARC{n}' for n in (6, 7, 8, 9, 0, 1, 2, 3, 4, 5)]
+    assert seen[4]['order_id'] == 'ORD-ARC-0000'
+
+    since = (NOW - timedelta(days=62)).isoformat()
+    data = client.get(f'/api/admin/logs?from={since}', headers=admin_headers).get_json()
+    assert len(data['logs']) == 6
+
+    response = client.get('/api/admin/logs/export', headers=admin_headers)
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [log['receipt'] for log in lines] == [log['receipt'] for log in seen]
+
+
+def test_vendor_orders_page_into_archive(client, make_vendor):
+    vendor, headers = make_vendor()
+    _history(vendor)
+    archive_old_rows(30, now=NOW)
+
+    # A full page of live orders newer than anything archived: hot table only
+    data = client.get('/api/vendor/orders?limit=3', headers=headers).get_json()
+    assert [order['mpesa_receipt_number'] for order in data['orders']] == ['ARC6', 'ARC7', 'ARC8']
+
+    seen, cursor = [], None
+    while True:
+        url = '/api/vendor/orders?limit=3' + (f'&cursor={cursor}' if cursor else '')
+        data = client.get(url, headers=headers).get_json()
+        seen.extend(data['orders'])
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+    assert [order['mpesa_receipt_number'] for order in seen] == [f'ARC{n}' for n in (6, 7, 8, 9, 0, 1, 2, 3, 4, 5)]
+
+    # The default page holds everything here, archived orders included
+    assert len(client.get('/api/vendor/orders', headers=headers).get_json()['orders']) == 10
+
+    since = (NOW - timedelta(days=61, minutes=5)).isoformat()
+    history = client.get(f'/api/vendor/orders?from={since}', headers=headers).get_json()['orders']
+    assert [order['mpesa_receipt_number'] for order in history] == ['ARC6', 'ARC7', 'ARC8', 'ARC9', 'ARC0', 'ARC1']
+
+    assert client.get('/api/vendor/orders?from=yesterday', headers=headers).status_code == 400
+    assert client.get('/api/vendor/orders?cursor=bogus', headers=headers).status_code == 400
+
+
+def test_standalone_transaction_without_date_archived(app, make_vendor):
+    vendor, _ = make_vendor()
+    old = NOW - timedelta(days=60)
+    db.session.add(Transaction(vendor_id=vendor.id, customer_phone='254711000000', amount=30,
+                               status='FAILED', transaction_date=None, created_at=old, updated_at=old))
+    db.session.commit()
+    refresh_rollups(now=NOW)
+
+    assert archive_old_rows(30, now=NOW) == {'orders': 0, 'transactions': 1}
@@ -0,0 +1,158 @@
+import time
+from flask_jwt_extended import create_access_token, decode_token
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+from app.extensions import db
+from app.models import User
+
+
+def _vendor(email='mama@test.com', password='Vendor123!'):
+    user = User(username='mama', email=email, phone_number='+254722000000',
+                password_hash=generate_password_hash(password), role='vendor', business_name='Mama Oliech')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_login_embeds_role_claim(client):
+    _vendor()
+    response = client.post('/api/auth/login', json={'email': 'mama@test.com', 'password': 'Vendor123!'})
+    assert response.status_code == 200
+    claims = decode_token(response.get_json()['token'])
+    assert claims['role'] == 'vendor'
+
+
+def test_vendor_routes_skip_user_lookup(client, make_vendor):
+    vendor, headers = make_vendor()
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', _record)
+    try:
+        response = client.post('/api/vendor/checkin', headers=headers, json={'latitude': -1.28, 'longitude': 36.81})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _record)
+
+    assert response.status_code == 200
+    assert not any('FROM users' in s for s in statements)
+
+
+def test_role_claim_enforced(client, make_vendor, admin_headers):
+    _, vendor_headers = make_vendor()
+    assert client.get('/api/admin/logs', headers=vendor_headers).status_code == 403
+    assert client.post('/api/vendor/checkin', headers=admin_headers, json={}).status_code == 403
+
+
+def test_token_without_claim_falls_back_to_cached_user(client):
+    from app.utils.user_cache import user_cache
+    user_cache.clear()
+    vendor = _vendor()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(vendor.id))}'}
+
+    assert client.get('/api/vendor/status', headers=headers).status_code == 200
+    assert vendor.id in user_cache
+
+
+def test_revoked_user_rejected(client, make_vendor):
+    from app.utils.user_cache import revoke_user, clear_revocations
+    vendor, headers = make_vendor()
+    assert client.get('/api/vendor/status', headers=headers).status_code == 200
+
+    revoke_user(vendor.id)
+    try:
+        assert client.get('/api/vendor/status', headers=headers).status_code == 403
+    finally:
+        clear_revocations()
+
+
+def test_role_change_revokes_tokens(client, admin_headers):
+    admin = User.query.filter_by(role='admin').one()
+    assert client.get('/api/admin/stats', headers=admin_headers).status_code == 200
+
+    # Rolled back: nothing is revoked
+    admin.role = 'vendor'
+    db.session.flush()
+    db.session.rollback()
+    assert client.get('/api/admin/stats', headers=admin_headers).status_code == 200
+
+    admin.role = 'vendor'
+    db.session.commit()
+    assert client.get('/api/admin/stats', headers=admin_headers).status_code == 403
+
+
+def test_password_change_and_delete_revoke_tokens(client, make_vendor):
+    vendor, headers = make_vendor()
+    other, other_headers = make_vendor()
+
+    vendor.password_hash = 'new-hash'
+    db.session.commit()
+    assert client.get('/api/vendor/status', headers=headers).status_code == 403
+
+    db.session.delete(other)
+    db.session.commit()
+    assert client.get('/api/vendor/status', headers=other_headers).status_code == 403
+
+
+def test_profile_edit_refreshes_cached_user(client, make_vendor):
+    from app.utils.user_cache import get_user
+    vendor, headers = make_vendor()
+    assert get_user(vendor.id)['business_name'] == vendor.business_name
+
+    vendor.business_name = 'Renamed Kiosk'
+    db.session.commit()
+    assert get_user(vendor.id)['business_name'] == 'Renamed Kiosk'
+    # Not a revoking change
+    assert client.get('/api/vendor/status', headers=headers).status_code == 200
+
+
+def test_revocation_shared_through_database(client, make_vendor):
+    from app.utils.user_cache import DatabaseRevocations
+    vendor, headers = make_vendor()
+    client.application.extensions['user_revocations'] = DatabaseRevocations(db.engine, sync_interval=0)
+    assert client.get('/api/vendor/status', headers=headers).status_code == 200
+
+    # Revoked by another worker: only the shared table knows
+    DatabaseRevocations(db.engine).revoke(vendor.id, time.time())
+    assert client.get('/api/vendor/status', headers=headers).status_code == 403
+
+
+def _register(client, **overrides):
+    payload = {'email': 'new@test.com', 'phone_number': '+254733000000', 'username': 'newbie',
+               'password': 'pass123', 'role': 'vendor', 'business_name': 'New Kiosk'}
+    payload.update(overrides)
+    return client.post('/api/auth/register', json=payload)
+
+
+def test_register_conflicts_use_one_query(app, client):
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    assert _register(client).status_code == 201
+
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', _record)
+    try:
+        response = _register(client, email='other@test.com', username='other')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _record)
+
+    assert response.status_code == 409
+    assert response.get_json()['error'] == 'Phone number already registered'
+    assert len(statements) == 1
+
+    response = _register(client, email='other@test.com', phone_number='+254733000001')
+    assert 'Username "newbie" is taken' in response.get_json()['error']
+    assert _register(client, phone_number='+254733000001', username='x').get_json()['error'] == 'Email already registered'
+
+
+def test_register_uses_configured_hash_method(app, client):
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    assert _register(client).status_code == 201
+    assert User.query.filter_by(email='new@test.com').one().password_hash.startswith('pbkdf2:sha256:1000$')
+
+    response = client.post('/api/auth/login', json={'email': 'new@test.com', 'password': 'pass123'})
+    assert response.status_code == 200
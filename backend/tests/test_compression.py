@@ -0,0 +1,107 @@
+import gzip
+import pytest
+from flask import Response, jsonify, stream_with_context
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+from app.utils.compression import COMPRESSION_CACHE, BodyCache, choose_encoding
+
+BIG = {'vendors': [{'id': n, 'name': f'Vendor {n}', 'menu': [{'name': 'Samosa', 'price': 50}]} for n in range(200)]}
+
+
+@pytest.fixture
+def compress_client(app):
+    app.add_url_rule('/_big', '_big', lambda: jsonify(BIG))
+    app.add_url_rule('/_small', '_small', lambda: jsonify({'ok': True}))
+    app.add_url_rule('/_stream', '_stream', lambda: Response(
+        stream_with_context(iter([b'x' * 4096])), mimetype='application/json'))
+    with app.test_client() as client:
+        yield client
+
+
+def test_gzip_when_accepted(compress_client):
+    response = compress_client.get('/_big', headers={'Accept-Encoding': 'gzip, deflate'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert int(response.headers['Content-Length']) == len(response.data)
+    assert gzip.decompress(response.data) == compress_client.get('/_big').data
+    assert response.headers['ETag'].endswith('-gzip"')
+
+
+def test_matching_etag_is_not_modified(compress_client):
+    first = compress_client.get('/_big', headers={'Accept-Encoding': 'gzip'})
+    etag = first.headers['ETag']
+
+    again = compress_client.get('/_big', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+    assert 'Content-Encoding' not in again.headers
+
+    # Another encoding is another representation
+    plain_etag = etag.replace('-gzip"', '"')
+    changed = compress_client.get('/_big', headers={'Accept-Encoding': 'gzip', 'If-None-Match': plain_etag})
+    assert changed.status_code == 200
+    assert changed.headers['Content-Encoding'] == 'gzip'
+
+
+def test_passthrough(compress_client):
+    plain = compress_client.get('/_big')
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    small = compress_client.get('/_small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+    refused = compress_client.get('/_big', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in refused.headers
+
+    streamed = compress_client.get('/_stream', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in streamed.headers
+    assert streamed.data == b'x' * 4096
+
+
+def test_repeat_responses_hit_the_cache(compress_client):
+    hits = COMPRESSION_CACHE.value(result='hit')
+    first = compress_client.get('/_big', headers={'Accept-Encoding': 'gzip'})
+    second = compress_client.get('/_big', headers={'Accept-Encoding': 'gzip'})
+
+    assert second.data == first.data
+    assert COMPRESSION_CACHE.value(result='hit') == hits + 1
+
+
+def test_disabled(monkeypatch):
+    from app import create_app
+    from app.config import config
+
+    monkeypatch.setattr(config['development'], 'COMPRESSION_ENABLED', False)
+    other = create_app()
+    other.add_url_rule('/_big', '_big', lambda: jsonify(BIG))
+    response = other.test_client().get('/_big', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+
+@pytest.mark.parametrize('header, brotli, expected', [
+    ('gzip, deflate, br', True, 'br'),
+    ('gzip, deflate, br', False, 'gzip'),
+    ('br;q=0.5, gzip', True, 'gzip'),
+    ('*', False, 'gzip'),
+    ('identity', True, None),
+    ('', True, None),
+])
+def test_choose_encoding(header, brotli, expected):
+    assert choose_encoding(parse_accept_header(header, Accept), brotli) == expected
+
+
+def test_body_cache_evicts_oldest():
+    cache = BodyCache(max_bytes=10)
+    cache.put('a', b'1234')
+    cache.put('b', b'1234')
+    cache.get('a')
+    cache.put('c', b'1234')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == b'1234' and cache.get('c') == b'1234'
+    assert cache.size == 8
+    cache.put('huge', b'x' * 11)
+    assert cache.get('huge') is None
@@ -0,0 +1,81 @@
+import pytest
+from app import create_app
+from app.config import config, engine_options
+from app.extensions import db
+from app.models import Transaction, User, VendorLocation
+
+
+@pytest.fixture
+def split_app(tmp_path, monkeypatch):
+    primary_url = f"sqlite:///{tmp_path / 'primary.sqlite'}"
+    replica_url = f"sqlite:///{tmp_path / 'replica.sqlite'}"
+    monkeypatch.setattr(config['development'], 'SQLALCHEMY_DATABASE_URI', primary_url)
+    monkeypatch.setattr(config['development'], 'SQLALCHEMY_ENGINE_OPTIONS', engine_options(primary_url))
+    monkeypatch.setattr(config['development'], 'SQLALCHEMY_BINDS', {'replica': replica_url})
+
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines['replica'])
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    # Flask-SQLAlchemy keeps one MetaData per bind key it has seen; later
+    # apps without the bind would try to create_all() on it
+    db.metadatas.pop('replica', None)
+
+
+def _add_vendor(session, name):
+    user = User(username=name, email=f'{name}@test.com', phone_number=f'+2547{abs(hash(name)) % 10 ** 8:08d}',
+                password_hash='x', role='vendor', business_name=name)
+    session.add(user)
+    session.flush()
+    location = VendorLocation(vendor_id=user.id, latitude=-1.2864, longitude=36.8172,
+                              menu_items=[{'name': 'Samosa', 'price': 50}])
+    location.check_in()
+    session.add(location)
+    session.commit()
+
+
+def _names(response):
+    return [v['name'] for v in response.get_json()['vendors']]
+
+
+def test_reads_go_to_replica_and_writes_to_primary(split_app):
+    # Different rows on each side make the routing visible
+    _add_vendor(db.session, 'on_primary')
+    with db.Session(bind=db.engines['replica']) as replica_session:
+        _add_vendor(replica_session, 'on_replica')
+        replica_session.add(Transaction(vendor_id=1, customer_phone='254700000000', amount=50,
+                                        checkout_request_id='ws_CO_1', status='PENDING'))
+        replica_session.commit()
+
+    client = split_app.test_client()
+    assert _names(client.get('/api/customer/nearby?lat=-1.2864&lon=36.8172')) == ['on_replica']
+
+    # The callback (a POST) looks the payment up on the primary, which doesn't have it
+    response = client.post('/api/customer/callback', json={'Body': {'stkCallback': {'CheckoutRequestID': 'ws_CO_1'}}})
+    assert response.status_code == 404
+
+
+def test_payment_status_reads_primary(split_app):
+    _add_vendor(db.session, 'on_primary')
+    db.session.add(Transaction(vendor_id=1, customer_phone='254700000000', amount=50,
+                               checkout_request_id='ws_CO_1', status='SUCCESSFUL'))
+    db.session.commit()
+
+    response = split_app.test_client().get('/api/customer/payment-status/ws_CO_1')
+    assert response.get_json()['status'] == 'SUCCESSFUL'
+
+
+def test_lagging_replica_falls_back_to_primary(split_app):
+    _add_vendor(db.session, 'on_primary')
+    monitor = split_app.extensions['read_replica'].monitor
+    monitor.measure_lag = lambda: 60.0
+    monitor.checked_at = None
+
+    response = split_app.test_client().get('/api/customer/nearby?lat=-1.2864&lon=36.8172')
+    assert _names(response) == ['on_primary']
+    assert monitor.reason == 'lag'
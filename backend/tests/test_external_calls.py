@@ -0,0 +1,189 @@
+import io
+import json
+import pytest
+from requests import Response
+from requests.adapters import BaseAdapter
+from app.extensions import db
+from app.models import Order, Transaction
+from app.routes import customer_routes, vendor_routes
+from app.utils.mpesa_handler import MpesaHandler
+
+
+class FakeMpesa:
+    def __init__(self, response):
+        self.response = response
+        self.calls = []
+
+    def initiate_stk_push(self, **kwargs):
+        self.calls.append(kwargs)
+        return self.response
+
+
+class FakeAdapter(BaseAdapter):
+    """Answers every request on a session with `handler(request)` -> (status, json body)."""
+
+    def __init__(self, handler):
+        super().__init__()
+        self.handler = handler
+        self.timeouts = []
+
+    def send(self, request, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        status, body = self.handler(request)
+        response = Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode()
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def mock_daraja(monkeypatch):
+    """An MpesaHandler whose shared session is answered by a FakeAdapter calling `handler(request)`."""
+    monkeypatch.setenv('MPESA_CONSUMER_KEY', 'consumer')
+    monkeypatch.setenv('MPESA_CONSUMER_SECRET', 'secret')
+
+    def _install(handler):
+        mpesa = MpesaHandler()
+        mpesa.adapter = FakeAdapter(handler)
+        mpesa.session.mount('https://', mpesa.adapter)
+        return mpesa
+    return _install
+
+
+def daraja(requests_seen, stk_status=200, checks=()):
+    """A Daraja stand-in: OAuth token, then an accepted STK push."""
+    def handler(request):
+        for check in checks:
+            check(request)
+        requests_seen.append(request)
+        if request.path_url.startswith('/oauth/v1/generate'):
+            return 200, {'access_token': 'tok', 'expires_in': '3599'}
+        return stk_status, {'ResponseCode': '0', 'CheckoutRequestID': 'ws_CO_HTTP'}
+    return handler
+
+
+def pay(client, vendor_id):
+    return client.post('/api/customer/pay', json={
+        'vendorId': vendor_id, 'amount': 150, 'phone': '+254711111111',
+        'items': [{'name': 'Samosa', 'price': 50, 'quantity': 3}]
+    })
+
+
+def test_pay_records_pending_transaction(client, make_vendor, monkeypatch):
+    vendor, _ = make_vendor()
+    mpesa = FakeMpesa({'ResponseCode': '0', 'CheckoutRequestID': 'ws_CO_1'})
+    monkeypatch.setattr(customer_routes, 'get_mpesa_handler', lambda: mpesa)
+
+    response = pay(client, vendor.id)
+
+    assert response.status_code == 200
+    assert response.get_json()['checkout_id'] == 'ws_CO_1'
+    assert mpesa.calls[0]['phone_number'] == '254711111111'
+    txn = Transaction.query.filter_by(checkout_request_id='ws_CO_1').one()
+    assert txn.status == 'PENDING' and txn.vendor_id == vendor.id
+
+
+def test_pay_rejected_marks_order_failed(client, make_vendor, monkeypatch):
+    vendor, _ = make_vendor()
+    mpesa = FakeMpesa({'ResponseCode': '1', 'errorMessage': 'Auth Failed'})
+    monkeypatch.setattr(customer_routes, 'get_mpesa_handler', lambda: mpesa)
+
+    response = pay(client, vendor.id)
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Auth Failed'
+    assert Order.query.one().status == 'Payment Failed'
+    assert Transaction.query.one().status == 'FAILED'
+
+
+def test_pay_holds_no_transaction_while_waiting(client, make_vendor, monkeypatch, mock_daraja):
+    vendor, _ = make_vendor()
+    open_during_call = []
+    seen = []
+    mpesa = mock_daraja(daraja(seen, checks=[lambda request: open_during_call.append(db.session().in_transaction())]))
+    monkeypatch.setattr(customer_routes, 'get_mpesa_handler', lambda: mpesa)
+
+    response = pay(client, vendor.id)
+
+    assert response.status_code == 200
+    assert response.get_json()['checkout_id'] == 'ws_CO_HTTP'
+    assert open_during_call == [False, False]
+    stk = json.loads(seen[1].body)
+    assert stk['AccountReference'] == response.get_json()['order_number'][:12]
+
+
+def test_stk_push_reuses_token_and_session(mock_daraja):
+    seen = []
+    handler = mock_daraja(daraja(seen))
+    handler.shortcode = '174379'
+
+    for _ in range(2):
+        result = handler.initiate_stk_push('0711111111', 150.0, 'ORD-1', 'Order ORD-1')
+        assert result['CheckoutRequestID'] == 'ws_CO_HTTP'
+
+    assert [request.path_url.split('?')[0] for request in seen] == [
+        '/oauth/v1/generate', '/mpesa/stkpush/v1/processrequest', '/mpesa/stkpush/v1/processrequest']
+    assert seen[0].headers['Authorization'].startswith('Basic ')
+    assert seen[1].headers['Authorization'] == 'Bearer tok'
+    stk = json.loads(seen[1].body)
+    assert (stk['PhoneNumber'], stk['Amount'], stk['BusinessShortCode']) == ('254711111111', 150, '174379')
+    # Every call gets separate connect and read timeouts
+    assert handler.adapter.timeouts == [(5.0, 30.0)] * 3
+
+
+def test_stk_push_401_drops_token(mock_daraja):
+    seen = []
+    handler = mock_daraja(daraja(seen, stk_status=401))
+
+    handler.initiate_stk_push('254711111111', 10, 'ORD-1', 'Order ORD-1')
+    assert handler._cached_token() is None
+
+
+def test_upload_passes_timeouts_to_sdk(app, monkeypatch):
+    import cloudinary
+    import cloudinary.uploader
+    from werkzeug.datastructures import FileStorage
+    from app.utils.cloudinary_service import upload_image
+
+    app.config.update(EXTERNAL_HTTP_CONNECT_TIMEOUT=2, EXTERNAL_HTTP_TIMEOUT=20)
+    monkeypatch.setattr(cloudinary, '_config', cloudinary.Config())
+    cloudinary.config(cloud_name='demo', api_key='key', api_secret='secret')
+    seen = []
+
+    class FakePool:
+        def request(self, method, url, fields, headers, **kwargs):
+            seen.append((url, dict(fields), kwargs))
+            return type('R', (), {'status': 200, 'headers': {}, 'data': b'{"secure_url": "https://res.cloudinary.com/demo/chips.png"}'})()
+    monkeypatch.setattr(cloudinary.uploader, '_http', FakePool())
+
+    image = FileStorage(io.BytesIO(b'png-bytes'), filename='chips.png', content_type='image/png')
+    assert upload_image(image) == 'https://res.cloudinary.com/demo/chips.png'
+
+    url, fields, kwargs = seen[0]
+    assert url == 'https://api.cloudinary.com/v1_1/demo/image/upload'
+    assert 'signature' in fields and fields['api_key'] == 'key'
+    assert (kwargs['timeout'].connect_timeout, kwargs['timeout'].read_timeout) == (2, 20)
+
+
+def test_upload_view(client, monkeypatch):
+    monkeypatch.setattr(vendor_routes, 'upload_image', lambda file_obj: f'https://img.example/{file_obj.filename}')
+
+    response = client.post('/api/vendor/upload', data={'image': (io.BytesIO(b'png'), 'chips.png')},
+                           content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    assert response.get_json()['url'] == 'https://img.example/chips.png'
+
+
+def test_access_token_is_cached():
+    handler = MpesaHandler()
+    handler._store_token({'access_token': 'abc', 'expires_in': '3599'})
+    assert handler.get_access_token() == 'abc'
+
+    handler._store_token({'access_token': 'old', 'expires_in': '30'})
+    assert handler._cached_token() is None
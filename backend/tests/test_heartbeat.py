@@ -0,0 +1,104 @@
+import time
+import pytest
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.models import VendorLocation
+from app.utils.heartbeat import heartbeat_buffer
+
+
+@pytest.fixture(autouse=True)
+def fresh_buffer(app):
+    heartbeat_buffer.clear()
+    app.config['HEARTBEAT_BATCH_SIZE'] = 100
+    app.config['HEARTBEAT_FLUSH_INTERVAL'] = 3600
+    yield
+    heartbeat_buffer.clear()
+
+
+def _location(vendor_id):
+    db.session.expire_all()
+    return VendorLocation.query.filter_by(vendor_id=vendor_id).first()
+
+
+def test_heartbeat_updates_position_only(client, make_vendor):
+    vendor, headers = make_vendor(menu=[{'name': 'Chapati', 'price': 20}])
+    before = _location(vendor.id).auto_close_at
+
+    response = client.post('/api/vendor/heartbeat', headers=headers, json={'latitude': -1.29, 'longitude': 36.82})
+    assert response.status_code == 202
+    assert response.get_json()['queued'] is True
+
+    # Nothing is written until the buffer flushes
+    assert _location(vendor.id).latitude == pytest.approx(-1.2864)
+    assert heartbeat_buffer.flush() == 1
+
+    loc = _location(vendor.id)
+    assert loc.latitude == pytest.approx(-1.29)
+    assert loc.longitude == pytest.approx(36.82)
+    assert loc.auto_close_at >= before
+    assert loc.menu_items == [{'name': 'Chapati', 'price': 20}]
+
+
+def test_heartbeat_coalesces_small_moves(client, make_vendor):
+    vendor, headers = make_vendor()
+    client.post('/api/vendor/heartbeat', headers=headers, json={'latitude': -1.29, 'longitude': 36.82})
+    heartbeat_buffer.flush()
+
+    # ~1m away and seconds later: absorbed without queueing a write
+    response = client.post('/api/vendor/heartbeat', headers=headers, json={'latitude': -1.29001, 'longitude': 36.82})
+    assert response.get_json()['queued'] is False
+    assert heartbeat_buffer.pending_count() == 0
+
+    # ~1km away: queued
+    response = client.post('/api/vendor/heartbeat', headers=headers, json={'latitude': -1.30, 'longitude': 36.82})
+    assert response.get_json()['queued'] is True
+
+
+def test_heartbeat_flushes_in_batches(app, client, make_vendor):
+    app.config['HEARTBEAT_BATCH_SIZE'] = 3
+    vendors = [make_vendor() for _ in range(3)]
+
+    for i, (vendor, headers) in enumerate(vendors):
+        client.post('/api/vendor/heartbeat', headers=headers, json={'latitude': -1.3 - i / 100, 'longitude': 36.8})
+
+    # The third ping filled the batch and triggered the write
+    assert heartbeat_buffer.pending_count() == 0
+    assert _location(vendors[2][0].id).latitude == pytest.approx(-1.32)
+
+
+def test_heartbeat_does_not_reopen_closed_vendor(client, make_vendor):
+    vendor, headers = make_vendor()
+    loc = _location(vendor.id)
+    loc.is_open = False
+    loc.auto_close_at = datetime.utcnow() - timedelta(minutes=1)
+    db.session.commit()
+
+    client.post('/api/vendor/heartbeat', headers=headers, json={'latitude': -1.3, 'longitude': 36.8})
+    heartbeat_buffer.flush()
+
+    loc = _location(vendor.id)
+    assert loc.is_open is False
+    assert loc.latitude == pytest.approx(-1.2864)
+
+
+def test_heartbeat_requires_coordinates(client, make_vendor):
+    vendor, headers = make_vendor()
+    response = client.post('/api/vendor/heartbeat', headers=headers, json={})
+    assert response.status_code == 400
+
+
+def test_last_ping_flushed_by_timer(app, client, make_vendor):
+    vendor, headers = make_vendor()
+    app.config['HEARTBEAT_FLUSH_INTERVAL'] = 0.2
+    heartbeat_buffer.init_app(app)
+
+    client.post('/api/vendor/heartbeat', headers=headers, json={'latitude': -1.31, 'longitude': 36.83})
+    assert heartbeat_buffer.pending_count() == 1
+
+    # No further traffic: the timer writes it. The pending map empties before
+    # the UPDATE commits, so wait on the row rather than on pending_count()
+    deadline = time.monotonic() + 5
+    while _location(vendor.id).latitude != pytest.approx(-1.31) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert heartbeat_buffer.pending_count() == 0
+    assert _location(vendor.id).latitude == pytest.approx(-1.31)
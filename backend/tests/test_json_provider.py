@@ -0,0 +1,46 @@
+import dataclasses
+import decimal
+import uuid
+from datetime import date, datetime
+import pytest
+from flask.json.provider import DefaultJSONProvider
+from app.utils.json_provider import FastJSONProvider
+
+
+@dataclasses.dataclass
+class Point:
+    lat: float
+    lon: float
+    seen: datetime
+
+
+PAYLOADS = [
+    {'success': True, 'vendors': [{'id': 1, 'name': 'Mama Mboga', 'distance': 0.4, 'menu': [{'name': 'Samosa', 'price': 50}]}]},
+    {'created_at': datetime(2026, 1, 15, 12, 30, 5), 'day': date(2026, 1, 15), 'empty': [], 'nested': {}},
+    {'amount': decimal.Decimal('12.50'), 'id': uuid.UUID('12345678-1234-5678-1234-567812345678')},
+    {'point': Point(-1.28, 36.82, datetime(2026, 1, 1))},
+    {'name': 'Café Tamu', 'note': 'line\nbreak \x7f   "quoted" \\'},
+    {'floats': [0.1, 1e-05, 0.0001, 1e16, 1e15, 123456789.125, -0.0, 2.5e-300]},
+    {'nan': float('nan'), 'inf': [float('inf'), -float('inf')], 'none': None},
+    {'point': Point(float('nan'), 36.82, datetime(2026, 1, 1)), 'none': None},
+    float('inf'),
+    {'big': 2 ** 70, 'neg': -2 ** 63},
+    {1: 'int key', 2: None},
+    [1, 'two', None, True, 3.5],
+]
+
+
+@pytest.mark.parametrize('payload', PAYLOADS)
+@pytest.mark.parametrize('debug', [False, True])
+def test_output_matches_default_provider(app, payload, debug):
+    app.debug = debug
+    fast, default = FastJSONProvider(app), DefaultJSONProvider(app)
+
+    assert fast.response(payload).get_data() == default.response(payload).get_data()
+    assert fast.dumps(payload) == default.dumps(payload)
+    assert fast.dumps(payload, separators=(',', ':')) == default.dumps(payload, separators=(',', ':'))
+
+
+def test_app_uses_fast_provider(app, client):
+    assert isinstance(app.json, FastJSONProvider)
+    assert client.get('/').get_json()['status'] == 'active'
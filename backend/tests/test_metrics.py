@@ -0,0 +1,76 @@
+import pytest
+from app import create_app
+from app.config import config
+from app.extensions import db
+from app.utils.metrics import EXTERNAL_CALLS, Histogram, external_call
+
+
+@pytest.fixture
+def metrics_client(monkeypatch):
+    monkeypatch.setattr(config['development'], 'METRICS_ENABLED', True)
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        with app.test_client() as client:
+            yield client
+        db.session.remove()
+        db.drop_all()
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = Histogram('demo_seconds', 'Demo.', ('endpoint',), buckets=(0.1, 1.0))
+    hist.observe(0.05, endpoint='a')
+    hist.observe(0.5, endpoint='a')
+    hist.observe(5, endpoint='a')
+
+    lines = hist.render()
+    assert 'demo_seconds_bucket{endpoint="a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{endpoint="a",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{endpoint="a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{endpoint="a"} 3' in lines
+
+
+def test_metrics_endpoint_reports_requests_and_queries(metrics_client):
+    client = metrics_client
+    client.get('/api/customer/nearby?lat=-1.2864&lon=36.8172')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{endpoint="customer.get_nearby_vendors",method="GET",status="200"}' in body
+    assert 'http_request_db_queries_count{endpoint="customer.get_nearby_vendors"}' in body
+    assert 'db_queries_total{engine="default"}' in body
+
+
+def test_throttled_requests_are_recorded(metrics_client):
+    app = metrics_client.application
+    app.config['RATE_LIMITS'] = dict(app.config['RATE_LIMITS'], **{'customer.check_payment_status': '1/minute'})
+    metrics_client.get('/api/customer/payment-status/ws_CO_1')
+    assert metrics_client.get('/api/customer/payment-status/ws_CO_1').status_code == 429
+
+    body = metrics_client.get('/metrics').get_data(as_text=True)
+    assert ('http_request_duration_seconds_count{endpoint="customer.check_payment_status",'
+            'method="GET",status="429"} 1') in body
+
+
+def test_metrics_off_by_default(client):
+    assert client.get('/metrics').status_code == 404
+
+
+def test_metrics_token_required_when_set(metrics_client):
+    metrics_client.application.config['METRICS_TOKEN'] = 'scrape-secret'
+    assert metrics_client.get('/metrics').status_code == 401
+    assert metrics_client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = metrics_client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == 200
+
+
+def test_external_call_records_outcome():
+    before = EXTERNAL_CALLS.count(service='mpesa', operation='test', outcome='error')
+    try:
+        with external_call('mpesa', 'test'):
+            raise RuntimeError('timeout')
+    except RuntimeError:
+        pass
+    assert EXTERNAL_CALLS.count(service='mpesa', operation='test', outcome='error') == before + 1
@@ -0,0 +1,44 @@
+import pytest
+from flask_jwt_extended import create_access_token
+
+
+@pytest.fixture
+def profiled_app(app, tmp_path):
+    app.config['PROFILE_DIR'] = str(tmp_path)
+    app.config['PROFILE_MAX_FILES'] = 2
+    return app
+
+
+def test_admin_token_header_profiles_request(profiled_app, client, admin_headers):
+    token = admin_headers['Authorization'].split()[1]
+    response = client.get('/api/customer/nearby?lat=-1.2864&lon=36.8172', headers={'X-Profile-Token': token})
+    name = response.headers['X-Profile-Id']
+    assert '-customer.get_nearby_vendors-' in name
+
+    listing = client.get('/api/admin/profiles', headers=admin_headers).get_json()
+    assert [(p['name'], p['endpoint']) for p in listing['profiles']] == [(name, 'customer.get_nearby_vendors')]
+
+    text = client.get(f'/api/admin/profiles/{name}?format=text', headers=admin_headers)
+    assert text.status_code == 200
+    assert 'function calls' in text.get_data(as_text=True)
+
+
+def test_non_admin_header_is_ignored(profiled_app, client, make_vendor):
+    token = create_access_token(identity='99', additional_claims={'role': 'vendor'})
+    response = client.get('/', headers={'X-Profile-Token': token})
+    assert 'X-Profile-Id' not in response.headers
+    assert 'X-Profile-Id' not in client.get('/', headers={'X-Profile-Token': 'garbage'}).headers
+
+
+def test_profile_ring_is_bounded(profiled_app, client, admin_headers, tmp_path):
+    token = admin_headers['Authorization'].split()[1]
+    names = [client.get('/', headers={'X-Profile-Token': token}).headers['X-Profile-Id'] for _ in range(4)]
+    kept = sorted(p.name for p in tmp_path.iterdir())
+    assert len(kept) == 2
+    assert set(kept) <= set(names)
+
+
+def test_profile_download_rejects_bad_names(profiled_app, client, admin_headers):
+    assert client.get('/api/admin/profiles/..%2Fsecret.pstats', headers=admin_headers).status_code in (400, 404)
+    assert client.get('/api/admin/profiles/notes.txt', headers=admin_headers).status_code == 400
+    assert client.get('/api/admin/profiles/1-x.pstats', headers=admin_headers).status_code == 404
@@ -0,0 +1,87 @@
+import pytest
+from app.extensions import db
+from app.utils.rate_limit import DatabaseStore, MemoryStore, parse_limit
+
+
+def test_parse_limit():
+    assert parse_limit('60/minute') == (60, 60)
+    assert parse_limit('10 / 5seconds') == (10, 5)
+    assert parse_limit('1000/day') == (1000, 86400)
+    with pytest.raises(ValueError):
+        parse_limit('fast')
+
+
+@pytest.mark.parametrize('make_store', [lambda: MemoryStore(), lambda: DatabaseStore(db.engine)])
+def test_sliding_window(app, make_store):
+    store = make_store()
+    t0 = 1_000_000_040.0  # 20s into a 60s window
+
+    assert [store.hit('k', 3, 60, now=t0)[0] for _ in range(4)] == [True, True, True, False]
+    allowed, retry_after = store.hit('k', 3, 60, now=t0)
+    # The window ends in 40s, then a third of it has to slide out
+    assert not allowed and retry_after == 60
+
+    # Other clients have their own counters
+    assert store.hit('other', 3, 60, now=t0)[0] is True
+
+    # Early in the next window the previous one still weighs in
+    assert store.hit('k', 3, 60, now=t0 + 45)[0] is False
+    # Once it has slid out, requests flow again
+    assert store.hit('k', 3, 60, now=t0 + 100)[0] is True
+
+
+@pytest.mark.parametrize('make_store', [lambda: MemoryStore(), lambda: DatabaseStore(db.engine)])
+def test_rejected_hits_are_not_counted(app, make_store):
+    store = make_store()
+    t0 = 1_000_000_040.0
+
+    for _ in range(3):
+        store.hit('k', 3, 60, now=t0)
+    # A client polling every second while limited...
+    retries = [store.hit('k', 3, 60, now=t0 + s) for s in range(1, 60)]
+    assert not any(allowed for allowed, _ in retries)
+    assert retries[-1][1] == 1
+    # ...gets in when Retry-After said it would
+    assert store.hit('k', 3, 60, now=t0 + 60)[0] is True
+
+
+def test_route_limit_returns_retry_after(app, client):
+    app.config['RATE_LIMITS'] = dict(app.config['RATE_LIMITS'], **{'customer.check_payment_status': '2/minute'})
+
+    for _ in range(2):
+        assert client.get('/api/customer/payment-status/ws_CO_1').status_code == 200
+    response = client.get('/api/customer/payment-status/ws_CO_1')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+
+    # Per-client: another IP is unaffected
+    response = client.get('/api/customer/payment-status/ws_CO_1', environ_base={'REMOTE_ADDR': '10.0.0.2'})
+    assert response.status_code == 200
+
+
+def test_per_ip_limit_spans_routes(app, client):
+    app.config['RATE_LIMIT_PER_IP'] = '3/minute'
+    client.get('/api/customer/payment-status/a')
+    client.get('/api/customer/search?item=x&lat=0&lon=0')
+    client.get('/api/customer/nearby?lat=0&lon=0')
+    assert client.get('/api/customer/payment-status/a').status_code == 429
+    # Vendor and admin routes are not limited
+    assert client.get('/api/vendor/status').status_code == 401
+
+
+def test_callback_exempt_and_pay_limited(app, client):
+    app.config['RATE_LIMIT_PER_IP'] = '1/minute'
+    for _ in range(3):
+        assert client.post('/api/customer/callback', json={}).status_code == 200
+
+    app.config['RATE_LIMIT_PER_IP'] = None
+    app.config['RATE_LIMITS'] = dict(app.config['RATE_LIMITS'], **{'customer.initiate_payment': '2/minute'})
+    statuses = [client.post('/api/customer/pay', json={}).status_code for _ in range(3)]
+    assert statuses[-1] == 429 and 429 not in statuses[:2]
+
+
+def test_rate_limit_can_be_disabled(app, client):
+    app.config['RATE_LIMIT_ENABLED'] = False
+    app.config['RATE_LIMIT_PER_IP'] = '1/minute'
+    for _ in range(3):
+        assert client.get('/api/customer/payment-status/a').status_code == 200
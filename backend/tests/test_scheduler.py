@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.models import VendorLocation
+from app.utils.auto_close import AutoCloser
+
+
+def _set_deadline(vendor, deadline):
+    loc = VendorLocation.query.filter_by(vendor_id=vendor.id).first()
+    loc.auto_close_at = deadline
+    db.session.commit()
+
+
+def test_auto_closer_closes_due_vendors_in_bulk(make_vendor):
+    now = datetime.utcnow()
+    due = [make_vendor()[0] for _ in range(3)]
+    later, _ = make_vendor()
+    for i, vendor in enumerate(due):
+        _set_deadline(vendor, now - timedelta(seconds=i + 1))
+    _set_deadline(later, now + timedelta(seconds=30))
+
+    closer = AutoCloser(refresh_interval=60)
+    closer.refresh(now=now)
+    assert closer.due(now)
+    assert closer.next_deadline() == now - timedelta(seconds=3)
+
+    closed = closer.close_due(now=now)
+    assert sorted(closed) == sorted(v.id for v in due)
+
+    db.session.expire_all()
+    for vendor in due:
+        loc = VendorLocation.query.filter_by(vendor_id=vendor.id).first()
+        assert loc.is_open is False and loc.auto_close_at is None
+    assert VendorLocation.query.filter_by(vendor_id=later.id).first().is_open is True
+
+    metrics = closer.metrics()
+    assert metrics['closed'] == 3
+    assert metrics['lag_count'] == 3
+    assert metrics['lag_max'] >= 3
+    # The remaining deadline is next, not a fixed 5 minute poll
+    assert closer.next_wakeup(now) == now + timedelta(seconds=30)
+
+
+def test_auto_closer_ignores_extended_deadlines(make_vendor):
+    now = datetime.utcnow()
+    vendor, _ = make_vendor()
+    _set_deadline(vendor, now + timedelta(seconds=5))
+
+    closer = AutoCloser(refresh_interval=60)
+    closer.refresh(now=now)
+
+    # A heartbeat pushed the deadline out after the heap was loaded
+    _set_deadline(vendor, now + timedelta(hours=3))
+    assert closer.close_due(now=now + timedelta(seconds=10)) == []
+    assert closer.metrics()['closed'] == 0
+
+
+def test_lease_lock_single_leader(app):
+    from app.utils.jobs import LeaseLock
+
+    first = LeaseLock(db.engine, 'scheduler', 'node-a', ttl=30)
+    second = LeaseLock(db.engine, 'scheduler', 'node-b', ttl=30)
+    assert first.acquire() is True
+    assert second.acquire() is False
+    # The leader renews its own lease
+    assert first.acquire() is True
+
+    first.release()
+    assert second.acquire() is True
+
+
+def test_lease_lock_taken_over_after_expiry(app):
+    from app.utils.jobs import LeaseLock
+
+    stale = LeaseLock(db.engine, 'scheduler', 'node-a', ttl=-1)
+    assert stale.acquire() is True
+    assert LeaseLock(db.engine, 'scheduler', 'node-b', ttl=30).acquire() is True
+
+
+def test_advisory_lock_keepalive_leaves_no_open_transaction(app):
+    from app.utils.jobs import AdvisoryLock
+
+    lock = AdvisoryLock(db.engine, 'scheduler')
+    # Stand in for a connection already holding the lock
+    lock._conn = db.engine.connect()
+    assert lock.acquire() is True
+    assert lock._conn.in_transaction() is False
+    lock._drop()
+
+
+def test_job_runner_runs_due_jobs_on_leader_only(app):
+    from app.utils.jobs import Job, JobRunner, LeaseLock
+
+    calls = []
+    leader = JobRunner(app, LeaseLock(db.engine, 'scheduler', 'node-a'))
+    follower = JobRunner(app, LeaseLock(db.engine, 'scheduler', 'node-b'))
+    for runner in (leader, follower):
+        runner.add(Job('tick', lambda: calls.append(1), interval=60))
+
+    assert leader.run_pending(wait=True) == ['tick']
+    assert follower.run_pending(wait=True) == []
+    # Not due again until its interval passes
+    assert leader.run_pending(wait=True) == []
+    assert calls == [1]
+
+    stats = leader.metrics()['jobs']['tick']
+    assert stats['runs'] == 1 and stats['failures'] == 0
+    assert stats['last_duration'] is not None
+    leader.shutdown()
+
+
+def test_job_overlap_and_failures_are_tracked(app):
+    import threading
+    from app.utils.jobs import Job
+
+    release = threading.Event()
+    job = Job('slow', release.wait, interval=1)
+    worker = threading.Thread(target=job.run, args=(app,))
+    worker.start()
+    while not job.running:
+        pass
+    assert job.run(app) is False
+    release.set()
+    worker.join()
+    assert job.stats['skipped_overlaps'] == 1
+    assert job.stats['runs'] == 1
+
+    def boom():
+        raise RuntimeError('db down')
+
+    failing = Job('boom', boom, interval=1)
+    failing.run(app)
+    assert failing.stats['failures'] == 1
+    assert failing.stats['last_error'] == 'db down'
+
+
+def test_expire_pending_payments(make_vendor):
+    from app.models import Order, Transaction
+    from app.utils.reconciliation import expire_pending_payments
+
+    vendor, _ = make_vendor()
+    old = datetime.utcnow() - timedelta(hours=1)
+    order = Order(order_number='ORD-OLD', vendor_id=vendor.id, customer_phone='254711000000',
+                  items=[], total_amount=50, status='Pending Payment', created_at=old)
+    db.session.add(order)
+    db.session.flush()
+    db.session.add(Transaction(vendor_id=vendor.id, order_id=order.id, customer_phone='254711000000',
+                               amount=50, status='PENDING', checkout_request_id='ws_CO_1', created_at=old))
+    db.session.add(Transaction(vendor_id=vendor.id, customer_phone='254711000000',
+                               amount=70, status='PENDING', checkout_request_id='ws_CO_2'))
+    db.session.commit()
+
+    assert expire_pending_payments(900) == 1
+    db.session.expire_all()
+    assert Transaction.query.filter_by(checkout_request_id='ws_CO_1').one().status == 'FAILED'
+    assert Transaction.query.filter_by(checkout_request_id='ws_CO_2').one().status == 'PENDING'
+    assert Order.query.filter_by(order_number='ORD-OLD').one().status == 'Payment Failed'
@@ -0,0 +1,69 @@
+import pytest
+from app.extensions import db
+from app.models import MenuItem, VendorLocation
+from app.utils.search import FTS_TABLE, menu_search_text
+
+NAIROBI = (-1.2864, 36.8172)
+
+
+def search(client, item, lat=NAIROBI[0], lon=NAIROBI[1]):
+    response = client.get(f'/api/customer/search?item={item}&lat={lat}&lon={lon}')
+    assert response.status_code == 200
+    return sorted(v['vendor_id'] for v in response.get_json()['vendors'])
+
+
+def test_menu_search_text():
+    menu = [{'name': 'Samosa', 'desc': 'Beef & ONION'}, 'Chai', {'price': 20}, 42]
+    assert menu_search_text(menu) == 'samosa\nbeef & onion\nchai\n\n'
+    assert menu_search_text([]) is None
+    assert menu_search_text(None) is None
+
+
+def test_search_matches_in_database(client, make_vendor):
+    samosa, _ = make_vendor(menu=[{'name': 'Beef Samosa', 'price': 50}])
+    chai, _ = make_vendor(menu=[{'name': 'Chai', 'price': 30, 'desc': 'with ginger'}])
+    far, _ = make_vendor(lat=-1.40, menu=[{'name': 'Samosa', 'price': 50}])
+    make_vendor(menu=[])
+
+    assert db.session.execute(db.text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar() == 4
+    assert search(client, 'SAMOS') == [samosa.id]      # indexed (trigram) path, case-insensitive
+    assert search(client, 'ginger') == [chai.id]       # descriptions too
+    assert search(client, 'ai') == [chai.id]           # too short for the index: plain LIKE
+    assert search(client, '') == [samosa.id, chai.id]  # any vendor with a menu
+    assert search(client, '50%') == []                 # LIKE wildcards are literal
+    assert search(client, 'samosa', lat=-1.40) == [far.id]
+
+
+def test_search_text_follows_menu_changes(client, make_vendor):
+    vendor, headers = make_vendor(menu=[{'name': 'Chapati', 'price': 20}])
+    assert search(client, 'chapati') == [vendor.id]
+
+    # MenuItem write-model listener
+    db.session.add(MenuItem(vendor_id=vendor.id, name='Mandazi', price=10))
+    db.session.commit()
+    assert search(client, 'mandazi') == [vendor.id]
+    assert search(client, 'chapati') == []
+
+    # Check-in upsert
+    response = client.post('/api/vendor/checkin', headers=headers, json={
+        'latitude': NAIROBI[0], 'longitude': NAIROBI[1], 'menu_items': [{'name': 'Githeri', 'price': 80}]})
+    assert response.status_code == 200
+    assert search(client, 'githeri') == [vendor.id]
+    assert search(client, 'mandazi') == []
+
+    # ORM updates
+    location = VendorLocation.query.filter_by(vendor_id=vendor.id).one()
+    location.menu_items = [{'name': 'Mukimo', 'price': 90}]
+    db.session.commit()
+    assert location.search_text == 'mukimo\n'
+    assert search(client, 'mukimo') == [vendor.id]
+
+
+@pytest.mark.parametrize('recreate', [False, True])
+def test_fts_index_rebuilt_with_schema(app, make_vendor, recreate):
+    vendor, _ = make_vendor(menu=[{'name': 'Nyama Choma', 'price': 300}])
+    if recreate:
+        db.drop_all()
+        db.create_all()
+    count = db.session.execute(db.text(f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH '\"choma\"'")).scalar()
+    assert count == (0 if recreate else 1)
@@ -0,0 +1,39 @@
+from sqlalchemy import func, select
+from app.extensions import db
+from app.models import MenuItem, Order, Transaction, User, VendorLocation
+from app.seed_data import NEIGHBOURHOODS, seed
+from app.utils.geospatial import haversine_distance
+
+
+def test_seed_loads_consistent_dataset(app):
+    summary = seed(db.engine, vendors=40, orders=300, hash_method='pbkdf2:sha256:1000')
+
+    counts = summary['counts']
+    assert counts['users'] == 41            # vendors + one admin
+    assert counts['vendor_locations'] == 40
+    assert counts['orders'] == 300
+    assert db.session.scalar(select(func.count()).select_from(Transaction)) == counts['transactions']
+
+    # One hash computed once and shared by every seeded user
+    assert db.session.scalar(select(func.count(func.distinct(User.password_hash)))) == 1
+
+    # The search read-model matches the menu_items write-model
+    location = db.session.scalars(select(VendorLocation)).first()
+    names = db.session.scalars(select(MenuItem.name).where(MenuItem.vendor_id == location.vendor_id)).all()
+    assert sorted(i['name'] for i in location.menu_items) == sorted(names)
+
+    # Vendors sit in a Nairobi neighbourhood
+    for loc in db.session.scalars(select(VendorLocation)):
+        assert min(haversine_distance(loc.latitude, loc.longitude, lat, lon)
+                   for _, lat, lon, _, _ in NEIGHBOURHOODS) < 10
+
+
+def test_seed_appends_after_existing_rows(app, make_vendor):
+    make_vendor()
+    seed(db.engine, vendors=5, orders=20, hash_method='pbkdf2:sha256:1000')
+    seed(db.engine, vendors=5, orders=20, seed=2, hash_method='pbkdf2:sha256:1000')
+
+    assert db.session.scalar(select(func.count()).select_from(Order)) == 40
+    # Only one admin is created across runs, and ORM inserts still get fresh ids
+    assert db.session.scalar(select(func.count()).where(User.role == 'admin')) == 1
+    make_vendor()
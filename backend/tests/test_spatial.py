@@ -0,0 +1,74 @@
+import random
+import pytest
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql
+from app.extensions import db
+from app.models import VendorLocation
+from app.utils.spatial import BACKENDS, RTREE_TABLE, detect_backend, find_nearby
+
+NAIROBI = (-1.2864, 36.8172)
+
+
+@pytest.fixture
+def scattered(make_vendor):
+    rng = random.Random(7)
+    return [make_vendor(lat=NAIROBI[0] + rng.uniform(-0.1, 0.1), lon=NAIROBI[1] + rng.uniform(-0.1, 0.1))[0]
+            for _ in range(40)]
+
+
+def nearby_ids(client, lat=NAIROBI[0], lon=NAIROBI[1], radius=3000):
+    response = client.get(f'/api/customer/nearby?lat={lat}&lon={lon}&radius={radius}')
+    assert response.status_code == 200
+    return [v['vendor_id'] for v in response.get_json()['vendors']]
+
+
+def test_sqlite_uses_rtree(app):
+    assert detect_backend(db.session.connection()) == 'rtree'
+
+
+@pytest.mark.parametrize('radius_km', [0.5, 2, 5, 20])
+def test_rtree_matches_python_fallback(app, scattered, radius_km):
+    query = VendorLocation.query
+    expected = BACKENDS['python'].nearby(query, *NAIROBI, radius_km)
+    found = BACKENDS['rtree'].nearby(query, *NAIROBI, radius_km)
+
+    assert [(loc.id, round(d, 6)) for loc, d in found] == [(loc.id, round(d, 6)) for loc, d in expected]
+    distances = [d for _, d in found]
+    assert distances == sorted(distances) and all(d <= radius_km for d in distances)
+
+
+def test_nearby_results_nearest_first(client, scattered):
+    ids = nearby_ids(client)
+    with client.application.app_context():
+        expected = [loc.vendor_id for loc, _ in find_nearby(VendorLocation.query, *NAIROBI, 3)]
+    assert ids and ids == expected
+
+
+def test_rtree_follows_core_updates(client, make_vendor):
+    vendor, _ = make_vendor(lat=NAIROBI[0] + 0.2)
+    assert vendor.id not in nearby_ids(client)
+
+    # Heartbeats move vendors with Core UPDATEs, bypassing the ORM
+    table = VendorLocation.__table__
+    db.session.execute(update(table).where(table.c.vendor_id == vendor.id).values(latitude=NAIROBI[0]))
+    db.session.commit()
+    assert nearby_ids(client) == [vendor.id]
+
+    db.session.delete(VendorLocation.query.filter_by(vendor_id=vendor.id).one())
+    db.session.commit()
+    assert db.session.execute(db.text(f"SELECT count(*) FROM {RTREE_TABLE}")).scalar() == 0
+
+
+def test_backend_can_be_forced(app, client, make_vendor):
+    vendor, _ = make_vendor()
+    app.config['SPATIAL_BACKEND'] = 'python'
+    assert nearby_ids(client) == [vendor.id]
+
+
+def test_postgis_query(app):
+    query = BACKENDS['postgis'].within(VendorLocation.query, *NAIROBI, 2)
+    sql = str(query.statement.compile(dialect=postgresql.dialect()))
+
+    assert 'ST_DWithin(vendor_locations.geog, CAST(ST_SetSRID(ST_MakePoint(' in sql
+    assert 'AS geography(Point, 4326))' in sql
+    assert 'ORDER BY vendor_locations.geog <-> CAST(' in sql
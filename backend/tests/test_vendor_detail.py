@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app.extensions import db
+from app.models import MenuItem, User, VendorLocation
+from app.utils.vendor_detail import detail_cache
+
+NAIROBI = (-1.2864, 36.8172)
+
+
+def details(client, vendor_id):
+    response = client.get(f'/api/customer/vendor/{vendor_id}')
+    assert response.status_code == 200
+    return response.get_json()['vendor']
+
+
+def count_statements(fn):
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', _record)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _record)
+    return statements
+
+
+def test_details_document(client, make_vendor):
+    detail_cache.clear()
+    vendor, _ = make_vendor(name='Mama Oliech', menu=[{'name': 'Tilapia', 'price': 450, 'desc': 'Fried', 'id': 't1'}])
+
+    response = client.get(f'/api/customer/vendor/{vendor.id}')
+    assert response.mimetype == 'application/json'
+    assert response.get_json() == {'success': True, 'vendor': {
+        'id': vendor.id, 'name': 'Mama Oliech', 'image': None, 'address': None, 'status': 'Open',
+        'menuItems': [{'id': 't1', 'name': 'Tilapia', 'price': 450, 'description': 'Fried',
+                       'image': None, 'category': 'main'}],
+        'categories': [{'id': 'all', 'name': 'All', 'count': 1}]}}
+
+    # Cached: no queries; a miss is one keyed lookup
+    assert count_statements(lambda: details(client, vendor.id)) == []
+    detail_cache.clear()
+    assert len(count_statements(lambda: details(client, vendor.id))) == 1
+
+    assert client.get('/api/customer/vendor/9999').status_code == 404
+    admin = User(username='boss', email='boss@test.com', phone_number='+254700000009', password_hash='x', role='admin')
+    db.session.add(admin)
+    db.session.commit()
+    assert client.get(f'/api/customer/vendor/{admin.id}').status_code == 404
+
+
+def test_status_decided_at_read_time(client, make_vendor):
+    vendor, _ = make_vendor()
+    assert details(client, vendor.id)['status'] == 'Open'
+
+    # Expiry needs no write or invalidation
+    location = VendorLocation.query.filter_by(vendor_id=vendor.id).one()
+    entry = detail_cache.get(vendor.id)
+    detail_cache.set(vendor.id, entry[:2] + (datetime.utcnow() - timedelta(seconds=1), ))
+    assert details(client, vendor.id)['status'] == 'Closed'
+
+    location.auto_close_at = datetime.utcnow() - timedelta(minutes=1)
+    db.session.commit()
+    detail_cache.clear()
+    assert details(client, vendor.id)['status'] == 'Closed'
+
+
+def test_document_rebuilt_on_writes(client, make_vendor):
+    vendor, headers = make_vendor(menu=[{'name': 'Chapati', 'price': 20}])
+    assert [i['name'] for i in details(client, vendor.id)['menuItems']] == ['Chapati']
+
+    # MenuItem write-model listener
+    db.session.add(MenuItem(vendor_id=vendor.id, name='Mandazi', price=10))
+    db.session.commit()
+    assert [i['name'] for i in details(client, vendor.id)['menuItems']] == ['Mandazi']
+
+    # Check-in upsert
+    response = client.post('/api/vendor/checkin', headers=headers, json={
+        'latitude': NAIROBI[0], 'longitude': NAIROBI[1], 'address': 'Kenyatta Ave',
+        'menu_items': [{'name': 'Githeri', 'price': 80}]})
+    assert response.status_code == 200
+    vendor_json = details(client, vendor.id)
+    assert vendor_json['address'] == 'Kenyatta Ave'
+    assert [i['name'] for i in vendor_json['menuItems']] == ['Githeri']
+
+    # Profile update
+    user = db.session.get(User, vendor.id)
+    user.business_name = 'Githeri Palace'
+    user.storefront_image_url = 'https://img.test/palace.jpg'
+    db.session.commit()
+    vendor_json = details(client, vendor.id)
+    assert (vendor_json['name'], vendor_json['image']) == ('Githeri Palace', 'https://img.test/palace.jpg')
+
+    # Close shows up immediately in this worker
+    client.post('/api/vendor/close', headers=headers)
+    assert details(client, vendor.id)['status'] == 'Closed'
+
+
+def test_cache_dropped_only_after_commit(client, make_vendor):
+    vendor, _ = make_vendor(menu=[{'name': 'Chapati', 'price': 20}])
+    details(client, vendor.id)
+    location = VendorLocation.query.filter_by(vendor_id=vendor.id).one()
+
+    # A read between flush and commit must not be left holding the old row
+    location.address = 'Moi Ave'
+    db.session.flush()
+    assert vendor.id in detail_cache
+    db.session.rollback()
+    assert vendor.id in detail_cache
+
+    location.address = 'Moi Ave'
+    db.session.add(MenuItem(vendor_id=vendor.id, name='Mandazi', price=10))
+    db.session.flush()
+    assert vendor.id in detail_cache
+    db.session.commit()
+    assert vendor.id not in detail_cache
+    assert details(client, vendor.id)['address'] == 'Moi Ave'
+
+
+def test_item_ids_stable_without_source_ids(client, make_vendor):
+    vendor, _ = make_vendor(menu=[{'name': 'Chai', 'price': 30}, {'name': 'Mandazi', 'price': 10, 'id': 'm1'}])
+    first = details(client, vendor.id)['menuItems']
+    detail_cache.clear()
+    assert details(client, vendor.id)['menuItems'] == first
+    assert [i['id'] for i in first] == ['0', 'm1']
+
+
+def test_missing_document_built_on_read(client, make_vendor):
+    vendor, _ = make_vendor(menu=[{'name': 'Mutura', 'price': 50}])
+    db.session.execute(db.update(VendorLocation).values(detail_doc=None))
+    db.session.commit()
+    detail_cache.clear()
+    assert [i['name'] for i in details(client, vendor.id)['menuItems']] == ['Mutura']
@@ -0,0 +1,89 @@
+from datetime import timedelta
+from sqlalchemy import event
+from app.extensions import db
+from app.models import VendorLocation
+
+
+def test_checkin_creates_then_updates_single_row(client, make_vendor):
+    vendor, headers = make_vendor(checked_in=False)
+    payload = {'latitude': -1.28, 'longitude': 36.81, 'address': 'Moi Avenue', 'menu_items': [{'name': 'Samosa', 'price': 50}]}
+
+    response = client.post('/api/vendor/checkin', headers=headers, json=payload)
+    assert response.status_code == 200
+    assert response.get_json()['remaining_seconds'] == 10800
+
+    payload.update(latitude=-1.30, menu_items=[{'name': 'Mandazi', 'price': 10}])
+    response = client.post('/api/vendor/checkin', headers=headers, json=payload)
+    assert response.status_code == 200
+
+    rows = VendorLocation.query.filter_by(vendor_id=vendor.id).all()
+    assert len(rows) == 1
+    loc = rows[0]
+    assert loc.latitude == -1.30
+    assert loc.menu_items == [{'name': 'Mandazi', 'price': 10}]
+    assert loc.is_open is True
+    assert loc.auto_close_at == loc.last_checkin + timedelta(hours=3)
+
+
+def test_checkin_is_one_statement(client, make_vendor):
+    vendor, headers = make_vendor()
+    statements = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', _count)
+    try:
+        client.post('/api/vendor/checkin', headers=headers, json={'latitude': -1.28, 'longitude': 36.81})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _count)
+
+    assert len(statements) == 1
+    assert 'ON CONFLICT' in statements[0]
+
+
+def test_status_never_writes_for_expired_vendor(client, make_vendor):
+    from datetime import datetime
+    from app.routes.vendor_routes import status_cache
+    status_cache.clear()
+
+    vendor, headers = make_vendor()
+    loc = VendorLocation.query.filter_by(vendor_id=vendor.id).first()
+    loc.auto_close_at = datetime.utcnow() - timedelta(minutes=5)
+    db.session.commit()
+
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', _record)
+    try:
+        response = client.get('/api/vendor/status', headers=headers)
+        cached = client.get('/api/vendor/status', headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _record)
+
+    assert response.get_json()['is_open'] is False
+    assert cached.get_json() == response.get_json()
+    assert response.headers['Cache-Control'].startswith('private, max-age=')
+    # One SELECT for the first poll, nothing for the cached one, no UPDATE
+    assert len(statements) == 1
+    assert statements[0].lstrip().upper().startswith('SELECT')
+
+    db.session.expire_all()
+    assert VendorLocation.query.filter_by(vendor_id=vendor.id).first().is_open is True
+
+
+def test_status_cache_invalidated_on_checkin(client, make_vendor):
+    from app.routes.vendor_routes import status_cache
+    status_cache.clear()
+
+    vendor, headers = make_vendor()
+    client.post('/api/vendor/close', headers=headers)
+    assert client.get('/api/vendor/status', headers=headers).get_json()['is_open'] is False
+
+    client.post('/api/vendor/checkin', headers=headers, json={'latitude': -1.28, 'longitude': 36.81})
+    status = client.get('/api/vendor/status', headers=headers).get_json()
+    assert status['is_open'] is True
+    assert status['remaining_seconds'] > 10700
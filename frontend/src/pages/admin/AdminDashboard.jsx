@@ -1,9 +1,9 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { MapContainer, TileLayer, Marker, Popup } from 'react-leaflet';
 import L from 'leaflet';
-import { Store, DollarSign, Users, LogOut, MapPin, Clock, Phone, FileText, Activity, Search, Hash } from 'lucide-react';
-import api from '../../services/api';
+import { Store, DollarSign, Users, LogOut, MapPin, Clock, Phone, FileText, Activity, Search, Hash, Loader2 } from 'lucide-react';
+import { adminAPI } from '../../services/api';
 import 'leaflet/dist/leaflet.css';
 
 // --- CUSTOM ORANGE MARKER SETUP ---
@@ -23,6 +23,9 @@ const AdminDashboard = () => {
   // Data State
   const [vendors, setVendors] = useState([]);
   const [logs, setLogs] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const olderLoaded = useRef(false);
   const [loading, setLoading] = useState(true);
   
   // Search States
@@ -55,27 +58,35 @@ const AdminDashboard = () => {
     try {
       if (vendors.length === 0) setLoading(true);
       
-      const [vendorsResponse, logsResponse] = await Promise.all([
-        api.get('/admin/vendors', config),
-        api.get('/admin/logs', config)
+      // All-time totals from the stats rollups; the log table is paged separately
+      const [vendorsResponse, logsResponse, statsResponse] = await Promise.all([
+        adminAPI.getVendors(config),
+        adminAPI.getLogs({}, config),
+        adminAPI.getStats({ from: '1970-01-01' }, config)
       ]);
 
       const vendorsData = vendorsResponse.data.vendors || [];
-      const logsData = logsResponse.data.logs || [];
+      const firstPage = logsResponse.data.logs || [];
+      const totals = statsResponse.data.totals || {};
 
       setVendors(vendorsData);
-      setLogs(logsData);
-
-      const totalTransactions = logsData.length;
-      const totalRevenue = logsData
-        .filter(log => log.status === 'Successful') 
-        .reduce((sum, log) => sum + log.amount, 0);
+      if (olderLoaded.current) {
+        // Refresh the newest page but keep the older pages already loaded below it
+        setLogs(prev => {
+          const ids = new Set(firstPage.map(log => log.id));
+          const last = firstPage[firstPage.length - 1];
+          return [...firstPage, ...prev.filter(log => !ids.has(log.id) && (!last || log.timestamp < last.timestamp))];
+        });
+      } else {
+        setLogs(firstPage);
+        setNextCursor(logsResponse.data.next_cursor);
+      }
 
       setStats({
         totalVendors: vendorsData.length, 
         activeVendors: vendorsData.length,
-        totalTransactions,
-        totalRevenue
+        totalTransactions: totals.transactions || 0,
+        totalRevenue: totals.revenue || 0
       });
     } catch (error) {
       console.error('Error fetching dashboard data:', error);
@@ -87,6 +98,22 @@ const AdminDashboard = () => {
     }
   };
 
+  const fetchOlderLogs = async () => {
+    const token = localStorage.getItem('token') || localStorage.getItem('admin_token');
+    const config = { headers: { Authorization: `Bearer ${token}` } };
+    try {
+      setLoadingMore(true);
+      const response = await adminAPI.getLogs({ cursor: nextCursor }, config);
+      olderLoaded.current = true;
+      setLogs(prev => [...prev, ...(response.data.logs || [])]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching older logs:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleLogout = () => {
     localStorage.removeItem('token');
     localStorage.removeItem('admin_token');
@@ -399,6 +426,18 @@ const AdminDashboard = () => {
                 </div>
               )}
             </div>
+
+            {nextCursor && (
+              <div className="px-6 py-4 border-t border-orange-100 flex justify-center">
+                <button
+                  onClick={fetchOlderLogs}
+                  disabled={loadingMore}
+                  className="flex items-center gap-2 text-orange-600 font-medium bg-white px-6 py-2 rounded-full shadow-sm border border-orange-200 hover:bg-orange-50 transition-colors disabled:opacity-60"
+                >
+                  {loadingMore && <Loader2 className="h-4 w-4 animate-spin" />} Load older transactions
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
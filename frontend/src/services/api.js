@@ -48,7 +48,8 @@ export const vendorAPI = {
   closeVendor: async () => {
     return api.post('/vendor/close');
   },
-  getOrders: () => api.get('/vendor/orders'),
+  // Pass the previous page's next_cursor as { cursor } to load older orders
+  getOrders: (params) => api.get('/vendor/orders', { params }),
   updateOrderStatus: (id, status) => api.patch(`/vendor/order/${id}/status`, { status })
 };
 
@@ -69,4 +70,13 @@ export const customerAPI = {
   checkPaymentStatus: (checkoutId) => api.get(`/customer/payment-status/${checkoutId}`)
 };
 
-export default api;
\ No newline at end of file
+export default api;
+
+// --- 4. ADMIN API ---
+export const adminAPI = {
+  getVendors: (config) => api.get('/admin/vendors', config),
+  // One page of logs; pass the previous page's next_cursor as { cursor } for older ones
+  getLogs: (params, config) => api.get('/admin/logs', { ...config, params }),
+  // Totals come from the server-side rollups, not from the loaded log pages
+  getStats: (params, config) => api.get('/admin/stats', { ...config, params }),
+};